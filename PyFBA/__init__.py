@@ -1,10 +1,25 @@
+import importlib
 
+__version__ = 2.0
 
-import PyFBA.fba
-import PyFBA.filters
-import PyFBA.gapfill
-import PyFBA.metabolism
-import PyFBA.parse
-import PyFBA.model
+# The subpackages are only imported the first time they are accessed (e.g. PyFBA.parse), so that
+# `import PyFBA` is cheap and does not need glpk, BeautifulSoup or the Model SEED database.
+_SUBPACKAGES = {'fba', 'filters', 'gapfill', 'lp', 'metabolism', 'model', 'parse'}
 
-__version__ = 2.0
+
+def __getattr__(name):
+    """
+    Import a subpackage on first access.
+
+    :param name: The name of the attribute that was requested
+    :type name: str
+    :return: The subpackage
+    :rtype: module
+    """
+    if name in _SUBPACKAGES:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals().keys()).union(_SUBPACKAGES))
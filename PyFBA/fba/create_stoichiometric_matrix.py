@@ -22,7 +22,7 @@ def create_stoichiometric_matrix(reactions_to_run, reactions, compounds, media,
     :type reactions: dict
     :param reactions_to_run: just the reaction ids that we want to include in our model
     :type reactions_to_run: set
-    :param media: a set of compounds that would make up the media
+    :param media: a set of compounds that would make up the media, either Compounds or their ids in the compound registry
     :type media: set
     :param biomass_equation: the biomass_equation equation as a Reaction object
     :type biomass_equation: metabolism.Reaction
@@ -33,45 +33,29 @@ def create_stoichiometric_matrix(reactions_to_run, reactions, compounds, media,
 
     """
 
-    sm = {}  # the matrix
-    allcpds = set()  # all the cpds in the matrix
+    # the rows of the matrix are the ids of the compounds in the compound registry, and each reaction is a column
+    # made from its stoichiometry arrays (see Reaction.stoichiometry), so we do not look up each compound
+    registry = PyFBA.metabolism.compound_registry
+    allcpds = set()  # the ids of all the cpds in the matrix
 
-    # initialize the compounds set and the stoichiometric matrix with
-    # everything in the media. The order of compounds is irrelevant
+    # initialize the compounds set with everything in the media. The order of compounds is irrelevant
     for c in media:
-        if str(c) not in compounds:
-            compounds[str(c)] = c
-        allcpds.add(str(c))
-        sm[str(c)] = {}
+        if isinstance(c, int):
+            # a compound id from the registry
+            c = compounds[PyFBA.metabolism.compound_key(c)]
+        if c.key not in compounds:
+            compounds[c.key] = c
+        allcpds.add(c.id)
 
     # iterate through the reactions
-    for r in reactions_to_run:
-        for c in reactions[r].left_compounds:
-            allcpds.add(str(c))
-            if str(c) not in sm:
-                sm[str(c)] = {}
-            sm[str(c)][r] = 0 - reactions[r].get_left_compound_abundance(c)
-
-        for c in reactions[r].right_compounds:
-            allcpds.add(str(c))
-            if str(c) not in sm:
-                sm[str(c)] = {}
-            sm[str(c)][r] = reactions[r].get_right_compound_abundance(c)
-
-    for c in biomass_equation.left_compounds:
-        if str(c) not in compounds:
-            compounds[str(c)] = c
-        allcpds.add(str(c))
-        if str(c) not in sm:
-            sm[str(c)] = {}
-        sm[str(c)]["BIOMASS_EQN"] = 0 - biomass_equation.get_left_compound_abundance(c)
-    for c in biomass_equation.right_compounds:
-        if str(c) not in compounds:
-            compounds[str(c)] = c
-        allcpds.add(str(c))
-        if str(c) not in sm:
-            sm[str(c)] = {}
-        sm[str(c)]["BIOMASS_EQN"] = biomass_equation.get_right_compound_abundance(c)
+    rc = sorted(reactions_to_run)
+    columns = PyFBA.metabolism.stoichiometric_columns([reactions[r] for r in rc])
+    allcpds.update(columns[1])
+
+    for c in biomass_equation.all_compounds():
+        if c.key not in compounds:
+            compounds[c.key] = c
+    allcpds.update(biomass_equation.compound_indices)
 
     # Add the uptake/secretion reactions. These are reactions that allow things to flow from the media
     # into the reaction, or from the cell outwards.
@@ -82,21 +66,19 @@ def create_stoichiometric_matrix(reactions_to_run, reactions, compounds, media,
     # When we set the reaction bounds we determine which things are in the media unless they are provided for you
 
     if not uptake_secretion:
-        uptake_secretion = PyFBA.fba.uptake_and_secretion_reactions(allcpds, compounds)
+        uptake_secretion = PyFBA.fba.uptake_and_secretion_reactions(sorted(registry.keys[i] for i in allcpds),
+                                                                    compounds)
+    uptake_columns = []
     for r in uptake_secretion:
         reactions[uptake_secretion[r].name] = uptake_secretion[r]
-        for c in uptake_secretion[r].left_compounds:
-            allcpds.add(str(c))
-            if str(c) not in sm:
-                sm[str(c)] = {}
-            sm[str(c)][uptake_secretion[r].name] = 0 - uptake_secretion[r].get_left_compound_abundance(c)
+        column = [(c.id, 0 - q) for c, q in uptake_secretion[r].left_abundance.items()]
+        allcpds.update(i for i, q in column)
+        uptake_columns.append(column)
 
     # now we need to make this into a matrix sorted by
     # reaction id and by cpds
-    cp = list(allcpds)
-    cp.sort()
-    rc = list(reactions_to_run)
-    rc.sort()
+    cp = sorted(registry.keys[i] for i in allcpds)
+    row = {registry.key_id(k): i for i, k in enumerate(cp)}
     rc += [uptake_secretion[x].name for x in uptake_secretion]
 
     # it is important that we add these at the end
@@ -105,17 +87,19 @@ def create_stoichiometric_matrix(reactions_to_run, reactions, compounds, media,
     if verbose:
         sys.stderr.write(sys.argv[0] + ": " + str(len(cp)) + " compounds and " + str(len(rc)) + " reactions\n")
 
-    # here we create the matrix from our sm hash
-    data = []
-    for i, j in enumerate(cp):
-        if j not in sm:
-            sys.exit("Error while parsing: no " + j + " in sm")
-        data.append([])
-        for c in rc:
-            if c in sm[j]:
-                data[i].append(sm[j][c])
-            else:
-                data[i].append(0.0)
+    # here we create the matrix from the columns. If a compound is on both sides of a reaction the right side wins
+    data = [[0.0] * len(rc) for i in cp]
+    indptr, indices, coefficients = columns
+    for j in range(len(indptr) - 1):
+        for k in range(indptr[j], indptr[j + 1]):
+            data[row[indices[k]]][j] = coefficients[k]
+    j = len(indptr) - 1
+    for column in uptake_columns:
+        for i, q in column:
+            data[row[i]][j] = q
+        j += 1
+    for i, q in zip(biomass_equation.compound_indices, biomass_equation.coefficients):
+        data[row[i]][j] = q
 
     # load the data into the model
     PyFBA.lp.load(data, cp, rc)
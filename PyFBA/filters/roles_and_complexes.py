@@ -2,6 +2,41 @@ import sys
 import PyFBA
 
 
+# the index of complexes for each Model SEED directory
+_complex_index = {}
+
+
+def complex_index(verbose=False):
+    """
+    The roles and reactions of every complex in the model seed data (see PyFBA.metabolism.EnzymeIndex).
+
+    Reading the roles and complexes is slow, so the index is only built once per process and then shared. Do not
+    change it!
+
+    :param verbose: print error reporting
+    :type verbose: bool
+    :return: The index of the complexes
+    :rtype: PyFBA.metabolism.EnzymeIndex
+    """
+
+    msd = PyFBA.parse.model_seed.modelseed_dir()
+    if msd in _complex_index:
+        return _complex_index[msd]
+
+    # key is complex and value is all reactions
+    cmpxs = PyFBA.parse.model_seed.complexes()
+    # key is role and value is all complexes
+    seedroles = PyFBA.parse.model_seed.roles()
+    if verbose:
+        for c in set().union(*seedroles.values()) - set(cmpxs):
+            # this occurs because there are reactions like cpx.1898 where we don't yet have a
+            # reaction for the complex
+            sys.stderr.write("ERROR: " + c + " was not found in the complexes file, but is from a reaction\n")
+
+    _complex_index[msd] = PyFBA.metabolism.EnzymeIndex.from_roles(seedroles, cmpxs)
+    return _complex_index[msd]
+
+
 def roles_to_complexes(roles, verbose=False):
     """
     Convert between roles and complexes using the model seed data
@@ -30,52 +65,14 @@ def roles_to_complexes(roles, verbose=False):
     elif isinstance(roles, str):
         roles = {roles}
 
-    # key is complex and value is all reactions
-    cmpxs = PyFBA.parse.model_seed.complexes()
-    # key is role and value is all complexes
-    seedroles = PyFBA.parse.model_seed.roles()
-    # Build reverse of seedroles: key is complex and value is all roles
-    seedcpxs = {}
-    for r, cpxset in seedroles.items():
-        for c in cpxset:
-            # Check if role's complex is in our modelseed complex set
-            if c not in cmpxs:
-                if verbose:
-                    # this occurs because there are reactions like cpx.1898 where we don't yet have a
-                    # reaction for the complex
-                    sys.stderr.write("ERROR: " + c + " was not found in the complexes file, but is from a reaction\n")
-                continue
-            # Record the complex to role mapping
-            if c not in seedcpxs:
-                seedcpxs[c] = set()
-            seedcpxs[c].add(r)
-
-    # Record which roles we have for our complexes
-    mycpxs = {}
+    index = complex_index(verbose)
+
     for r in roles:
         # check to see if it is a multifunctional role
         if '; ' in r or ' / ' in r or ' @ ' in r:
             sys.stderr.write("It seems that {} is a multifunctional role. You should separate the roles\n".format(r))
-        if r not in seedroles:
+        if r not in index.role_rows:
             if verbose:
                 sys.stderr.write(r + " is not a role we understand. Skipped\n")
-            continue
-
-        for c in seedroles[r]:
-            if c not in mycpxs:
-                mycpxs[c] = set()
-            mycpxs[c].add(r)
-
-    # Determine which of our complexes are complete and incomplete
-    ret_cpx = {"complete": set(), "incomplete": set()}
-    for c, roleset in mycpxs.items():
-        if c not in seedcpxs:
-            continue
-        which = "complete"
-        for r in seedcpxs[c]:
-            if r not in roleset:
-                which = "incomplete"
-                break
-        ret_cpx[which].add(c)
-
-    return ret_cpx
+
+    return index.complete_complexes(roles)
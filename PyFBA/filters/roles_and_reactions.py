@@ -60,6 +60,49 @@ def reactions_to_roles(reaction_set, verbose=False):
     return roles
 
 
+# the index of roles and reactions for each Model SEED directory
+_role_reactions = {}
+
+
+def role_reactions_index(verbose=False):
+    """
+    The reactions for every role in the model seed data, via the complexes that the role is part of.
+
+    Reading the roles and complexes is slow, so the index is only built once per process and then shared. Do not
+    change it!
+
+    :param verbose: print error reporting
+    :type verbose: bool
+    :return: a hash of roles and the set of the associated reaction ids
+    :rtype: dict of frozenset of str
+    """
+
+    msd = PyFBA.parse.model_seed.modelseed_dir()
+    if msd in _role_reactions:
+        return _role_reactions[msd]
+
+    # key is complex and value is all reactions
+    cmpxs = PyFBA.parse.model_seed.complexes()
+    # key is role and value is all complexes
+    seedroles = PyFBA.parse.model_seed.roles()
+
+    index = {}
+    for r in seedroles:
+        rcts = set()
+        for c in seedroles[r]:
+            if c not in cmpxs:
+                if verbose:
+                    # this occurs because there are reactions like cpx.1898 where we don't yet have a
+                    # reaction for the complex
+                    sys.stderr.write("ERROR: " + c + " was not found in the complexes file, but is from a reaction\n")
+                continue
+            rcts.update(cmpxs[c])
+        index[r] = frozenset(rcts)
+
+    _role_reactions[msd] = index
+    return index
+
+
 def roles_to_reactions(roles, verbose=False):
     """
     Convert between roles and reactions using the model seed data
@@ -80,31 +123,18 @@ def roles_to_reactions(roles, verbose=False):
     elif isinstance(roles, str):
         roles = {roles}
 
-    # key is complex and value is all reactions
-    cmpxs = PyFBA.parse.model_seed.complexes()
-    # key is role and value is all complexes
-    seedroles = PyFBA.parse.model_seed.roles()
+    index = role_reactions_index(verbose)
 
     rcts = {}
     for r in roles:
         # check to see if it is a multifunctional role
         if '; ' in r or ' / ' in r or ' @ ' in r:
             sys.stderr.write("It seems that {} is a multifunctional role. You should separate the roles\n".format(r))
-        if r not in seedroles:
+        if r not in index:
             if verbose:
                 sys.stderr.write(r + " is not a role we understand. Skipped\n")
             continue
-
-        rcts[r] = set()
-        for c in seedroles[r]:
-            if c not in cmpxs:
-                if verbose:
-                    # this occurs because there are reactions like cpx.1898 where we don't yet have a
-                    # reaction for the complex
-                    sys.stderr.write("ERROR: " + c + " was not found in the complexes file, but is from a reaction\n")
-                continue
-            for rc in cmpxs[c]:
-                rcts[r].add(rc)
+        rcts[r] = set(index[r])
 
     return rcts
 
@@ -1,14 +1,137 @@
 import os
-import sys
 import re
+import sys
+
+import PyFBA
+
+# an EC number, with - for the parts that are not known, e.g. 1.2.-.-
+EC_REGEX = re.compile(r'[\d\-]+\.[\d\-]+\.[\d\-]+\.[\d\-]+')
+
+
+class ECIndex:
+    """
+    An index of EC numbers and the reactions they catalyze.
 
-MODELSEED_DIR = os.environ['ModelSEEDDatabase']
+    The EC numbers are also stored in a prefix trie (one level for each part of the EC number) so that we can
+    look up partial EC numbers like 1.2.-.-, which match every reaction with an EC number that starts 1.2.
 
-def suggest_reactions_using_ec(roles, reactions, reactions2run, rf="Biochemistry/reactions.tsv", verbose=False):
+    :ivar ec_to_reactions: A dict of EC number and the set of reaction ids
+    """
+
+    def __init__(self):
+        self.ec_to_reactions = {}
+        # each node is a dict of the next part of the EC number and its node, and the reactions at this node are
+        # stored with the key None
+        self._trie = {None: set()}
+
+    @classmethod
+    def from_reactions(cls, reactions):
+        """
+        Build the index from the EC numbers of the reactions (see PyFBA.parse.model_seed.reactions).
+
+        :param reactions: Our reactions dictionary from parsing the model seed
+        :type reactions: dict
+        :rtype: ECIndex
+        """
+        index = cls()
+        for rxnid, r in reactions.items():
+            for ec in r.ec_numbers:
+                index.add(ec, rxnid)
+        return index
+
+    @classmethod
+    def from_file(cls, rf="Biochemistry/reactions.tsv"):
+        """
+        Build the index from the EC numbers in a reactions file from the SEED.
+
+        :param rf: The reactions file, relative to the Model SEED directory
+        :type rf: str
+        :return: The index, or None if the file does not exist
+        :rtype: ECIndex
+        """
+        msd = PyFBA.parse.model_seed.modelseed_dir()
+        if not os.path.exists(os.path.join(msd, rf)):
+            sys.stderr.write("FATAL: The reactions file {} does not exist from the directory {}.".format(rf, msd) +
+                             " Please provide a path to that file\n")
+            return None
+
+        index = cls()
+        with open(os.path.join(msd, rf), "r") as rin:
+            for l in rin:
+                if l.startswith("#") or l.startswith("id"):
+                    # Ignore comment lines
+                    continue
+                ll = l.strip().split("\t")
+                # EC number might be null, and multiple EC numbers can be assigned to a reaction
+                if ll[13] == "null":
+                    continue
+                for ec in ll[13].split(";"):
+                    index.add(ec, ll[0])
+        return index
+
+    def add(self, ec, rxnid):
+        """
+        Add a reaction for an EC number.
+
+        :param ec: The EC number
+        :type ec: str
+        :param rxnid: The reaction id
+        :type rxnid: str
+        """
+        if ec not in self.ec_to_reactions:
+            self.ec_to_reactions[ec] = set()
+        self.ec_to_reactions[ec].add(rxnid)
+
+        node = self._trie
+        for part in ec.split("."):
+            if part == '-':
+                break
+            if part not in node:
+                node[part] = {None: set()}
+            node = node[part]
+        node[None].add(rxnid)
+
+    def __contains__(self, ec):
+        return bool(self.reactions(ec))
+
+    def reactions(self, ec):
+        """
+        The reactions for an EC number. If the EC number has - in it, all the reactions with EC numbers that start
+        with the parts that we know.
+
+        :param ec: The EC number, e.g. 1.1.1.1 or 1.2.-.-
+        :type ec: str
+        :return: A new set of reaction ids
+        :rtype: set
+        """
+        parts = ec.split(".")
+        if '-' not in parts:
+            return set(self.ec_to_reactions.get(ec, set()))
+
+        node = self._trie
+        for part in parts[:parts.index('-')]:
+            if part not in node:
+                return set()
+            node = node[part]
+        rxns = set()
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            rxns.update(node[None])
+            nodes.extend([n for k, n in node.items() if k is not None])
+        return rxns
+
+
+def suggest_reactions_using_ec(roles, reactions, reactions2run, rf="Biochemistry/reactions.tsv", verbose=False,
+                               ec_index=None):
     """
     Identify a set of reactions that you should add to your model for growth based on the EC numbers
     that may be found in the role names.
 
+    You should build the ECIndex once when you load the biochemistry, and pass it to every call. If you do not
+    provide one we build it from the EC numbers of the reactions, or from the reactions file if the reactions do
+    not have any EC numbers.
+
     :param roles: A set of all roles to search for EC numbers.
     :type roles: set
     :param reactions: our reactions dictionary from parsing the model seed
@@ -19,46 +142,27 @@ def suggest_reactions_using_ec(roles, reactions, reactions2run, rf="Biochemistry
     :type rf: str
     :param verbose: add additional output
     :type verbose: bool
+    :param ec_index: The index of EC numbers and reactions
+    :type ec_index: ECIndex
     :return: A set of proposed reactions that should be added to your model to see if it grows
     :rtype: set
     """
 
-    if not os.path.exists(os.path.join(MODELSEED_DIR, rf)):
-        sys.stderr.write("FATAL: The reactions file {} does not exist from the directory {}.".format(rf, MODELSEED_DIR) +
-                         " Please provide a path to that file\n")
-        return set()
-
-    # Read the ModelSEED reactions file
-    ec_to_reactions = {}
-    with open(os.path.join(MODELSEED_DIR, rf), "r") as rin:
-        for l in rin:
-            if l.startswith("#") or l.startswith("id"):
-                # Ignore comment lines
-                continue
-            ll = l.strip().split("\t")
-            rxnid = ll[0]
-            ecs = ll[13]
-            # EC number might be null
-            if ecs == "null":
-                continue
-            # Multiple EC numbers can be assigned to a reaction
-            for e in ecs.split(";"):
-                if e not in ec_to_reactions:
-                    ec_to_reactions[e] = set()
-                ec_to_reactions[e].add(rxnid)
-
-    # Find all EC numbers in the list of roles
+    if ec_index is None:
+        ec_index = ECIndex.from_reactions(reactions)
+        if not ec_index.ec_to_reactions:
+            ec_index = ECIndex.from_file(rf)
+            if ec_index is None:
+                return set()
+
+    # Find all EC numbers in the list of roles. The roles can not span lines, so we search them all at once
     suggested_reactions = set()
-    for role in roles:
-        # Extract each EC number
-        for ec in re.findall("[\d\-]+\.[\d\-]+\.[\d\-]+\.[\d\-]+", role):
-            # Check if we know what that EC number is
-            if ec in ec_to_reactions:
-                # Check all reactions mapping to that EC number to make sure
-                # we have seen that reaction before
-                for rxnid in ec_to_reactions[ec]:
-                    if rxnid in reactions:
-                        suggested_reactions.add(rxnid)
+    for ec in set(EC_REGEX.findall("\n".join(roles))):
+        # Check all reactions mapping to that EC number to make sure
+        # we have seen that reaction before
+        for rxnid in ec_index.reactions(ec):
+            if rxnid in reactions:
+                suggested_reactions.add(rxnid)
 
     if verbose:
         sys.stderr.write("Found " + str(len(suggested_reactions)) + " reactions\n")
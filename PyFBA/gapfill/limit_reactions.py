@@ -1,6 +1,7 @@
+import PyFBA
 
 
-def limit_reactions_by_compound(reactions, reactions2run, suggestions, max_rcts=50):
+def limit_reactions_by_compound(reactions, reactions2run, suggestions, max_rcts=50, index=None):
     """
     Limit the reactions in suggestions based on the compounds present in
     the reactions in reactions2run and the number of reactions that each
@@ -18,21 +19,27 @@ def limit_reactions_by_compound(reactions, reactions2run, suggestions, max_rcts=
     :type suggestions: set
     :param max_rcts: the maximum number of reactions per compound
     :type max_rcts: int
+    :param index: The incidence index of the reactions (see PyFBA.metabolism.IncidenceIndex). If it is not given we
+        build one for just the reactions in reactions2run and suggestions
+    :type index: IncidenceIndex
     :return: a set of reactions which is those members of suggestions that meet our criteria
     :rtype: set
 
     """
 
-    cpd = {}
-    for r in reactions2run:
-        for c in reactions[r].all_compounds():
-            cpd[str(c)] = cpd.get(str(c), 0) + 1
+    if index is None:
+        index = PyFBA.metabolism.IncidenceIndex.from_reactions({r: reactions[r] for r in
+                                                                set(reactions2run) | set(suggestions)})
+    else:
+        # the reactions that were added after the index was built, e.g. the uptake and secretion reactions
+        index = index.including(reactions, set(reactions2run) | set(suggestions))
+    # the number of reactions in reactions2run that each compound is in
+    cpd = index.degrees(reactions2run)
 
     keep = set()
     for r in suggestions:
-        for c in reactions[r].all_compounds():
-            if str(c) in cpd and (cpd[str(c)] < max_rcts):
-                keep.add(r)
+        if any(0 < cpd[i] < max_rcts for i in index.compound_rows_of(r)):
+            keep.add(r)
 
     keep.difference_update(reactions2run)
 
@@ -1,5 +1,7 @@
 import sys
 
+import PyFBA
+
 
 def suggest_from_media(compounds, reactions, reactions2run, media, verbose=False):
     """
@@ -13,7 +15,7 @@ def suggest_from_media(compounds, reactions, reactions2run, media, verbose=False
     :type compounds: dict
     :param reactions2run: The reactions we are running
     :type reactions2run: set.
-    :param media: A set of the compounds in the media
+    :param media: A set of the compounds in the media, either Compounds or their ids in the compound registry
     :type media: set.
     :return: A set of proposed reactions that should be added to your model to see if it grows
     :rtype: set
@@ -22,8 +24,9 @@ def suggest_from_media(compounds, reactions, reactions2run, media, verbose=False
     # which compounds are in our media
     suggest = set()
     for c in media:
+        c = PyFBA.metabolism.compound_key(c)
         try:
-            rxns = compounds[str(c)].all_reactions()
+            rxns = compounds[c].all_reactions()
         except KeyError:
             if verbose:
                 sys.stderr.write(str(c) + " does not exist in the database, probably because of its compartment\n")
@@ -1,7 +1,9 @@
 import sys
 
+import PyFBA
 
-def suggest_by_compound(compounds, reactions, reactions2run, max_reactions, verbose=False):
+
+def suggest_by_compound(compounds, reactions, reactions2run, max_reactions, verbose=False, index=None):
     """
     Identify a set of reactions that you should add to your model for growth because they contain orphan compounds
 
@@ -31,29 +33,36 @@ def suggest_by_compound(compounds, reactions, reactions2run, max_reactions, verb
     :type max_reactions: int
     :param verbose: Print more output
     :type verbose: bool
+    :param index: The incidence index of the reactions (see PyFBA.metabolism.IncidenceIndex). If it is not given we
+        build one for just the reactions in reactions2run
+    :type index: IncidenceIndex
     :return: A set of proposed reactions that should be added to your model to see if it grows
     :rtype: set
 
     """
 
-    cpd = {}
-    for r in reactions2run:
-        for c in reactions[r].all_compounds():
-            cpd[str(c)] = cpd.get(str(c), 0) + 1
+    if index is None:
+        index = PyFBA.metabolism.IncidenceIndex.from_reactions({r: reactions[r] for r in reactions2run})
+    else:
+        # the reactions that were added after the index was built, e.g. the uptake and secretion reactions
+        index = index.including(reactions, reactions2run)
+    # the number of reactions in reactions2run that each compound is in
+    cpd = index.degrees(reactions2run)
 
     ikeep = set()
     ekeep = set()
 
     external = 0
     internal = 0
-    for c in compounds:
-        if str(compounds[c]) in cpd and cpd[str(compounds[c])] <= max_reactions:
-            if compounds[c].location == 'e':
+    for i, k in enumerate(index.compound_keys):
+        if 0 < cpd[i] <= max_reactions and k in compounds:
+            c = compounds[k]
+            if c.location == 'e':
                 external += 1
-                ekeep.update(compounds[c].all_reactions())
+                ekeep.update(c.all_reactions())
             else:
                 internal += 1
-                ikeep.update(compounds[c].all_reactions())
+                ikeep.update(c.all_reactions())
 
     if verbose:
         sys.stdout.write("{} | {} | {} | {} | {}\n".format(max_reactions, internal, len(ikeep), external, len(ekeep)))
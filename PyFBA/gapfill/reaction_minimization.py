@@ -136,7 +136,8 @@ def minimize_additional_reactions(base_reactions, optional_reactions, compounds,
     :rtype: set
     """
 
-    base_reactions = set(base_reactions)
+    # the base reactions are a ReactionSet so each union below is a bitwise or rather than a copy of the set
+    base_reactions = PyFBA.metabolism.ReactionSet(base_reactions)
     optional_reactions = set(optional_reactions)
     # test that (a) the base_reactions set does not grow and the base_reactions
     # + optional set does grow
@@ -294,7 +295,8 @@ def minimize_by_accuracy(base_reactions, optional_reactions, compounds, reaction
     if minimum_tp < 1:
         minimum_tp *= len(growth_media)
 
-    base_reactions = set(base_reactions)
+    # the base reactions are a ReactionSet so each union below is a bitwise or rather than a copy of the set
+    base_reactions = PyFBA.metabolism.ReactionSet(base_reactions)
     optional_reactions = set(optional_reactions)
     # test that (a) the base_reactions set does not grow and the base_reactions
     # + optional set does grow
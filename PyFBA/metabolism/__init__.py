@@ -1,7 +1,16 @@
 
-from .reaction import Reaction
-from .compound import Compound
+from .reaction import Reaction, duplicate_reactions, stoichiometric_columns
+from .compound import Compound, CompoundRegistry, compound_registry, compound_key
 from .enzyme import Enzyme
-from .biomass import biomass_equation
+from .biomass import biomass_equation, register_biomass, read_biomass_file
+from .formula import parse_formula, molecular_weight, balance_report
+from .overlay import OverlayReaction, OverlayCompound, CompoundOverlayReaction, ReactionOverlay
+from .incidence import IncidenceIndex
+from .enzyme_index import EnzymeIndex
+from .reaction_set import ReactionSet, ReactionRegistry, reaction_registry
 
-__all__ = ['biomass_equation', 'Reaction', 'Compound', 'Enzyme']
+__all__ = ['biomass_equation', 'register_biomass', 'read_biomass_file', 'Reaction', 'Compound', 'CompoundRegistry',
+           'compound_registry', 'compound_key', 'Enzyme',
+           'duplicate_reactions', 'stoichiometric_columns', 'parse_formula', 'molecular_weight', 'balance_report',
+           'OverlayReaction', 'OverlayCompound', 'CompoundOverlayReaction', 'ReactionOverlay', 'IncidenceIndex', 'EnzymeIndex',
+           'ReactionSet', 'ReactionRegistry', 'reaction_registry']
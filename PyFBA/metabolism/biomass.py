@@ -1,7 +1,21 @@
+import os
 import sys
-from .compound import Compound
+from .compound import Compound, compound_registry
+from .overlay import CompoundOverlayReaction
 from .reaction import Reaction
 
+# the compositions of the biomass equations, as functions that return the reactants and products
+_compositions = {}
+
+# the biomass equations that we have built, keyed by their type
+_biomass_equations = {}
+
+# the compounds in the biomass equations, keyed by their ids in the compound registry
+_compounds = {}
+
+# other names for the types of biomass equation
+ALIASES = {'gramnegative': 'gram_negative'}
+
 
 def standard_eqn():
     """The standard biomass_equation equation is derived from the SBML file
@@ -161,40 +175,93 @@ def gram_negative():
     return reactants, products
 
 
-def biomass_equation(biomass_type='standard'):
-    """Get the biomass_equation equation for a specific type of biomass_equation equation.
+def register_biomass(biomass_type, reactants, products):
+    """
+    Register a custom biomass composition, e.g. for one organism. biomass_equation(biomass_type) will build the
+    equation the first time it is used. If there is already a composition with this name it is replaced.
 
-    biomass_type can be one of:
-        standard:       the standard biomass_equation equation we were using for the JSON models initially
-        kbase:          the revised biomass_equation equation that was included in the kbase models
-        kbase_simple:   a simplified version of the kbase biomass_equation equation
-        gram_negative:  a Gram negative biomass_equation equation
+    :param biomass_type: The name of the biomass composition
+    :type biomass_type: str
+    :param reactants: The compounds consumed by the biomass reaction and their abundances
+    :type reactants: dict of str and float
+    :param products: The compounds produced by the biomass reaction and their abundances
+    :type products: dict of str and float
+    """
+    reactants = dict(reactants)
+    products = dict(products)
+    _compositions[biomass_type] = lambda: (reactants, products)
+    _biomass_equations.pop(biomass_type, None)
 
-    :param biomass_type: The type of biomass_equation equation to get
+
+def read_biomass_file(biomass_file, biomass_type=None):
+    """
+    Read a biomass composition from a file and register it (see register_biomass).
+
+    The file has a compound name and its coefficient on each line, separated by a tab. The coefficients of the
+    compounds that are consumed are negative, and those of the compounds that are produced are positive. Lines
+    that start with # are ignored.
+
+    :param biomass_file: The file to read
+    :type biomass_file: str
+    :param biomass_type: The name of the biomass composition. The default is the name of the file
     :type biomass_type: str
-    :return: The biomass_equation equation as a Reaction object
-    :rtype: Reaction
+    :return: The name of the biomass composition
+    :rtype: str
     """
+    if not biomass_type:
+        biomass_type = os.path.splitext(os.path.basename(biomass_file))[0]
+    reactants = {}
+    products = {}
+    with open(biomass_file, 'r') as f:
+        for l in f:
+            if l.startswith('#') or not l.strip():
+                continue
+            p = l.rstrip("\n").split("\t")
+            if len(p) < 2:
+                raise ValueError("Can not parse the line {} in {}".format(l.strip(), biomass_file))
+            q = float(p[1])
+            if q < 0:
+                reactants[p[0]] = -q
+            elif q > 0:
+                products[p[0]] = q
+    register_biomass(biomass_type, reactants, products)
+    return biomass_type
 
-    if biomass_type == 'standard':
-        reactants, products = standard_eqn()
-    elif biomass_type == 'kbase':
-        reactants, products = kbase()
-    elif biomass_type == 'kbase_simple':
-        reactants, products = kbase_simple()
-    elif biomass_type == 'gram_negative' or biomass_type == 'gramnegative':
-        reactants, products = gram_negative()
-    else:
-        sys.exit("ERROR: Do not understand what " + biomass_type + " is for a biomass_equation equation\n")
+
+def _biomass_compound(name):
+    """
+    The compound for a name in a biomass equation. Each compound is only created once, and is only handed out
+    in an OverlayCompound (see biomass_equation), so it is not changed.
+
+    :param name: The name of the compound
+    :type name: str
+    :rtype: Compound
+    """
+    i = compound_registry.id(name, 'c')
+    if i not in _compounds:
+        _compounds[i] = Compound(name, 'c')
+    return _compounds[i]
+
+
+def _build_biomass_equation(reactants, products):
+    """
+    Build the biomass equation from its reactants and products.
+
+    :param reactants: The compounds consumed by the biomass reaction and their abundances
+    :type reactants: dict of str and float
+    :param products: The compounds produced by the biomass reaction and their abundances
+    :type products: dict of str and float
+    :rtype: Reaction
+    """
 
     r = Reaction('biomass_equation')
     for c in reactants:
-        cpd = Compound(c, 'c')
+        cpd = _biomass_compound(c)
         r.add_left_compounds({cpd})
         r.set_left_compound_abundance(cpd, reactants[c])
 
     for c in products:
-        cpd = Compound(c, 'c')
+        cpd = _biomass_compound(c)
         r.add_right_compounds({cpd})
         r.set_right_compound_abundance(cpd, products[c])
 
@@ -205,5 +272,40 @@ def biomass_equation(biomass_type='standard'):
     r.equation = " + ".join(["(" + str(reactants[x]) + ") " + x for x in rcts])
     r.equation += " > "
     r.equation += " + ".join(["(" + str(products[x]) + ") " + x for x in prds])
-
+    # build the stoichiometry now, so every model that uses this equation shares it
+    r.stoichiometry()
     return r
+
+
+def biomass_equation(biomass_type='standard'):
+    """Get the biomass_equation equation for a specific type of biomass_equation equation.
+
+    biomass_type can be one of:
+        standard:       the standard biomass_equation equation we were using for the JSON models initially
+        kbase:          the revised biomass_equation equation that was included in the kbase models
+        kbase_simple:   a simplified version of the kbase biomass_equation equation
+        gram_negative:  a Gram negative biomass_equation equation
+
+    or a custom composition added with register_biomass or read_biomass_file.
+
+    Each equation is only built once. You get a new CompoundOverlayReaction each time, which shares the equation
+    and its compounds until you change them, so you can change your copy (e.g. set is_biomass_reaction or add
+    reactions to its compounds) without changing the equation for anyone else.
+
+    :param biomass_type: The type of biomass_equation equation to get
+    :type biomass_type: str
+    :return: The biomass_equation equation as a Reaction object
+    :rtype: Reaction
+    """
+
+    biomass_type = ALIASES.get(biomass_type, biomass_type)
+    if biomass_type not in _biomass_equations:
+        if biomass_type not in _compositions:
+            sys.exit("ERROR: Do not understand what " + biomass_type + " is for a biomass_equation equation\n")
+        reactants, products = _compositions[biomass_type]()
+        _biomass_equations[biomass_type] = _build_biomass_equation(reactants, products)
+    return CompoundOverlayReaction(_biomass_equations[biomass_type])
+
+
+_compositions.update({'standard': standard_eqn, 'kbase': kbase, 'kbase_simple': kbase_simple,
+                      'gram_negative': gram_negative})
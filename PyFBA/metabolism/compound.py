@@ -1,7 +1,92 @@
+import sys
+
+from .containers import EMPTY_SET, lazy_container
+from .formula import molecular_weight
 
 COMMON_REACTION_LIMIT = 5
 
 
+class CompoundRegistry:
+    """
+    Every (name, location) that we have seen, each with a small integer id and the key string that we use for the
+    compound in the compounds dicts, e.g. "H2O (location: c)".
+
+    The key for each compound is only built once, and you can use the ids to key your own dicts and arrays rather
+    than the strings. The ids are only valid in this process.
+
+    :ivar keys: The key string for each id
+    :ivar names: The (name, location) tuple for each id
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.names = []
+        self._ids = {}
+        self._key_ids = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def id(self, name, location):
+        """
+        The id for a name and location. A new id is assigned the first time we see them.
+
+        :param name: The name of the compound
+        :type name: str
+        :param location: The location of the compound
+        :type location: str
+        :rtype: int
+        """
+        try:
+            return self._ids[(name, location)]
+        except KeyError:
+            i = len(self.keys)
+            key = sys.intern(name + " (location: " + location + ")")
+            self._ids[(name, location)] = i
+            self._key_ids[key] = i
+            self.keys.append(key)
+            self.names.append((name, location))
+            return i
+
+    def key(self, i):
+        """
+        The key string for an id.
+
+        :param i: The id
+        :type i: int
+        :rtype: str
+        """
+        return self.keys[i]
+
+    def key_id(self, key):
+        """
+        The id for a key string.
+
+        :param key: The key, e.g. "H2O (location: c)"
+        :type key: str
+        :return: The id, or None if we have not seen this compound
+        :rtype: int
+        """
+        return self._key_ids.get(key)
+
+
+# the registry for all the compounds in this process
+compound_registry = CompoundRegistry()
+
+
+def compound_key(cpd):
+    """
+    The key string for a compound, which can be a Compound, a compound id from the registry, or already a key.
+
+    :param cpd: The compound
+    :type cpd: Compound or int or str
+    :rtype: str
+    """
+    if isinstance(cpd, int):
+        return compound_registry.keys[cpd]
+    return str(cpd)
+
+
 class Compound:
     """
     A compound is the essential metabolic compound that is involved in a reaction.
@@ -26,6 +111,12 @@ class Compound:
 
     """
 
+    __slots__ = ['_name', '_location', '_id', '_reactions', 'model_seed_id', '_alternate_seed_ids', 'abbreviation',
+                 'formula', 'mw', 'common', 'charge', 'uptake_secretion']
+
+    reactions = lazy_container('_reactions', set, "The set of reactions that this compound is connected to")
+    alternate_seed_ids = lazy_container('_alternate_seed_ids', set, "The other model seed ids of this compound")
+
     def __init__(self, name, location):
         """
         Initiate the object
@@ -37,11 +128,12 @@ class Compound:
         :return:
         :rtype:
         """
-        self.name = name
-        self.location = location
-        self.reactions = set()
+        self._name = name
+        self._location = location
+        self._id = None
+        self._reactions = None
         self.model_seed_id = name
-        self.alternate_seed_ids = set()
+        self._alternate_seed_ids = None
         self.abbreviation = None
         self.formula = None
         self.mw = 0
@@ -49,6 +141,74 @@ class Compound:
         self.charge = 0
         self.uptake_secretion = False
 
+    @property
+    def name(self):
+        """
+        The name of the compound.
+
+        :rtype: str
+        """
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        self._id = None
+
+    @property
+    def location(self):
+        """
+        The location of the compound.
+
+        :rtype: str
+        """
+        return self._location
+
+    @location.setter
+    def location(self, location):
+        self._location = location
+        self._id = None
+
+    @property
+    def id(self):
+        """
+        The id of this name and location in the compound registry.
+
+        :rtype: int
+        """
+        if self._id is None:
+            self._id = compound_registry.id(self._name, self._location)
+        return self._id
+
+    @property
+    def key(self):
+        """
+        The key that we use for this compound in the compounds dicts, e.g. "H2O (location: c)". This is the same as
+        str(compound), but it is only built once.
+
+        :rtype: str
+        """
+        return compound_registry.keys[self.id]
+
+    def __getstate__(self):
+        """
+        The state to pickle or copy. We do not keep the registry id, because it is only valid in this process.
+
+        :rtype: dict
+        """
+        return {s: getattr(self, s) for s in self.__slots__ if s != '_id' and hasattr(self, s)}
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled or copied compound.
+
+        :param state: The state from __getstate__
+        :type state: dict
+        """
+        self._id = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
     def __eq__(self, other):
         """
         Two compounds are equal if they have the same name and the same location
@@ -59,7 +219,7 @@ class Compound:
         :rtype: bool
         """
         if isinstance(other, Compound):
-            return (self.name, self.location) == (other.name, other.location)
+            return (self._name, self._location) == (other._name, other._location)
         else:
             return NotImplemented
     
@@ -100,14 +260,14 @@ class Compound:
 
         :rtype: int
         """
-        return hash((self.name, self.location))
+        return hash((self._name, self._location))
 
     def __str__(self):
         """
         The to string function.
         :rtype: str
         """
-        return self.name + " (location: " + self.location + ")"
+        return compound_registry.keys[self.id]
 
 
     def add_reactions(self, rxns):
@@ -133,7 +293,7 @@ class Compound:
         :return: Whether the reaction is present
         :rtype: bool
         """
-        return rxn in self.reactions
+        return rxn in (self._reactions or EMPTY_SET)
 
 
     def number_of_reactions(self):
@@ -142,7 +302,7 @@ class Compound:
 
         :rtype: int
         """
-        return len(self.reactions)
+        return len(self._reactions or EMPTY_SET)
 
 
     def all_reactions(self):
@@ -175,10 +335,15 @@ class Compound:
 
     def calculate_molecular_weight(self):
         """
-        Calculate and return the molecular weight of this compound
+        Calculate and return the molecular weight of this compound from its formula. Each formula is only parsed once,
+        so this is fast for compounds that share a formula (e.g. the same compound in different locations).
 
         :return: The molecular weight
         :rtype: float
+        :raises ValueError: If the compound does not have a formula, or the formula has something without a mass
+            (e.g. an R group)
         """
 
-        raise NotImplemented("Sorry. Calculate molecular weight has not yet been implemented.")
\ No newline at end of file
+        if not self.formula or self.formula == 'null':
+            raise ValueError("{} does not have a formula".format(self))
+        return molecular_weight(self.formula)
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Lazily created sets and dicts for the Compound, Reaction, and Enzyme classes.
+
+There are hundreds of thousands of these objects when the biochemistry is loaded, and most of them never use most
+of their sets and dicts (e.g. the pegs of a reaction). The classes use __slots__, and each container slot holds
+None until the container is needed. The methods that only read a container use the shared EMPTY_SET or
+EMPTY_DICT instead, and the container is created the first time the attribute itself is used, e.g. to add to it.
+"""
+
+from types import MappingProxyType
+
+EMPTY_SET = frozenset()
+EMPTY_DICT = MappingProxyType({})
+
+
+def lazy_container(slot, factory, doc=None, reset=()):
+    """
+    A property for a container that is created the first time it is accessed.
+
+    :param slot: The name of the slot that holds the container, or None
+    :type slot: str
+    :param factory: The type of container to create, e.g. set or dict
+    :type factory: type
+    :param doc: The documentation for the property
+    :type doc: str
+    :param reset: The names of the slots that cache something computed from the container, which are set to None
+        when the container is replaced
+    :type reset: tuple of str
+    :rtype: property
+    """
+
+    def fget(self):
+        value = getattr(self, slot)
+        if value is None:
+            value = factory()
+            setattr(self, slot, value)
+        return value
+
+    def fset(self, value):
+        setattr(self, slot, value)
+        for r in reset:
+            setattr(self, r, None)
+
+    return property(fget, fset, doc=doc)
@@ -5,6 +5,7 @@ genome we are investigating
 
 """
 from . import Reaction
+from .containers import EMPTY_DICT, EMPTY_SET, lazy_container
 
 
 class Enzyme:
@@ -28,6 +29,14 @@ class Enzyme:
     :type ec_number: set
     """
 
+    __slots__ = ['name', '_roles', '_pegs', '_roles_w_pegs', '_reactions', '_ec_number']
+
+    roles = lazy_container('_roles', set, "The set of roles associated with the enzyme")
+    pegs = lazy_container('_pegs', dict, "The pegs associated with the enzyme and their roles")
+    roles_w_pegs = lazy_container('_roles_w_pegs', dict, "The roles associated with the enzyme and their pegs")
+    reactions = lazy_container('_reactions', set, "The reaction IDs that this enzyme connects to")
+    ec_number = lazy_container('_ec_number', set, "The EC numbers associated with this Enzyme")
+
 
     def __init__(self, name):
         """
@@ -38,11 +47,11 @@ class Enzyme:
         """
 
         self.name = name  # whatever name we give to this thing!
-        self.roles = set()  # Roles (text strings)
-        self.pegs = {}  # a hash that connects Roles to PEGs
-        self.roles_w_pegs = {}  # which roles have pegs
-        self.reactions = set()  # RIDs that the enzyme connects to
-        self.ec_number = set() # one or more EC numbers associated with this Enzyme. We only store the numeric part (not the EC part)
+        self._roles = None  # Roles (text strings)
+        self._pegs = None  # a hash that connects Roles to PEGs
+        self._roles_w_pegs = None  # which roles have pegs
+        self._reactions = None  # RIDs that the enzyme connects to
+        self._ec_number = None # one or more EC numbers associated with this Enzyme. We only store the numeric part (not the EC part)
 
     def __eq__(self, other):
         """
@@ -54,7 +63,7 @@ class Enzyme:
         :rtype: bool
         """
         if isinstance(other, Enzyme):
-            return (self.name, self.roles) == (other.name, other.roles)
+            return (self.name, self._roles or EMPTY_SET) == (other.name, other._roles or EMPTY_SET)
         else:
             return NotImplemented
 
@@ -86,7 +95,7 @@ class Enzyme:
 
         :rtype: str
         """
-        return "ENZYME: " + self.name + " (roles: " + "; ".join([x for x in self.roles]) + ")"
+        return "ENZYME: " + self.name + " (roles: " + "; ".join([x for x in self._roles or EMPTY_SET]) + ")"
 
     def add_roles(self, roles):
         """
@@ -108,7 +117,7 @@ class Enzyme:
         :returns: A boolean
         :rtype: bool
         """
-        return role in self.roles
+        return role in (self._roles or EMPTY_SET)
 
     def number_of_roles(self):
         """
@@ -116,7 +125,7 @@ class Enzyme:
 
         :rtype: int
         """
-        return len(self.roles)
+        return len(self._roles or EMPTY_SET)
 
     def add_pegs(self, pegs):
         """
@@ -165,7 +174,7 @@ class Enzyme:
 
         :rtype: int
         """
-        return len(self.pegs)
+        return len(self._pegs or EMPTY_DICT)
 
     def number_of_roles_with_pegs(self):
         """
@@ -173,7 +182,7 @@ class Enzyme:
 
         :rtype: int
         """
-        return len(self.roles_w_pegs)
+        return len(self._roles_w_pegs or EMPTY_DICT)
 
     def has_peg_for_role(self, role):
         """
@@ -184,7 +193,7 @@ class Enzyme:
         :return: If a peg is present
         :rtype: bool
         """
-        return role in self.roles_w_pegs
+        return role in (self._roles_w_pegs or EMPTY_DICT)
 
     def add_reaction(self, reaction):
         """
@@ -204,7 +213,7 @@ class Enzyme:
 
         :rtype: int
         """
-        return len(self.reactions)
+        return len(self._reactions or EMPTY_SET)
 
 
     def add_ec(self, ecnumber):
@@ -0,0 +1,211 @@
+"""
+Score all of the enzyme complexes against a genome at once.
+
+Enzyme.probability is the fraction of the roles of one complex that have pegs. To score a genome we want that
+fraction for every complex in the biochemistry, and then the best complex for every reaction, so rather than
+creating an Enzyme for each complex and adding the pegs to it, EnzymeIndex keeps the roles of each complex and the
+reactions of each complex as compressed sparse row (CSR) arrays, where the entries for row i are
+entries[indptr[i]:indptr[i+1]]. The index is built once, and each genome is then one pass over its roles and one
+pass over the complexes.
+
+    index = PyFBA.metabolism.EnzymeIndex.from_enzymes(enzymes)
+    probabilities = index.complex_probabilities(role_pegs)     # in the order of index.complex_ids
+    weights = index.reaction_weights(role_pegs)                # a dict of reaction id and weight
+"""
+
+from array import array
+from collections.abc import Mapping
+
+
+class EnzymeIndex:
+    """
+    The roles and reactions of each enzyme complex.
+
+    :ivar roles: The role in each row
+    :ivar complex_ids: The id of the complex in each row
+    :ivar reaction_ids: The id of the reaction in each row
+    :ivar role_indptr: The CSR pointers for the complexes of each role
+    :ivar role_complexes: The complex rows for each role
+    :ivar complex_indptr: The CSR pointers for the reactions of each complex
+    :ivar complex_reactions: The reaction rows for each complex
+    :ivar role_counts: The number of roles of each complex
+    """
+
+    def __init__(self, roles, complex_ids, reaction_ids, role_indptr, role_complexes, complex_indptr,
+                 complex_reactions):
+        """
+        Create the index from its arrays. Use from_enzymes or from_roles to build the index.
+
+        :param roles: The role in each row
+        :type roles: list of str
+        :param complex_ids: The id of the complex in each row
+        :type complex_ids: list of str
+        :param reaction_ids: The id of the reaction in each row
+        :type reaction_ids: list of str
+        :param role_indptr: The CSR pointers for the complexes of each role
+        :type role_indptr: array
+        :param role_complexes: The complex rows for each role
+        :type role_complexes: array
+        :param complex_indptr: The CSR pointers for the reactions of each complex
+        :type complex_indptr: array
+        :param complex_reactions: The reaction rows for each complex
+        :type complex_reactions: array
+        """
+        self.roles = roles
+        self.complex_ids = complex_ids
+        self.reaction_ids = reaction_ids
+        self.role_indptr = role_indptr
+        self.role_complexes = role_complexes
+        self.complex_indptr = complex_indptr
+        self.complex_reactions = complex_reactions
+        self.role_rows = {r: i for i, r in enumerate(roles)}
+        self.complex_rows = {c: i for i, c in enumerate(complex_ids)}
+        self.role_counts = array('l', [0]) * len(complex_ids)
+        for j in role_complexes:
+            self.role_counts[j] += 1
+
+    @classmethod
+    def from_enzymes(cls, enzymes):
+        """
+        Build the index from the enzymes, e.g. from compounds_reactions_enzymes(). Complexes without any roles are
+        not included, because we can not score them.
+
+        :param enzymes: A dict of complex id and Enzyme
+        :type enzymes: dict
+        :rtype: EnzymeIndex
+        """
+        return cls._build({c: e.roles for c, e in enzymes.items()}, {c: e.reactions for c, e in enzymes.items()})
+
+    @classmethod
+    def from_roles(cls, roles, complexes):
+        """
+        Build the index from the roles and complexes of the Model SEED (see PyFBA.parse.model_seed.roles and
+        PyFBA.parse.model_seed.complexes). As in PyFBA.parse.model_seed.enzymes, we only include the complexes that
+        have both roles and reactions.
+
+        :param roles: A dict of role and the set of complex ids that the role is in
+        :type roles: dict
+        :param complexes: A dict of complex id and the set of reaction ids of the complex
+        :type complexes: dict
+        :rtype: EnzymeIndex
+        """
+        complex_roles = {}
+        for r, cpxs in roles.items():
+            for c in cpxs:
+                if c in complexes:
+                    complex_roles.setdefault(c, set()).add(r)
+        return cls._build(complex_roles, complexes)
+
+    @classmethod
+    def _build(cls, complex_roles, complex_reactions):
+        """
+        Build the index from the roles and reactions of each complex.
+
+        :param complex_roles: A dict of complex id and its roles
+        :type complex_roles: dict
+        :param complex_reactions: A dict of complex id and its reaction ids
+        :type complex_reactions: dict
+        :rtype: EnzymeIndex
+        """
+        complex_ids = sorted(c for c in complex_roles if complex_roles[c])
+        complex_rows = {c: j for j, c in enumerate(complex_ids)}
+        roles = sorted({r for c in complex_ids for r in complex_roles[c]})
+        reaction_ids = sorted({r for c in complex_ids for r in complex_reactions.get(c, ())})
+        reaction_rows = {r: k for k, r in enumerate(reaction_ids)}
+
+        role_complexes = {}
+        for c in complex_ids:
+            for r in complex_roles[c]:
+                role_complexes.setdefault(r, []).append(complex_rows[c])
+        role_indptr = array('q', [0])
+        role_cpx = array('l')
+        for r in roles:
+            role_cpx.extend(role_complexes[r])
+            role_indptr.append(len(role_cpx))
+
+        complex_indptr = array('q', [0])
+        complex_rxns = array('l')
+        for c in complex_ids:
+            complex_rxns.extend(sorted(reaction_rows[r] for r in complex_reactions.get(c, ())))
+            complex_indptr.append(len(complex_rxns))
+
+        return cls(roles, complex_ids, reaction_ids, role_indptr, role_cpx, complex_indptr, complex_rxns)
+
+    def roles_with_pegs(self, role_pegs):
+        """
+        The number of roles of each complex that have pegs in a genome.
+
+        :param role_pegs: The roles in the genome. Either a dict of role and its pegs, where roles without any pegs
+            are ignored, or a set of roles
+        :type role_pegs: dict or set
+        :return: The number of roles with pegs, in the order of complex_ids
+        :rtype: array of int
+        """
+        counts = array('l', [0]) * len(self.complex_ids)
+        is_mapping = isinstance(role_pegs, Mapping)
+        for role in role_pegs:
+            i = self.role_rows.get(role)
+            if i is None or (is_mapping and not role_pegs[role]):
+                continue
+            for k in range(self.role_indptr[i], self.role_indptr[i + 1]):
+                counts[self.role_complexes[k]] += 1
+        return counts
+
+    def complex_probabilities(self, role_pegs):
+        """
+        The probability of each complex in a genome, the fraction of its roles that have pegs (see
+        Enzyme.probability).
+
+        :param role_pegs: The roles in the genome, a dict of role and its pegs or a set of roles
+        :type role_pegs: dict or set
+        :return: The probabilities, in the order of complex_ids
+        :rtype: array of float
+        """
+        counts = self.roles_with_pegs(role_pegs)
+        return array('d', [n / t for n, t in zip(counts, self.role_counts)])
+
+    def reaction_probabilities(self, role_pegs):
+        """
+        The probability of each reaction in a genome, the probability of the best complex for the reaction.
+
+        :param role_pegs: The roles in the genome, a dict of role and its pegs or a set of roles
+        :type role_pegs: dict or set
+        :return: The probabilities, in the order of reaction_ids
+        :rtype: array of float
+        """
+        probabilities = array('d', [0.0]) * len(self.reaction_ids)
+        for j, p in enumerate(self.complex_probabilities(role_pegs)):
+            if p == 0:
+                continue
+            for k in range(self.complex_indptr[j], self.complex_indptr[j + 1]):
+                rk = self.complex_reactions[k]
+                if p > probabilities[rk]:
+                    probabilities[rk] = p
+        return probabilities
+
+    def reaction_weights(self, role_pegs):
+        """
+        The weight of each reaction for gap-filling, 1 - its probability, so a reaction with a complete complex
+        costs nothing to add and a reaction without any evidence costs 1.
+
+        :param role_pegs: The roles in the genome, a dict of role and its pegs or a set of roles
+        :type role_pegs: dict or set
+        :return: A dict of reaction id and weight
+        :rtype: dict of str and float
+        """
+        return {r: 1.0 - p for r, p in zip(self.reaction_ids, self.reaction_probabilities(role_pegs))}
+
+    def complete_complexes(self, role_pegs):
+        """
+        The complexes that have pegs for all of their roles, and the complexes that have pegs for some of them.
+
+        :param role_pegs: The roles in the genome, a dict of role and its pegs or a set of roles
+        :type role_pegs: dict or set
+        :return: A dict with the "complete" and "incomplete" complex ids
+        :rtype: dict of set of str
+        """
+        complexes = {"complete": set(), "incomplete": set()}
+        for c, n, t in zip(self.complex_ids, self.roles_with_pegs(role_pegs), self.role_counts):
+            if n:
+                complexes["complete" if n == t else "incomplete"].add(c)
+        return complexes
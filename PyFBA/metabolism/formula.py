@@ -0,0 +1,195 @@
+"""
+Chemical formulas: the elements in a formula, the molecular weight of a compound, and whether reactions are balanced.
+
+The Model SEED has about 30,000 compounds but far fewer distinct formulas, so we parse each formula once and keep
+the counts of its elements. balance_report uses these counts to check the mass and charge balance of many reactions
+at once: it builds the element counts of each compound once and multiplies them by the stoichiometric columns of the
+reactions (see stoichiometric_columns).
+
+Formulas may contain R groups (e.g. C5H7O4R). We count these like an element so the element balance still works,
+but they do not have a mass.
+"""
+
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+
+from .reaction import stoichiometric_columns
+
+# the standard atomic weights of the elements (IUPAC)
+ELEMENT_MASSES = {
+    'H': 1.008, 'He': 4.0026, 'Li': 6.94, 'Be': 9.0122, 'B': 10.81, 'C': 12.011, 'N': 14.007, 'O': 15.999,
+    'F': 18.998, 'Ne': 20.180, 'Na': 22.990, 'Mg': 24.305, 'Al': 26.982, 'Si': 28.085, 'P': 30.974, 'S': 32.06,
+    'Cl': 35.45, 'Ar': 39.948, 'K': 39.098, 'Ca': 40.078, 'Sc': 44.956, 'Ti': 47.867, 'V': 50.942, 'Cr': 51.996,
+    'Mn': 54.938, 'Fe': 55.845, 'Co': 58.933, 'Ni': 58.693, 'Cu': 63.546, 'Zn': 65.38, 'Ga': 69.723, 'Ge': 72.630,
+    'As': 74.922, 'Se': 78.971, 'Br': 79.904, 'Kr': 83.798, 'Rb': 85.468, 'Sr': 87.62, 'Y': 88.906, 'Zr': 91.224,
+    'Nb': 92.906, 'Mo': 95.95, 'Tc': 98.0, 'Ru': 101.07, 'Rh': 102.91, 'Pd': 106.42, 'Ag': 107.87, 'Cd': 112.41,
+    'In': 114.82, 'Sn': 118.71, 'Sb': 121.76, 'Te': 127.60, 'I': 126.90, 'Xe': 131.29, 'Cs': 132.91, 'Ba': 137.33,
+    'La': 138.91, 'Ce': 140.12, 'Gd': 157.25, 'W': 183.84, 'Pt': 195.08, 'Au': 196.97, 'Hg': 200.59, 'Tl': 204.38,
+    'Pb': 207.2, 'Bi': 208.98, 'U': 238.03,
+}
+
+# an element and its count, an open bracket, or a close bracket and its count. Anything else is an error.
+FORMULA_REGEX = re.compile(r'([A-Z][a-z]?)(\d*)|(\()|\)(\d*)|(.)')
+
+# imbalances smaller than this are rounding errors in the coefficients
+TOLERANCE = 1e-9
+
+
+@lru_cache(maxsize=None)
+def _parse_formula(formula):
+    """
+    Parse a formula into the counts of its elements.
+
+    :param formula: The formula
+    :type formula: str
+    :return: A sorted tuple of (element, count)
+    :rtype: tuple
+    """
+    stack = [{}]
+    for m in FORMULA_REGEX.finditer(formula):
+        element, count, opened, closed, bad = m.groups()
+        if bad is not None:
+            raise ValueError("Can not parse {} in the formula {}".format(bad, formula))
+        if element:
+            stack[-1][element] = stack[-1].get(element, 0) + int(count or 1)
+        elif opened:
+            stack.append({})
+        else:
+            if len(stack) == 1:
+                raise ValueError("Unbalanced brackets in the formula {}".format(formula))
+            group = stack.pop()
+            for e, n in group.items():
+                stack[-1][e] = stack[-1].get(e, 0) + n * int(closed or 1)
+    if len(stack) != 1 or not stack[0]:
+        raise ValueError("Can not parse the formula {}".format(formula))
+    return tuple(sorted(stack[0].items()))
+
+
+def parse_formula(formula):
+    """
+    The elements in a formula, e.g. C6H12O6 is {'C': 6, 'H': 12, 'O': 6}. Each formula is only parsed once.
+
+    :param formula: The formula
+    :type formula: str
+    :return: A new dict of the elements and their counts
+    :rtype: dict of str and int
+    """
+    return dict(_parse_formula(formula))
+
+
+@lru_cache(maxsize=None)
+def molecular_weight(formula):
+    """
+    The molecular weight of a formula.
+
+    :param formula: The formula
+    :type formula: str
+    :return: The molecular weight
+    :rtype: float
+    """
+    mw = 0.0
+    for e, n in _parse_formula(formula):
+        if e not in ELEMENT_MASSES:
+            raise ValueError("We do not know the mass of {} in the formula {}".format(e, formula))
+        mw += ELEMENT_MASSES[e] * n
+    return mw
+
+
+def _element_counts(formula):
+    """
+    The element counts of a formula, or None if the compound does not have a formula that we can parse.
+
+    :param formula: The formula
+    :type formula: str
+    :rtype: tuple
+    """
+    if not formula or formula == 'null':
+        return None
+    try:
+        return _parse_formula(formula)
+    except ValueError:
+        return None
+
+
+def _charge(charge):
+    """
+    The charge of a compound as a number. Compounds without a charge are neutral, but a charge that we can not
+    parse (e.g. a string from a file) is unknown.
+
+    :param charge: The charge
+    :type charge: int or float or str
+    :return: The charge, or None if it is unknown
+    :rtype: float
+    """
+    if charge is None or charge == '':
+        return 0.0
+    try:
+        return float(charge)
+    except (TypeError, ValueError):
+        return None
+
+
+def balance_report(reactions):
+    """
+    The mass and charge balance of each reaction.
+
+    We get the element counts and charge of each compound once, and then add up the columns of the stoichiometric
+    matrix of the reactions (products minus substrates), so this is one pass over the reactions.
+
+    For each reaction the report has:
+        elements: the elements that are not balanced, and the imbalance of each, or None if any compound in the
+            reaction does not have a formula
+        mass: the imbalance of the molecular weight, or None if we can not calculate it (e.g. an R group)
+        charge: the imbalance of the charge, or None if we can not parse the charge of a compound
+
+    A reaction is balanced if elements is empty and the charge is 0.
+
+    :param reactions: The reactions, either a dict of reaction id and Reaction or an iterable of Reactions
+    :type reactions: dict or iterable
+    :return: A dict of reaction name and its balance
+    :rtype: dict of str and dict
+    """
+
+    if isinstance(reactions, Mapping):
+        reactions = reactions.values()
+    reactions = list(reactions)
+
+    # the element counts and charge of each compound, by their ids in the compound registry
+    elements = {}
+    charges = {}
+    for r in reactions:
+        for c in r.all_compounds():
+            if c.id not in elements:
+                elements[c.id] = _element_counts(c.formula)
+                charges[c.id] = _charge(c.charge)
+
+    indptr, indices, data = stoichiometric_columns(reactions)
+    report = {}
+    for j, r in enumerate(reactions):
+        net = {}
+        charge = 0.0
+        known = True
+        for k in range(indptr[j], indptr[j + 1]):
+            q = data[k]
+            if charge is not None:
+                charge = None if charges[indices[k]] is None else charge + q * charges[indices[k]]
+            counts = elements[indices[k]]
+            if counts is None:
+                known = False
+                continue
+            for e, n in counts:
+                net[e] = net.get(e, 0) + q * n
+
+        if known:
+            net = {e: n for e, n in net.items() if abs(n) > TOLERANCE}
+            if all(e in ELEMENT_MASSES for e in net):
+                mass = sum(ELEMENT_MASSES[e] * n for e, n in net.items())
+            else:
+                mass = None
+        else:
+            net = mass = None
+        if charge is not None and abs(charge) < TOLERANCE:
+            charge = 0.0
+        report[r.name] = {'elements': net, 'mass': mass, 'charge': charge}
+    return report
@@ -0,0 +1,301 @@
+"""
+The incidence of compounds and reactions: which compounds are in each reaction, and which reactions each compound is
+in.
+
+The index is built once for the whole biochemistry (or read from a biochemistry store) and kept as compressed sparse
+row (CSR) arrays in both directions, where the entries for row i are entries[indptr[i]:indptr[i+1]]. The compounds
+are rows keyed by their key strings (str(compound)) and the reactions by their ids, so the index can be saved and
+does not depend on the compound registry of one process.
+
+    index = PyFBA.metabolism.IncidenceIndex.from_reactions(reactions)
+    index.degree(compound)                   # the number of reactions the compound is in
+    index.degrees(reactions2run)             # the number of reactions in reactions2run each compound is in
+    index.neighborhood({'rxn00001'}, 50)     # the reactions that share a compound with rxn00001, ignoring H2O etc
+"""
+
+from array import array
+
+from .compound import COMMON_REACTION_LIMIT, compound_key
+
+
+def _transpose(ncompounds, reaction_indptr, reaction_compounds):
+    """
+    The reactions of each compound from the compounds of each reaction. We fill them in reaction order so each
+    compound's reactions are sorted by their rows.
+
+    :param ncompounds: The number of compounds
+    :type ncompounds: int
+    :param reaction_indptr: The CSR pointers for the compounds in each reaction
+    :type reaction_indptr: array
+    :param reaction_compounds: The compound rows for each reaction
+    :type reaction_compounds: array
+    :return: The CSR pointers for the reactions of each compound, and the reaction rows for each compound
+    :rtype: (array, array)
+    """
+    counts = [0] * ncompounds
+    for i in reaction_compounds:
+        counts[i] += 1
+    compound_indptr = array('q', [0])
+    for n in counts:
+        compound_indptr.append(compound_indptr[-1] + n)
+    compound_reactions = array('l', [0]) * len(reaction_compounds)
+    fill = list(compound_indptr[:-1])
+    for j in range(len(reaction_indptr) - 1):
+        for k in range(reaction_indptr[j], reaction_indptr[j + 1]):
+            i = reaction_compounds[k]
+            compound_reactions[fill[i]] = j
+            fill[i] += 1
+    return compound_indptr, compound_reactions
+
+
+class IncidenceIndex:
+    """
+    The compounds in each reaction, and the reactions each compound is in.
+
+    :ivar compound_keys: The key of the compound in each row
+    :ivar reaction_ids: The id of the reaction in each row
+    :ivar reaction_indptr: The CSR pointers for the compounds in each reaction
+    :ivar reaction_compounds: The compound rows for each reaction
+    :ivar compound_indptr: The CSR pointers for the reactions of each compound
+    :ivar compound_reactions: The reaction rows for each compound
+    """
+
+    def __init__(self, compound_keys, reaction_ids, reaction_indptr, reaction_compounds, compound_indptr,
+                 compound_reactions):
+        """
+        Create the index from its arrays. Use from_reactions to build the index, or BiochemistryStore.incidence to
+        read it from a store.
+
+        :param compound_keys: The key of the compound in each row
+        :type compound_keys: list of str
+        :param reaction_ids: The id of the reaction in each row
+        :type reaction_ids: list of str
+        :param reaction_indptr: The CSR pointers for the compounds in each reaction
+        :type reaction_indptr: array
+        :param reaction_compounds: The compound rows for each reaction
+        :type reaction_compounds: array
+        :param compound_indptr: The CSR pointers for the reactions of each compound
+        :type compound_indptr: array
+        :param compound_reactions: The reaction rows for each compound
+        :type compound_reactions: array
+        """
+        self.compound_keys = compound_keys
+        self.reaction_ids = reaction_ids
+        self.reaction_indptr = reaction_indptr
+        self.reaction_compounds = reaction_compounds
+        self.compound_indptr = compound_indptr
+        self.compound_reactions = compound_reactions
+        self.compound_rows = {k: i for i, k in enumerate(compound_keys)}
+        self.reaction_rows = {r: i for i, r in enumerate(reaction_ids)}
+
+    @classmethod
+    def from_reactions(cls, reactions, compounds=None):
+        """
+        Build the index for some reactions.
+
+        :param reactions: The reactions, a dict of reaction id and Reaction
+        :type reactions: dict
+        :param compounds: Other compounds (or their keys) to include in the index even if they are not in any of
+            the reactions
+        :type compounds: iterable
+        :rtype: IncidenceIndex
+        """
+        reaction_ids = sorted(reactions)
+        keys = set()
+        rows = []
+        for rid in reaction_ids:
+            r = reactions[rid]
+            row = {c.key for c in r.all_compounds()}
+            keys.update(row)
+            rows.append(row)
+        if compounds is not None:
+            keys.update(compound_key(c) for c in compounds)
+        compound_keys = sorted(keys)
+        compound_rows = {k: i for i, k in enumerate(compound_keys)}
+
+        reaction_indptr = array('q', [0])
+        reaction_compounds = array('l')
+        for row in rows:
+            reaction_compounds.extend(sorted(compound_rows[k] for k in row))
+            reaction_indptr.append(len(reaction_compounds))
+
+        return cls(compound_keys, reaction_ids, reaction_indptr, reaction_compounds,
+                   *_transpose(len(compound_keys), reaction_indptr, reaction_compounds))
+
+    def with_reactions(self, reactions):
+        """
+        A new index with some more reactions, e.g. the uptake and secretion reactions or the reactions that were
+        added after the index was built. The reactions that are already in the index are not changed. The new
+        reactions (and any new compounds) are added after the rows that we already have.
+
+        :param reactions: The reactions, a dict of reaction id and Reaction
+        :type reactions: dict
+        :rtype: IncidenceIndex
+        """
+        compound_keys = list(self.compound_keys)
+        compound_rows = dict(self.compound_rows)
+        reaction_ids = list(self.reaction_ids)
+        reaction_indptr = array('q', self.reaction_indptr)
+        reaction_compounds = array('l', self.reaction_compounds)
+        for rid in sorted(reactions):
+            if rid in self.reaction_rows:
+                continue
+            row = set()
+            for c in reactions[rid].all_compounds():
+                if c.key not in compound_rows:
+                    compound_rows[c.key] = len(compound_keys)
+                    compound_keys.append(c.key)
+                row.add(compound_rows[c.key])
+            reaction_compounds.extend(sorted(row))
+            reaction_indptr.append(len(reaction_compounds))
+            reaction_ids.append(rid)
+
+        return IncidenceIndex(compound_keys, reaction_ids, reaction_indptr, reaction_compounds,
+                              *_transpose(len(compound_keys), reaction_indptr, reaction_compounds))
+
+    def including(self, reactions, reaction_ids):
+        """
+        This index if it has all of the reactions, otherwise a new index that also has the reactions that it is
+        missing (see with_reactions).
+
+        :param reactions: The reactions, a dict of reaction id and Reaction
+        :type reactions: dict
+        :param reaction_ids: The ids of the reactions that we need in the index
+        :type reaction_ids: iterable of str
+        :rtype: IncidenceIndex
+        """
+        missing = {r: reactions[r] for r in reaction_ids if r not in self.reaction_rows}
+        if missing:
+            return self.with_reactions(missing)
+        return self
+
+    def _compound_row(self, compound):
+        """
+        The row of a compound.
+
+        :param compound: The compound, its id in the compound registry, or its key
+        :type compound: Compound or int or str
+        :return: The row, or None if the compound is not in the index
+        :rtype: int
+        """
+        return self.compound_rows.get(compound_key(compound))
+
+    def degree(self, compound):
+        """
+        The number of reactions that a compound is in.
+
+        :param compound: The compound, its id in the compound registry, or its key
+        :type compound: Compound or int or str
+        :rtype: int
+        """
+        i = self._compound_row(compound)
+        if i is None:
+            return 0
+        return self.compound_indptr[i + 1] - self.compound_indptr[i]
+
+    def degrees(self, reactions=None):
+        """
+        The number of reactions each compound is in, in the order of compound_keys. If reactions is given we only
+        count those reactions, e.g. the reactions in a model.
+
+        :param reactions: The ids of the reactions to count. The default is all of the reactions.
+        :type reactions: iterable of str
+        :rtype: array of int
+        """
+        if reactions is None:
+            indptr = self.compound_indptr
+            return array('l', [indptr[i + 1] - indptr[i] for i in range(len(self.compound_keys))])
+        counts = array('l', [0]) * len(self.compound_keys)
+        for rid in reactions:
+            j = self.reaction_rows.get(rid)
+            if j is None:
+                continue
+            for k in range(self.reaction_indptr[j], self.reaction_indptr[j + 1]):
+                counts[self.reaction_compounds[k]] += 1
+        return counts
+
+    def common_compounds(self, limit=COMMON_REACTION_LIMIT):
+        """
+        The compounds that are in more than limit reactions (see Compound.is_common).
+
+        :param limit: The number of reactions
+        :type limit: int
+        :return: The keys of the compounds
+        :rtype: set of str
+        """
+        indptr = self.compound_indptr
+        return {k for i, k in enumerate(self.compound_keys) if indptr[i + 1] - indptr[i] > limit}
+
+    def compound_rows_of(self, reaction):
+        """
+        The rows of the compounds in a reaction, e.g. to look them up in the array from degrees.
+
+        :param reaction: The reaction id
+        :type reaction: str
+        :return: The rows of the compounds, which is empty if the reaction is not in the index
+        :rtype: array of int
+        """
+        j = self.reaction_rows.get(reaction)
+        if j is None:
+            return self.reaction_compounds[0:0]
+        return self.reaction_compounds[self.reaction_indptr[j]:self.reaction_indptr[j + 1]]
+
+    def compounds_of(self, reactions):
+        """
+        The compounds in some reactions.
+
+        :param reactions: The reaction ids
+        :type reactions: iterable of str
+        :return: The keys of the compounds
+        :rtype: set of str
+        """
+        keys = set()
+        for rid in reactions:
+            j = self.reaction_rows.get(rid)
+            if j is not None:
+                keys.update(self.compound_keys[i] for i in
+                            self.reaction_compounds[self.reaction_indptr[j]:self.reaction_indptr[j + 1]])
+        return keys
+
+    def reactions_of(self, compounds):
+        """
+        The reactions that some compounds are in.
+
+        :param compounds: The compounds, their ids in the compound registry, or their keys
+        :type compounds: iterable
+        :return: The reaction ids
+        :rtype: set of str
+        """
+        rids = set()
+        for c in compounds:
+            i = self._compound_row(c)
+            if i is not None:
+                rids.update(self.reaction_ids[j] for j in
+                            self.compound_reactions[self.compound_indptr[i]:self.compound_indptr[i + 1]])
+        return rids
+
+    def neighborhood(self, reactions, max_degree=None):
+        """
+        The reactions that share a compound with any of the reactions, not including the reactions themselves.
+
+        :param reactions: The reaction ids
+        :type reactions: iterable of str
+        :param max_degree: Only follow the compounds that are in at most this many reactions, to skip compounds
+            like H2O that are in almost every reaction
+        :type max_degree: int
+        :return: The reaction ids
+        :rtype: set of str
+        """
+        reactions = set(reactions)
+        indptr = self.compound_indptr
+        rows = set()
+        for rid in reactions:
+            j = self.reaction_rows.get(rid)
+            if j is not None:
+                rows.update(self.reaction_compounds[self.reaction_indptr[j]:self.reaction_indptr[j + 1]])
+        found = set()
+        for i in rows:
+            if max_degree is not None and indptr[i + 1] - indptr[i] > max_degree:
+                continue
+            found.update(self.compound_reactions[indptr[i]:indptr[i + 1]])
+        return {self.reaction_ids[j] for j in found} - reactions
@@ -0,0 +1,373 @@
+"""
+Per-model changes to shared reactions.
+
+Gap-filling and the probability scores change the reactions (e.g. is_gapfilled, gapfill_method, pLR and pRL), and
+the reactions from the biochemistry are shared by every model that uses them, so a change for one model would be seen
+by all of them. Rather than copying the biochemistry for each model, wrap the reactions in a ReactionOverlay:
+
+    reactions = PyFBA.metabolism.ReactionOverlay(reactions)
+    reactions['rxn00001'].is_gapfilled = True
+
+Each reaction in the overlay is an OverlayReaction that keeps the fields that were changed and reads everything else
+from the shared reaction, which is not changed. OverlayCompound does the same for shared compounds, and
+CompoundOverlayReaction also gives its caller their own overlays of the compounds of the reaction.
+"""
+
+import copy
+from collections.abc import MutableMapping
+
+from .compound import Compound
+from .containers import EMPTY_DICT, EMPTY_SET
+from .reaction import Reaction
+
+# the slots that cache something computed from the other fields, which are not changes to the reaction
+_CACHES = {'_stoichiometry', '_signature'}
+
+
+def _read_through(cls, name, empty):
+    """
+    A container property for an overlay. If the overlay has not set the container we return the shared object's
+    container (or an empty one) without setting anything on the overlay, so reading a field is not a change.
+
+    :param cls: The class of the shared object, Reaction or Compound
+    :type cls: type
+    :param name: The name of the property, e.g. left_compounds
+    :type name: str
+    :param empty: The read only container to return if neither object has the container
+    :type empty: frozenset or MappingProxyType
+    :rtype: property
+    """
+    prop = cls.__dict__[name]
+    slot = '_' + name
+
+    def fget(self):
+        if self._is_set(slot):
+            return prop.fget(self)
+        value = getattr(self._base, slot)
+        return empty if value is None else value
+
+    return property(fget, prop.fset, doc=prop.__doc__)
+
+
+class _Overlay:
+    """
+    Reading through to a shared object. The subclasses set _shared to the class of the shared object.
+    """
+
+    __slots__ = ()
+
+    _shared = None
+
+    def __getattr__(self, name):
+        """
+        Read a field that has not been set on the overlay from the shared object. This is only called when the
+        field is not set on the overlay.
+
+        :param name: The name of the field
+        :type name: str
+        :rtype: object
+        """
+        if name == '_base':
+            raise AttributeError(name)
+        return getattr(self._base, name)
+
+    @property
+    def base(self):
+        """
+        The shared object.
+
+        :rtype: Reaction or Compound
+        """
+        return self._base
+
+    def _is_set(self, slot):
+        """
+        Whether a field has been set on the overlay.
+
+        :param slot: The name of the slot
+        :type slot: str
+        :rtype: bool
+        """
+        try:
+            self._shared.__dict__[slot].__get__(self, type(self))
+            return True
+        except AttributeError:
+            return False
+
+    def _own(self, slot):
+        """
+        Copy a container from the shared object before we change it.
+
+        :param slot: The name of the slot that holds the container
+        :type slot: str
+        """
+        if not self._is_set(slot):
+            value = getattr(self._base, slot)
+            setattr(self, slot, None if value is None else copy.copy(value))
+
+
+class OverlayReaction(_Overlay, Reaction):
+    """
+    A reaction that reads through to a shared reaction, and keeps its own value for each field that is set.
+
+    The containers (e.g. the compounds, abundances, enzymes and pegs) are copied from the shared reaction the first
+    time they are changed with the add, set and reverse methods. Reading a container that the overlay has not set
+    gives the shared reaction's container, or a read only empty one, so do not change a container directly (e.g.
+    reaction.enzymes.add(x)); use the add methods or assign a new container instead.
+
+    Copying or pickling an overlay reaction gives a Reaction with the changes applied.
+
+    :ivar base: The shared reaction
+    """
+
+    __slots__ = ['_base']
+
+    _shared = Reaction
+
+    left_compounds = _read_through(Reaction, 'left_compounds', EMPTY_SET)
+    left_abundance = _read_through(Reaction, 'left_abundance', EMPTY_DICT)
+    right_compounds = _read_through(Reaction, 'right_compounds', EMPTY_SET)
+    right_abundance = _read_through(Reaction, 'right_abundance', EMPTY_DICT)
+    enzymes = _read_through(Reaction, 'enzymes', EMPTY_SET)
+    pegs = _read_through(Reaction, 'pegs', EMPTY_SET)
+    ec_numbers = _read_through(Reaction, 'ec_numbers', EMPTY_SET)
+
+    def __init__(self, base):
+        """
+        Create the overlay. We do not call Reaction.__init__, so every field reads through until it is set.
+
+        :param base: The shared reaction
+        :type base: Reaction
+        """
+        self._base = base
+
+    def overrides(self):
+        """
+        The fields that have been set on this overlay.
+
+        :return: A dict of the field and its value
+        :rtype: dict
+        """
+        return {s: getattr(self, s) for s in Reaction.__slots__ if s not in _CACHES and self._is_set(s)}
+
+    def materialize(self):
+        """
+        A Reaction with the changes in this overlay applied to a copy of the shared reaction.
+
+        :rtype: Reaction
+        """
+        r = copy.copy(self._base)
+        for k, v in self.overrides().items():
+            setattr(r, k, v)
+        return r
+
+    def __reduce_ex__(self, protocol):
+        """Copy or pickle the reaction with the changes applied"""
+        r = self.materialize()
+        return Reaction.__new__, (Reaction,), r.__getstate__()
+
+    def add_left_compounds(self, cmpds):
+        """Add compounds to the left of the reaction, without changing the shared reaction"""
+        self._own('_left_compounds')
+        super().add_left_compounds(cmpds)
+
+    def add_right_compounds(self, cmpds):
+        """Add compounds to the right of the reaction, without changing the shared reaction"""
+        self._own('_right_compounds')
+        super().add_right_compounds(cmpds)
+
+    def set_left_compound_abundance(self, cmpd, abundance):
+        """Set the abundance of a compound on the left, without changing the shared reaction"""
+        self._own('_left_abundance')
+        super().set_left_compound_abundance(cmpd, abundance)
+
+    def set_right_compound_abundance(self, cmpd, abundance):
+        """Set the abundance of a compound on the right, without changing the shared reaction"""
+        self._own('_right_abundance')
+        super().set_right_compound_abundance(cmpd, abundance)
+
+    def reverse_reaction(self):
+        """Reverse the reaction, without changing the shared reaction"""
+        for slot in ['_left_compounds', '_right_compounds', '_left_abundance', '_right_abundance']:
+            self._own(slot)
+        super().reverse_reaction()
+
+    def add_enzymes(self, enz):
+        """Add enzymes to the reaction, without changing the shared reaction"""
+        self._own('_enzymes')
+        super().add_enzymes(enz)
+
+    def add_pegs(self, pegs):
+        """Add pegs to the reaction, without changing the shared reaction"""
+        self._own('_pegs')
+        super().add_pegs(pegs)
+
+
+class OverlayCompound(_Overlay, Compound):
+    """
+    A compound that reads through to a shared compound, and keeps its own value for each field that is set. As
+    with OverlayReaction, the containers (the reactions and alternate seed ids) are copied the first time they are
+    changed with add_reactions, so do not change them directly.
+
+    Copying or pickling an overlay compound gives a Compound with the changes applied.
+
+    :ivar base: The shared compound
+    """
+
+    __slots__ = ['_base']
+
+    _shared = Compound
+
+    reactions = _read_through(Compound, 'reactions', EMPTY_SET)
+    alternate_seed_ids = _read_through(Compound, 'alternate_seed_ids', EMPTY_SET)
+
+    def __init__(self, base):
+        """
+        Create the overlay. We do not call Compound.__init__, so every field reads through until it is set.
+
+        :param base: The shared compound
+        :type base: Compound
+        """
+        self._base = base
+
+    def __reduce_ex__(self, protocol):
+        """Copy or pickle the compound with the changes applied"""
+        state = {s: getattr(self, s) for s in Compound.__slots__ if s != '_id'}
+        return Compound.__new__, (Compound,), state
+
+    def add_reactions(self, rxns):
+        """Add reactions to the compound, without changing the shared compound"""
+        self._own('_reactions')
+        super().add_reactions(rxns)
+
+
+# the slots of a reaction that hold its compounds
+_COMPOUND_SLOTS = ('_left_compounds', '_left_abundance', '_right_compounds', '_right_abundance')
+
+
+class CompoundOverlayReaction(OverlayReaction):
+    """
+    An overlay reaction that also does not share the compounds of the shared reaction. The first time the compounds
+    or abundances are used, the overlay gets its own containers with an OverlayCompound for each compound, so
+    changing a compound (e.g. adding reactions to it) does not change it for anyone else. Until then, and for the
+    stoichiometry of the shared reaction, nothing is copied.
+    """
+
+    __slots__ = []
+
+    left_compounds = Reaction.__dict__['left_compounds']
+    left_abundance = Reaction.__dict__['left_abundance']
+    right_compounds = Reaction.__dict__['right_compounds']
+    right_abundance = Reaction.__dict__['right_abundance']
+
+    def __getattr__(self, name):
+        """
+        Read a field that has not been set on the overlay, creating the overlays of the compounds the first time
+        they are used.
+
+        :param name: The name of the field
+        :type name: str
+        :rtype: object
+        """
+        if name in _COMPOUND_SLOTS:
+            self._own_compounds()
+            return getattr(self, name)
+        return super().__getattr__(name)
+
+    def _own_compounds(self):
+        """
+        Give the overlay its own compound containers, with an overlay for each compound. We set the slots directly,
+        so the shared stoichiometry is still used.
+        """
+        base = self._base
+        cpds = {c: OverlayCompound(c) for c in base.all_compounds()}
+        left, right = base._left_abundance, base._right_abundance
+        self._left_compounds = {cpds[c] for c in base._left_compounds or EMPTY_SET}
+        self._left_abundance = {cpds[c]: q for c, q in (left or EMPTY_DICT).items()}
+        self._right_compounds = {cpds[c] for c in base._right_compounds or EMPTY_SET}
+        self._right_abundance = {cpds[c]: q for c, q in (right or EMPTY_DICT).items()}
+
+    def _own(self, slot):
+        """
+        Copy a container from the shared reaction before we change it. The compound containers are replaced with
+        overlays of the compounds.
+
+        :param slot: The name of the slot that holds the container
+        :type slot: str
+        """
+        if slot in _COMPOUND_SLOTS:
+            if not self._is_set(slot):
+                self._own_compounds()
+        else:
+            super()._own(slot)
+
+
+class ReactionOverlay(MutableMapping):
+    """
+    A per-model view of a shared dict of reactions. The first time a reaction is used we wrap it in an
+    OverlayReaction, so changes to it are only seen in this view. Reactions that are added or removed (e.g. the
+    uptake and secretion reactions) are only added or removed in this view.
+
+    :ivar base: The shared reactions
+    """
+
+    def __init__(self, reactions):
+        """
+        Create the view.
+
+        :param reactions: The shared reactions, a dict of reaction id and Reaction
+        :type reactions: dict
+        """
+        self.base = reactions
+        self._reactions = {}
+        self._removed = set()
+
+    def __getitem__(self, rid):
+        if rid in self._reactions:
+            return self._reactions[rid]
+        if rid in self._removed:
+            raise KeyError(rid)
+        r = OverlayReaction(self.base[rid])
+        self._reactions[rid] = r
+        return r
+
+    def __setitem__(self, rid, reaction):
+        self._reactions[rid] = reaction
+        self._removed.discard(rid)
+
+    def __delitem__(self, rid):
+        if rid not in self:
+            raise KeyError(rid)
+        self._reactions.pop(rid, None)
+        if rid in self.base:
+            self._removed.add(rid)
+
+    def __contains__(self, rid):
+        return rid in self._reactions or (rid in self.base and rid not in self._removed)
+
+    def __iter__(self):
+        for rid in self.base:
+            if rid not in self._removed:
+                yield rid
+        for rid in self._reactions:
+            if rid not in self.base:
+                yield rid
+
+    def __len__(self):
+        return len(self.base) - len(self._removed) + sum(1 for rid in self._reactions if rid not in self.base)
+
+    def overrides(self):
+        """
+        The fields that have been changed in this view, for each reaction that has been changed. Reactions that
+        were added to the view are not included.
+
+        :return: A dict of reaction id and a dict of the fields and their values
+        :rtype: dict of str and dict
+        """
+        changes = {}
+        for rid, r in self._reactions.items():
+            if isinstance(r, OverlayReaction):
+                o = r.overrides()
+                if o:
+                    changes[rid] = o
+        return changes
@@ -1,4 +1,25 @@
 import sys
+from array import array
+from collections.abc import Mapping
+
+from .containers import EMPTY_DICT, EMPTY_SET, lazy_container
+
+
+def _equation_term(cmpd, abundance):
+    """
+    Format one compound in an equation, e.g. (2) Phosphate[c]. Whole numbers are written without a decimal point.
+
+    :param cmpd: The compound
+    :type cmpd: Compound
+    :param abundance: The abundance of the compound in the reaction
+    :type abundance: float
+    :rtype: str
+    """
+    if abundance == int(abundance):
+        abundance = int(abundance)
+    if hasattr(cmpd, 'location'):
+        return "(" + str(abundance) + ") " + cmpd.name + "[" + cmpd.location + "]"
+    return "(" + str(abundance) + ") " + str(cmpd)
 
 
 class Reaction:
@@ -31,7 +52,7 @@ class Reaction:
 
     :ivar name: The name of the reaction
     :ivar description: A description of the reaction
-    :ivar equation: The reaction equation
+    :ivar equation: The reaction equation. If it is not set it is rendered from the compounds when it is accessed
     :ivar direction: The direction of the reaction (<, =, >, or ?)
     :ivar left_compounds: A set of compounds on the left side of the reaction
     :ivar left_abundance: A dict of the compounds on the left and their abundance
@@ -54,9 +75,31 @@ class Reaction:
     :ivar is_gapfilled: Boolean to note whether the reaction was gapfilled
     :ivar gapfill_method: If the reaction was gapfilled, how was it gapfilled
     :ivar is_uptake_secretion: Is the reaction involved in uptake of compounds or secretion of compounds.
+    :ivar ec_numbers: The EC numbers of the reaction
+    :ivar aliases: The ids of the reaction in other databases. This is only set by the parsers.
+    :ivar compound_indices: The ids of the compounds in the compound registry, in the same order as coefficients
+    :ivar coefficients: The signed stoichiometric coefficients, negative for the compounds on the left
 
     """
 
+    __slots__ = ['name', 'description', '_equation', 'direction', '_left_compounds', '_left_abundance',
+                 '_right_compounds', '_right_abundance', 'lower_bound', 'upper_bound', 'pLR', 'pRL', '_enzymes',
+                 '_pegs', 'deltaG_error', 'deltaG', 'inp', 'outp', 'is_transport', 'ran', 'is_biomass_reaction',
+                 'biomass_direction', 'is_gapfilled', 'gapfill_method', 'is_uptake_secretion', '_ec_numbers',
+                 'aliases', '_stoichiometry', '_signature']
+
+    left_compounds = lazy_container('_left_compounds', set, "The set of compounds on the left of the reaction",
+                                    reset=('_stoichiometry', '_signature'))
+    left_abundance = lazy_container('_left_abundance', dict, "The compounds on the left and their abundance",
+                                    reset=('_stoichiometry', '_signature'))
+    right_compounds = lazy_container('_right_compounds', set, "The set of compounds on the right of the reaction",
+                                     reset=('_stoichiometry', '_signature'))
+    right_abundance = lazy_container('_right_abundance', dict, "The compounds on the right and their abundance",
+                                     reset=('_stoichiometry', '_signature'))
+    enzymes = lazy_container('_enzymes', set, "The enzyme complex IDs involved in the reaction")
+    pegs = lazy_container('_pegs', set, "The protein-encoding genes involved in the reaction")
+    ec_numbers = lazy_container('_ec_numbers', set, "The EC numbers of the reaction")
+
     def __init__(self, name):
         """
         Instantiate the reaction
@@ -69,18 +112,18 @@ class Reaction:
 
         self.name = name
         self.description = None
-        self.equation = None
+        self._equation = None
         self.direction = None
-        self.left_compounds = set()
-        self.left_abundance = {}
-        self.right_compounds = set()
-        self.right_abundance = {}
+        self._left_compounds = None
+        self._left_abundance = None
+        self._right_compounds = None
+        self._right_abundance = None
         self.lower_bound = None
         self.upper_bound = None
         self.pLR = 0
         self.pRL = 0
-        self.enzymes = set()
-        self.pegs = set()
+        self._enzymes = None
+        self._pegs = None
         self.deltaG_error = 0
         self.deltaG = 0
         self.inp = False
@@ -92,14 +135,77 @@ class Reaction:
         self.is_gapfilled = False
         self.gapfill_method = ""
         self.is_uptake_secretion = False
+        self._ec_numbers = None
+        self._stoichiometry = None
+        self._signature = None
+
+    def __getstate__(self):
+        """
+        The state to pickle or copy. We do not keep the stoichiometry arrays, because the compound ids in them are
+        only valid in this process, or the signature, which is quick to rebuild.
+
+        :rtype: dict
+        """
+        return {s: getattr(self, s) for s in self.__slots__
+                if s not in ('_stoichiometry', '_signature') and hasattr(self, s)}
+
+    def __setstate__(self, state):
+        """
+        Restore a pickled or copied reaction.
+
+        :param state: The state from __getstate__
+        :type state: dict
+        """
+        self._stoichiometry = None
+        self._signature = None
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    @property
+    def equation(self):
+        """
+        The reaction equation. If an equation has not been explicitly set we render it from the compounds and their
+        abundances, e.g. (1) H2O[c] + (1) PPi[c] <=> (2) Phosphate[c] + (1) H+[c]. We only do this when the
+        equation is used, so parsing the biochemistry does not build a string for every reaction.
+
+        :rtype: str
+        """
+        if self._equation is None and (self._left_abundance or self._right_abundance):
+            return " + ".join([_equation_term(c, q) for c, q in (self._left_abundance or EMPTY_DICT).items()]) + \
+                   " <=> " + \
+                   " + ".join([_equation_term(c, q) for c, q in (self._right_abundance or EMPTY_DICT).items()])
+        return self._equation
+
+    @equation.setter
+    def equation(self, equation):
+        """
+        Set the reaction equation explicitly.
+
+        :param equation: The equation
+        :type equation: str
+        """
+        self._equation = equation
+
+    @property
+    def explicit_equation(self):
+        """
+        The equation if it was set explicitly, or None if the equation is rendered from the compounds (see
+        equation). Use this to save the reaction without saving an equation that we can render again.
+
+        :rtype: str
+        """
+        return self._equation
 
     def __eq__(self, other):
         """
-        Two reactions are the same if they have the same left and
-        right products, but not necessarily the same names or reactions.
+        Two reactions are the same if they have the same stoichiometric signature: the same compounds and
+        abundances on the left and right, but not necessarily the same names or reactions.
         Note that we don't care whether the left and right (the 
         directionality) is the same in our two comparisons
 
+        We compare the hashes of the signatures first, so most reactions that are different are compared without
+        looking at their compounds.
+
         :param other: The other reaction
         :type other: Reaction
         :return: Boolean
@@ -107,13 +213,103 @@ class Reaction:
         """
 
         if isinstance(other, Reaction):
-            return ((self.left_compounds, self.right_compounds) ==
-                    (other.left_compounds, other.right_compounds) or
-                    (self.left_compounds, self.right_compounds) ==
-                    (other.right_compounds, other.left_compounds))
+            if self is other:
+                return True
+            return self.signature_hash() == other.signature_hash() and self.signature() == other.signature()
         else:
             return NotImplemented
 
+    def stoichiometry(self):
+        """
+        The stoichiometry of the reaction as two arrays: the ids of the compounds in the compound registry (see
+        Compound.id) and their coefficients, which are negative for the compounds on the left. A compound on both
+        sides of the reaction is in the arrays twice.
+
+        The arrays are built the first time they are needed and kept until the abundances are changed with
+        set_left_compound_abundance, set_right_compound_abundance or reverse_reaction, or a new container is
+        assigned. The compounds must be Compound objects.
+
+        :return: The compound ids and the coefficients
+        :rtype: (array of int, array of float)
+        """
+        if self._stoichiometry is None:
+            indices = array('l')
+            coefficients = array('d')
+            for c, q in (self._left_abundance or EMPTY_DICT).items():
+                indices.append(c.id)
+                coefficients.append(-q)
+            for c, q in (self._right_abundance or EMPTY_DICT).items():
+                indices.append(c.id)
+                coefficients.append(q)
+            self._stoichiometry = (indices, coefficients)
+        return self._stoichiometry
+
+    @property
+    def compound_indices(self):
+        """
+        The ids of the compounds in the compound registry, in the same order as coefficients.
+
+        :rtype: array of int
+        """
+        return self.stoichiometry()[0]
+
+    @property
+    def coefficients(self):
+        """
+        The signed stoichiometric coefficients of the compounds, negative for the compounds on the left.
+
+        :rtype: array of float
+        """
+        return self.stoichiometry()[1]
+
+    def signature(self):
+        """
+        The canonical stoichiometric signature of the reaction. This is a sorted tuple of (compound name, location,
+        coefficient) with negative coefficients for the compounds on the left. A reaction written the other way
+        around has the same signature, so two reactions with the same stoichiometry have the same signature
+        whatever their names or directions.
+
+        The signature is built the first time it is needed and kept until the compounds or abundances of the
+        reaction are changed with the add and set methods, or a new container is assigned. If you rename a compound
+        that is already in a reaction, or change a container in place, assign the container again.
+
+        :return: The signature
+        :rtype: tuple
+        """
+
+        if self._signature is None:
+            signature = self._canonical_signature()
+            self._signature = (signature, hash(signature))
+        return self._signature[0]
+
+    def signature_hash(self):
+        """
+        The hash of the stoichiometric signature of the reaction. Reactions that are equal have the same signature
+        hash, so use this (rather than hash(), which is the hash of the name) to index reactions by their
+        stoichiometry.
+
+        :rtype: int
+        """
+        if self._signature is None:
+            self.signature()
+        return self._signature[1]
+
+    def _canonical_signature(self):
+        """
+        Build the stoichiometric signature of the reaction (see signature).
+
+        :rtype: tuple
+        """
+
+        left_abundance = self._left_abundance or EMPTY_DICT
+        right_abundance = self._right_abundance or EMPTY_DICT
+        forward = [(getattr(c, 'name', c), getattr(c, 'location', ''), -left_abundance.get(c, 0))
+                   for c in self._left_compounds or EMPTY_SET]
+        forward += [(getattr(c, 'name', c), getattr(c, 'location', ''), right_abundance.get(c, 0))
+                    for c in self._right_compounds or EMPTY_SET]
+        reverse = tuple(sorted([(n, l, -q) for n, l, q in forward]))
+        return min(tuple(sorted(forward)), reverse)
+
     def __cmp__(self, other):
         """
         Compare whether two things are the same
@@ -151,7 +347,9 @@ class Reaction:
 
     def __hash__(self):
         """
-        The hash function is based on the name of the reaction.
+        The hash function is based on the name of the reaction, which does not change when the compounds do, so
+        reactions with different names are different keys in sets and dicts even if they have the same
+        stoichiometry. Use signature_hash (or duplicate_reactions) to index reactions by their stoichiometry.
 
         :rtype: int
         """
@@ -196,7 +394,8 @@ class Reaction:
         """
 
         if isinstance(cmpds, set):
-                self.left_compounds.update(cmpds)
+            self.left_compounds.update(cmpds)
+            self._signature = None
         else:
             raise TypeError("Compounds must be a set")
 
@@ -218,6 +417,8 @@ class Reaction:
             self.left_abundance[cmpd] = float(abundance)
         else:
             raise TypeError("Abundance must be an int or a float")
+        self._stoichiometry = None
+        self._signature = None
 
     def get_left_compound_abundance(self, cmpd):
         """
@@ -229,8 +430,8 @@ class Reaction:
         :rtype: float
         """
 
-        if cmpd in self.left_abundance:
-            return self.left_abundance[cmpd]
+        if cmpd in (self._left_abundance or EMPTY_DICT):
+            return self._left_abundance[cmpd]
         else:
             raise KeyError("You do not have " + cmpd + " on the left hand side of the equation")
 
@@ -240,7 +441,7 @@ class Reaction:
 
         :rtype: int
         """
-        return len(self.left_compounds)
+        return len(self._left_compounds or EMPTY_SET)
 
     def add_right_compounds(self, cmpds):
         """
@@ -251,6 +452,7 @@ class Reaction:
         """
         if isinstance(cmpds, set):
             self.right_compounds.update(cmpds)
+            self._signature = None
         else:
             raise TypeError("Compounds must be a set")
 
@@ -271,6 +473,8 @@ class Reaction:
             self.right_abundance[cmpd] = float(abundance)
         else:
             raise TypeError("Abundance must be an int or a float")
+        self._stoichiometry = None
+        self._signature = None
 
     def get_right_compound_abundance(self, cmpd):
         """
@@ -282,8 +486,8 @@ class Reaction:
         :rtype: float
         """
 
-        if cmpd in self.right_abundance:
-            return self.right_abundance[cmpd]
+        if cmpd in (self._right_abundance or EMPTY_DICT):
+            return self._right_abundance[cmpd]
         else:
             raise KeyError("You do not have " + str(cmpd) + " on the right hand side of the equation: " +
                            str(self.equation))
@@ -294,7 +498,7 @@ class Reaction:
 
         :rtype: int
         """
-        return len(self.right_compounds)
+        return len(self._right_compounds or EMPTY_SET)
 
     def all_compounds(self):
         """
@@ -303,7 +507,7 @@ class Reaction:
         :return: A set of all the compounds
         :rtype: set
         """
-        return self.left_compounds.union(self.right_compounds)
+        return set().union(self._left_compounds or EMPTY_SET, self._right_compounds or EMPTY_SET)
 
     def number_of_compounds(self):
         """
@@ -321,7 +525,7 @@ class Reaction:
         :type cmpd: Compound
         :rtype: bool
         """
-        return cmpd in self.left_compounds or cmpd in self.right_compounds
+        return cmpd in (self._left_compounds or EMPTY_SET) or cmpd in (self._right_compounds or EMPTY_SET)
 
     def opposite_sides(self, cmpd1, cmpd2):
         """
@@ -338,9 +542,10 @@ class Reaction:
             raise ValueError(str(cmpd1) + " is not in this reaction")
         if not self.has(cmpd2):
             raise ValueError(str(cmpd2) + " is not in this reaction")
-        if cmpd1 in self.left_compounds and cmpd2 in self.right_compounds:
+        left, right = self._left_compounds or EMPTY_SET, self._right_compounds or EMPTY_SET
+        if cmpd1 in left and cmpd2 in right:
             return True
-        if cmpd1 in self.right_compounds and cmpd2 in self.left_compounds:
+        if cmpd1 in right and cmpd2 in left:
             return True
         return False
 
@@ -413,7 +618,7 @@ class Reaction:
         :return: Whether we have this enzyme
         :rtype: bool
         """
-        return enz in self.enzymes
+        return enz in (self._enzymes or EMPTY_SET)
 
     def all_enzymes(self):
         """
@@ -429,7 +634,7 @@ class Reaction:
 
         :rtype: int
         """
-        return len(self.enzymes)
+        return len(self._enzymes or EMPTY_SET)
 
     def add_pegs(self, pegs):
         """
@@ -451,7 +656,7 @@ class Reaction:
         :type peg: str
         :rtype: bool
         """
-        return peg in self.pegs
+        return peg in (self._pegs or EMPTY_SET)
 
     def set_deltaG(self, dg):
         """
@@ -484,11 +689,11 @@ class Reaction:
         """
 
         # do we have external compounds on the left ... then it is an input reaction
-        for c in self.left_compounds:
+        for c in self._left_compounds or EMPTY_SET:
             if c.location == 'e':
                 self.inp = True
 
-        for c in self.right_compounds:
+        for c in self._right_compounds or EMPTY_SET:
             if c.location == 'e':
                 self.outp = True
 
@@ -546,8 +751,9 @@ class Reaction:
         At the moment we don't switch input/output, not sure if we
         need to do that.
         """
-        (self.left_compounds, self.right_compounds) = (self.right_compounds, self.left_compounds)
-        (self.left_abundance, self.right_abundance) = (self.right_abundance, self.left_abundance)
+        (self._left_compounds, self._right_compounds) = (self._right_compounds, self._left_compounds)
+        (self._left_abundance, self._right_abundance) = (self._right_abundance, self._left_abundance)
+        self._stoichiometry = None
         (self.inp, self.outp) = (self.outp, self.inp)
 
         # we only need to reverse two directions
@@ -561,3 +767,49 @@ class Reaction:
 
 
 
+
+
+def duplicate_reactions(reactions):
+    """
+    Find the reactions that have the same stoichiometry, e.g. when merging models or biochemistry snapshots. We
+    index the reactions by their signature, so this is a single pass over the reactions (a hash join) rather than
+    comparing every pair of reactions.
+
+    :param reactions: The reactions, either a dict of reaction id and Reaction or an iterable of Reactions
+    :type reactions: dict or iterable
+    :return: A dict of signature and the list of the names of the reactions with that signature, for each signature
+        that is shared by more than one reaction
+    :rtype: dict
+    """
+
+    if isinstance(reactions, Mapping):
+        reactions = reactions.values()
+    index = {}
+    for r in reactions:
+        index.setdefault(r.signature(), []).append(r.name)
+    return {sig: names for sig, names in index.items() if len(names) > 1}
+
+
+def stoichiometric_columns(reactions):
+    """
+    The stoichiometric matrix of some reactions in compressed sparse column form. Each reaction is a column, and
+    the rows are the ids of the compounds in the compound registry. We join the stoichiometry arrays of the
+    reactions (see Reaction.stoichiometry), so we do not need to look up each compound.
+
+    The column for reaction i is indices[indptr[i]:indptr[i+1]] and data[indptr[i]:indptr[i+1]].
+
+    :param reactions: The reactions, in the order of the columns
+    :type reactions: iterable of Reaction
+    :return: The column pointers, the compound ids, and the coefficients
+    :rtype: (array of int, array of int, array of float)
+    """
+
+    indptr = array('l', [0])
+    indices = array('l')
+    data = array('d')
+    for r in reactions:
+        i, q = r.stoichiometry()
+        indices.extend(i)
+        data.extend(q)
+        indptr.append(len(indices))
+    return indptr, indices, data
@@ -0,0 +1,328 @@
+"""
+Immutable sets of reaction ids stored as bitsets.
+
+Gap-filling builds a new set of reaction ids for every FBA it runs (e.g. base_reactions.union(left)), and copying
+sets of thousands of strings takes longer than it should. Each reaction id is given a small integer id in the
+reaction registry (like the compounds in the compound registry), and a ReactionSet is a Python int with a bit set for
+each reaction in it, so union, intersection and difference are bitwise operations on the int.
+
+A ReactionSet behaves like a frozenset of reaction ids, so you can pass it to any function that takes a set of
+reaction ids, and it is hashable, so you can use it as a key to remember the result of an FBA:
+
+    base = PyFBA.metabolism.ReactionSet(base_reactions)
+    r2r = base.union(left)
+"""
+
+import sys
+from collections.abc import Set
+
+
+class ReactionRegistry:
+    """
+    Every reaction id that we have seen, each with a small integer id. The ids are only valid in this process.
+
+    :ivar reaction_ids: The reaction id for each id
+    """
+
+    def __init__(self):
+        self.reaction_ids = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.reaction_ids)
+
+    def id(self, rid):
+        """
+        The id for a reaction id. A new id is assigned the first time we see it.
+
+        :param rid: The reaction id, e.g. rxn00001
+        :type rid: str
+        :rtype: int
+        """
+        try:
+            return self._ids[rid]
+        except KeyError:
+            i = len(self.reaction_ids)
+            self._ids[sys.intern(rid)] = i
+            self.reaction_ids.append(rid)
+            return i
+
+    def find(self, rid):
+        """
+        The id for a reaction id without assigning a new one.
+
+        :param rid: The reaction id
+        :type rid: str
+        :return: The id, or None if we have not seen this reaction
+        :rtype: int
+        """
+        return self._ids.get(rid)
+
+
+# the registry for all the reactions in this process
+reaction_registry = ReactionRegistry()
+
+
+def _popcount(bits):
+    """
+    The number of bits that are set.
+
+    :param bits: The bits
+    :type bits: int
+    :rtype: int
+    """
+    try:
+        return bits.bit_count()
+    except AttributeError:
+        return bin(bits).count('1')
+
+
+class ReactionSet(Set):
+    """
+    An immutable set of reaction ids, stored as the bits of their ids in the reaction registry.
+
+    The operations with another ReactionSet are bitwise; anything else is added to the registry first. Iterating a
+    ReactionSet gives the reaction ids in the order of the registry, so sort them if you need them sorted.
+
+    :ivar bits: The bits of the reactions in the set
+    """
+
+    __slots__ = ['_bits', '_len', '_hash']
+
+    def __init__(self, reactions=()):
+        """
+        Create the set.
+
+        :param reactions: The reaction ids
+        :type reactions: iterable of str
+        """
+        if isinstance(reactions, ReactionSet):
+            bits = reactions._bits
+        else:
+            bits = 0
+            for rid in reactions:
+                bits |= 1 << reaction_registry.id(rid)
+        self._bits = bits
+        self._len = None
+        self._hash = None
+
+    @classmethod
+    def _from_bits(cls, bits):
+        """
+        Create a set from its bits.
+
+        :param bits: The bits
+        :type bits: int
+        :rtype: ReactionSet
+        """
+        s = cls.__new__(cls)
+        s._bits = bits
+        s._len = None
+        s._hash = None
+        return s
+
+    @classmethod
+    def _from_iterable(cls, it):
+        """The constructor that the Set mixin methods use for their results"""
+        return cls(it)
+
+    @staticmethod
+    def _bits_of(other):
+        """
+        The bits of a ReactionSet or an iterable of reaction ids.
+
+        :param other: The reactions
+        :type other: ReactionSet or iterable of str
+        :rtype: int
+        """
+        if isinstance(other, ReactionSet):
+            return other._bits
+        return ReactionSet(other)._bits
+
+    @property
+    def bits(self):
+        """
+        The bits of the reactions in the set, where bit i is the reaction with id i in the reaction registry.
+
+        :rtype: int
+        """
+        return self._bits
+
+    def __contains__(self, rid):
+        i = reaction_registry.find(rid)
+        return i is not None and self._bits & (1 << i) != 0
+
+    def __iter__(self):
+        bits = self._bits
+        ids = reaction_registry.reaction_ids
+        while bits:
+            low = bits & -bits
+            yield ids[low.bit_length() - 1]
+            bits ^= low
+
+    def __len__(self):
+        if self._len is None:
+            self._len = _popcount(self._bits)
+        return self._len
+
+    def __bool__(self):
+        return self._bits != 0
+
+    def __repr__(self):
+        return "ReactionSet({})".format(sorted(self))
+
+    def __eq__(self, other):
+        if isinstance(other, ReactionSet):
+            return self._bits == other._bits
+        return Set.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        """
+        The hash is the same as the hash of a frozenset of the same reaction ids, because they are equal. It is only
+        calculated once.
+
+        :rtype: int
+        """
+        if self._hash is None:
+            self._hash = self._hash_set()
+        return self._hash
+
+    _hash_set = Set._hash
+
+    def __le__(self, other):
+        if isinstance(other, ReactionSet):
+            return self._bits & ~other._bits == 0
+        return Set.__le__(self, other)
+
+    def __ge__(self, other):
+        if isinstance(other, ReactionSet):
+            return other._bits & ~self._bits == 0
+        return Set.__ge__(self, other)
+
+    def __or__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return ReactionSet._from_bits(self._bits | self._bits_of(other))
+
+    __ror__ = __or__
+
+    def __and__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return ReactionSet._from_bits(self._bits & self._bits_of(other))
+
+    __rand__ = __and__
+
+    def __sub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return ReactionSet._from_bits(self._bits & ~self._bits_of(other))
+
+    def __rsub__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return ReactionSet._from_bits(self._bits_of(other) & ~self._bits)
+
+    def __xor__(self, other):
+        if not isinstance(other, Set):
+            return NotImplemented
+        return ReactionSet._from_bits(self._bits ^ self._bits_of(other))
+
+    __rxor__ = __xor__
+
+    def union(self, *others):
+        """
+        The reactions in this set or any of the others.
+
+        :param others: ReactionSets or iterables of reaction ids
+        :rtype: ReactionSet
+        """
+        bits = self._bits
+        for other in others:
+            bits |= self._bits_of(other)
+        return ReactionSet._from_bits(bits)
+
+    def intersection(self, *others):
+        """
+        The reactions in this set and all of the others.
+
+        :param others: ReactionSets or iterables of reaction ids
+        :rtype: ReactionSet
+        """
+        bits = self._bits
+        for other in others:
+            bits &= self._bits_of(other)
+        return ReactionSet._from_bits(bits)
+
+    def difference(self, *others):
+        """
+        The reactions in this set and not in any of the others.
+
+        :param others: ReactionSets or iterables of reaction ids
+        :rtype: ReactionSet
+        """
+        bits = self._bits
+        for other in others:
+            bits &= ~self._bits_of(other)
+        return ReactionSet._from_bits(bits)
+
+    def issubset(self, other):
+        """
+        Are all of these reactions in other?
+
+        :param other: A ReactionSet or an iterable of reaction ids
+        :rtype: bool
+        """
+        return self._bits & ~self._bits_of(other) == 0
+
+    def issuperset(self, other):
+        """
+        Are all of the reactions in other in this set?
+
+        :param other: A ReactionSet or an iterable of reaction ids
+        :rtype: bool
+        """
+        return self._bits_of(other) & ~self._bits == 0
+
+    def isdisjoint(self, other):
+        """
+        Are none of the reactions in other in this set?
+
+        :param other: A ReactionSet or an iterable of reaction ids
+        :rtype: bool
+        """
+        return self._bits & self._bits_of(other) == 0
+
+    def copy(self):
+        """
+        The set is immutable, so a copy is the same set.
+
+        :rtype: ReactionSet
+        """
+        return self
+
+    def __copy__(self):
+        return self
+
+    def __reduce__(self):
+        """Pickle the reaction ids, because the registry ids are only valid in this process"""
+        return ReactionSet, (sorted(self),)
+
+    def mask(self, columns):
+        """
+        Which of the columns (e.g. the reactions of a stoichiometric matrix) are in this set.
+
+        :param columns: The reaction ids of the columns
+        :type columns: list of str
+        :return: 1 for each column in the set and 0 for the others
+        :rtype: bytes
+        """
+        bits = self._bits
+        find = reaction_registry.find
+        return bytes(1 if i is not None and bits & (1 << i) else 0 for i in map(find, columns))
@@ -1,8 +1,10 @@
 
 from .model import Model
-from .build_model import roles_to_model, save_model, load_model
+from .build_model import ModelBuilder, roles_to_model, save_model, load_model
 from .fba import model_reaction_fluxes, output_fba, output_fba_with_subsystem
+from .sbml import write_sbml, read_sbml
 
 __all__ = ["Model",
-           "roles_to_model", "save_model", "load_model",
-           "model_reaction_fluxes", "output_fba", "output_fba_with_subsystem"]
+           "ModelBuilder", "roles_to_model", "save_model", "load_model",
+           "model_reaction_fluxes", "output_fba", "output_fba_with_subsystem",
+           "write_sbml", "read_sbml"]
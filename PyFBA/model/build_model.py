@@ -6,10 +6,122 @@ import errno
 import PyFBA
 
 
+class ModelBuilder:
+    """
+    Build models for many genomes from one copy of the biochemistry.
+
+    The reactions for each role are looked up in an index that is built once (see
+    PyFBA.filters.roles_and_reactions.role_reactions_index), and only the reactions that a model needs are
+    created. The reactions can be the dict from compounds_reactions_enzymes() or the reactions of a
+    BiochemistryStore, which are only created when they are used. After the first model, building a model does
+    not read any files apart from the annotations.
+
+    Models built by the same builder share the Reaction objects, as models built from the same
+    compounds_reactions_enzymes() reactions do.
+
+    :ivar reactions: The reactions for this type of organism
+    :ivar organism_type: The type of organism
+    :ivar role_index: The reactions for each role
+    """
+
+    def __init__(self, reactions, organism_type="gramnegative", verbose=False):
+        """
+        Create the builder.
+
+        :param reactions: The reactions for all organisms, e.g. from compounds_reactions_enzymes() or a
+            BiochemistryStore
+        :type reactions: dict of str and Reaction
+        :param organism_type: Organism type. If this is set the template reactions for this type of organism are used.
+        :type organism_type: str
+        :param verbose: Verbose output
+        :type verbose: bool
+        """
+        self.organism_type = organism_type
+        self.verbose = verbose
+        if organism_type:
+            self.reactions = PyFBA.parse.model_seed.TemplateReactions(reactions, organism_type)
+        else:
+            self.reactions = reactions
+        self.role_index = PyFBA.filters.roles_and_reactions.role_reactions_index(verbose)
+        self._reactions = {}
+
+    def reaction(self, rxnid):
+        """
+        The reaction for an id. Each reaction is only created once.
+
+        :param rxnid: The reaction id
+        :type rxnid: str
+        :return: The reaction or None if it is not in our reactions
+        :rtype: Reaction
+        """
+        if rxnid not in self._reactions:
+            self._reactions[rxnid] = self.reactions[rxnid] if rxnid in self.reactions else None
+        return self._reactions[rxnid]
+
+    def build(self, roles, id, name):
+        """
+        Build a model from a set of roles.
+
+        :param roles: The functional roles in the genome
+        :type roles: set
+        :param id: Model ID
+        :type id: str
+        :param name: Model name
+        :type name: str
+        :return: The generated model object
+        :rtype: Model
+        """
+
+        model_roles = {}
+        model_reactions = set()
+        for role in roles:
+            for rxnID in self.role_index.get(role, ()):
+                r = self.reaction(rxnID)
+                if r is None:
+                    if self.verbose:
+                        print("Reaction ID '{}' for role '{}'".format(rxnID, role),
+                              "is not in our reactions list. Skipped.",
+                              file=sys.stderr)
+                    continue
+                if role not in model_roles:
+                    model_roles[role] = set()
+                model_roles[role].add(rxnID)
+                model_reactions.add(r)
+
+        model = PyFBA.model.Model(id, name, self.organism_type)
+        model.add_reactions(model_reactions)
+        model.add_roles(model_roles)
+
+        # Set biomass equation based on organism type
+        biomass_eqn = PyFBA.metabolism.biomass_equation(self.organism_type)
+        model.set_biomass_reaction(biomass_eqn)
+        return model
+
+    def build_from_file(self, rolesFile, id, name):
+        """
+        Read in the 'assigned_functions' file from RAST and build a model.
+
+        :param rolesFile: File path to assigned functions RAST file
+        :type rolesFile: str
+        :param id: Model ID
+        :type id: str
+        :param name: Model name
+        :type name: str
+        :return: The generated model object
+        :rtype: Model
+        """
+        roles = set()
+        for peg, rs in PyFBA.parse.stream_assigned_functions(rolesFile):
+            roles.update(rs)
+        return self.build(roles, id, name)
+
+
 def roles_to_model(rolesFile, id, name, orgtype="gramnegative", verbose=False):
     """
     Read in the 'assigned_functions' file from RAST and create a model.
 
+    To build lots of models, create one ModelBuilder and use it for every genome.
+
     :param rolesFile: File path to assigned functions RAST file
     :type rolesFile: str
     :param id: Model ID
@@ -26,40 +138,15 @@ def roles_to_model(rolesFile, id, name, orgtype="gramnegative", verbose=False):
 
     # Load ModelSEED database
     compounds, reactions, enzymes = \
-            PyFBA.parse.model_seed.compounds_reactions_enzymes(orgtype)
-
-    # Read in assigned functions file to build set of roles
-    assigned_functions = PyFBA.parse.read_assigned_functions(rolesFile)
-    roles = set()
-    for rs in assigned_functions.values():
-        roles.update(rs)
+            PyFBA.parse.model_seed.compounds_reactions_enzymes()
 
-    # Obtain reactions for each role
-    # Key is role, value is set of reaction ids
-    model_reactions = PyFBA.filters.roles_to_reactions(roles)
-
-    # Create model object
-    model = PyFBA.model.Model(id, name, orgtype)
-    for role, rxnIDs in model_reactions.items():
-        for rxnID in rxnIDs:
-            if rxnID in reactions:
-                model.add_reactions({reactions[rxnID]})
-                model.add_roles({role: {rxnID}})
-            elif verbose:
-                print("Reaction ID '{}' for role '{}'".format(rxnID, role),
-                      "is not in our reactions list. Skipped.",
-                      file=sys.stderr)
-
-    # Set biomass equation based on organism type
-    biomass_eqn = PyFBA.metabolism.biomass_equation(orgtype)
-    model.set_biomass_reaction(biomass_eqn)
-    return model
+    return ModelBuilder(reactions, orgtype, verbose).build_from_file(rolesFile, id, name)
 
 
 def save_model(model, out_dir):
     """
     Save all model information in multiple files.
-    This is meant to be temporary until SBML output is functional.
+    Model.to_sbml writes the model to one SBML file instead, and read_sbml loads it without the Model SEED database.
 
     :param model: Model to save
     :type model: Model
@@ -118,7 +205,7 @@ def load_model(in_dir, prefix):
     """
     Load all model information from multiple files generated by
     the "save_model()" function.
-    This is meant to be temporary until SBML input is functional.
+    For models saved with Model.to_sbml use read_sbml, which does not need to parse the Model SEED database.
 
     :param in_dir: Directory of files
     :type in_dir: str
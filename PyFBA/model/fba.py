@@ -1,6 +1,5 @@
 from __future__ import print_function
 import sys
-import os.path
 import PyFBA
 
 
@@ -75,16 +74,7 @@ def output_fba_with_subsystem(f, model, media_file, biomass_reaction=None):
             mReactions[r].append(role)
 
     # Load subsystem info
-    ss_data = {}
-    with open(os.path.join(os.path.dirname(__file__), "..", "util", "full_roles_ss.tsv")) as fin:
-        for l in fin:
-            func, cat, subcat, ss = l.rstrip("\n").split("\t")
-            if func not in ss_data:
-                ss_data[func] = set()
-            cat = cat if cat != "" else "Unknown"
-            subcat = subcat if subcat != "" else "Unknown"
-            ss = ss if ss != "" else "Unknown"
-            ss_data[func].add((cat, subcat, ss))
+    ss_data = PyFBA.parse.subsystem_index().classification
 
     # Run FBA and get fluxes
     fluxes = model_reaction_fluxes(model, media_file, biomass_reaction)
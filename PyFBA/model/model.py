@@ -173,6 +173,17 @@ class Model:
             f.write("\n")
 
 
+    def to_sbml(self, sbml_file):
+        """
+        Write the model, including the biomass reaction, roles, and gap-fill information, to an SBML file.
+        Use PyFBA.model.read_sbml to load it again.
+
+        :param sbml_file: The file to write
+        :type sbml_file: str
+        """
+        PyFBA.model.write_sbml(self, sbml_file)
+
+
     def output_subsystem(self, f):
         """
         Output subsystem information based on roles.
@@ -280,10 +291,14 @@ class Model:
                   file=sys.stderr)
             sys.stderr.flush()
 
-        # Load ModelSEED database
+        # Load ModelSEED database. We build the indexes from the shared reactions, and then record the gap-filling
+        # in an overlay so the shared reactions are not changed
         compounds, reactions, enzymes =\
             PyFBA.parse.model_seed.compounds_reactions_enzymes(
                 self.organism_type)
+        ec_index = PyFBA.gapfill.ECIndex.from_reactions(reactions)
+        compound_index = PyFBA.metabolism.IncidenceIndex.from_reactions(reactions)
+        reactions = PyFBA.metabolism.ReactionOverlay(reactions)
 
         ########################################
         ## Media import reactions
@@ -395,7 +410,8 @@ class Model:
             gf_reactions =\
                     PyFBA.gapfill.suggest_reactions_using_ec(newModel.roles.keys(),
                                                              reactions,
-                                                             newModelRxns)
+                                                             newModelRxns,
+                                                             ec_index=ec_index)
             added_reactions.append(("ec", gf_reactions))
             newModelRxns.update(gf_reactions)
             rxns_for_new_model = set()
@@ -451,7 +467,8 @@ class Model:
                     PyFBA.gapfill.suggest_by_compound(compounds,
                                                       reactions,
                                                       newModelRxns,
-                                                      max_reactions=1)
+                                                      max_reactions=1,
+                                                      index=compound_index)
             added_reactions.append(("orphans", gf_reactions))
             newModelRxns.update(gf_reactions)
             rxns_for_new_model = set()
@@ -506,10 +523,11 @@ class Model:
 
         required_rxns = set()
         gapfilled_keep = set()
+        # ReactionSets make each union below a bitwise or rather than a copy of the original reactions
+        original_set = PyFBA.metabolism.ReactionSet(original_reactions)
         # Begin loop through all gap-filled reactions
         while added_reactions:
-            ori = copy.copy(original_reactions)
-            ori.update(required_rxns)
+            ori = original_set.union(required_rxns)
 
             # Test next set of gap-filled reactions
             # Each set is based on a method described above
@@ -521,8 +539,7 @@ class Model:
                 sys.stderr.flush()
 
             # Get all the other gap-filled reactions we need to add
-            for gf_tple in added_reactions:
-                ori.update(gf_tple[1])
+            ori = ori.union(*[gf_tple[1] for gf_tple in added_reactions])
 
             # Use minimization function to determine the minimal
             # set of gap-filled reactions from the current method
@@ -0,0 +1,331 @@
+"""
+Write a Model to an SBML file, and read it back.
+
+The SBML file has everything we need to rebuild the model: the compounds, the reactions with their stoichiometry
+and bounds, the biomass reaction, and the roles and gap-fill information. The PyFBA specific information is stored
+in the annotation of the model, species, and reactions, so the file is still valid SBML that other tools can read.
+Because the reactions are in the file we do not need to parse the Model SEED biochemistry to load a saved model.
+
+Both directions stream: the writer makes one pass over the reactions, and the reader uses iterparse and discards
+each element once it has been read.
+"""
+
+import re
+from xml.sax.saxutils import quoteattr
+
+try:
+    from lxml import etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+import PyFBA
+
+SBML_NS = "http://www.sbml.org/sbml/level2"
+PYFBA_NS = "https://github.com/linsalrob/PyFBA"
+
+
+def _sid(s):
+    """
+    Convert a string to a valid SBML id (letters, digits and underscores, not starting with a digit).
+
+    :param s: The string
+    :type s: str
+    :rtype: str
+    """
+    s = re.sub(r'\W', '_', str(s))
+    if not s or s[0].isdigit():
+        s = "_" + s
+    return s
+
+
+def _attributes(**kwargs):
+    """
+    Format the attributes for an element, skipping any that are None.
+
+    :rtype: str
+    """
+    return "".join(" {}={}".format(k, quoteattr(str(v))) for k, v in kwargs.items() if v is not None)
+
+
+def _repr(value):
+    """
+    Format a number so that it reads back exactly, or None if it is not set.
+
+    :param value: The number
+    :type value: int or float
+    :rtype: str
+    """
+    return None if value is None else repr(value)
+
+
+def _species_ids(compounds):
+    """
+    Choose a unique SBML id for each compound, e.g. cpd00001_c.
+
+    :param compounds: The compounds
+    :type compounds: iterable of Compound
+    :return: A dict of (name, location) and the species id
+    :rtype: dict
+    """
+    ids = {}
+    used = set()
+    for c in compounds:
+        if (c.name, c.location) in ids:
+            continue
+        sid = base = _sid(str(c.model_seed_id) + "_" + str(c.location))
+        n = 1
+        while sid in used:
+            n += 1
+            sid = "{}_{}".format(base, n)
+        used.add(sid)
+        ids[(c.name, c.location)] = sid
+    return ids
+
+
+def _write_reaction(f, r, species, gapfilled=False, biomass=False):
+    """
+    Write one reaction element.
+
+    :param f: The open file to write to
+    :type f: file
+    :param r: The reaction
+    :type r: Reaction
+    :param species: The species ids
+    :type species: dict
+    :param gapfilled: Whether the reaction is one of the gap-filled reactions of the model
+    :type gapfilled: bool
+    :param biomass: Whether this is the biomass reaction
+    :type biomass: bool
+    """
+    f.write("<reaction{}>\n".format(_attributes(id=_sid(r.name), name=r.description or r.name,
+                                                 reversible='true' if r.direction == '=' else 'false')))
+    f.write("<annotation><pyfba:reaction{}/></annotation>\n".format(_attributes(
+        name=r.name, direction=r.direction, description=r.description, equation=r.explicit_equation,
+        deltaG=_repr(r.deltaG), deltaG_error=_repr(r.deltaG_error), pLR=_repr(r.pLR), pRL=_repr(r.pRL),
+        enzymes=";".join(sorted(r.enzymes)), pegs=";".join(sorted(r.pegs)),
+        is_transport=str(r.is_transport).lower(), is_uptake_secretion=str(r.is_uptake_secretion).lower(),
+        is_gapfilled=str(r.is_gapfilled).lower(), gapfill_method=r.gapfill_method or None,
+        gapfilled=str(gapfilled).lower() if gapfilled else None,
+        biomass=str(biomass).lower() if biomass else None)))
+    for tag, abundance in [('listOfReactants', r.left_abundance), ('listOfProducts', r.right_abundance)]:
+        if abundance:
+            f.write("<{}>\n".format(tag))
+            for c, q in abundance.items():
+                f.write("<speciesReference{}/>\n".format(_attributes(species=species[(c.name, c.location)],
+                                                                     stoichiometry=repr(float(q)))))
+            f.write("</{}>\n".format(tag))
+    if r.lower_bound is not None or r.upper_bound is not None:
+        f.write("<kineticLaw><listOfParameters>\n")
+        if r.lower_bound is not None:
+            f.write("<parameter{}/>\n".format(_attributes(id="LOWER_BOUND", value=repr(float(r.lower_bound)))))
+        if r.upper_bound is not None:
+            f.write("<parameter{}/>\n".format(_attributes(id="UPPER_BOUND", value=repr(float(r.upper_bound)))))
+        f.write("</listOfParameters></kineticLaw>\n")
+    f.write("</reaction>\n")
+
+
+def write_sbml(model, sbml_file):
+    """
+    Write a model to an SBML file.
+
+    :param model: The model to write
+    :type model: Model
+    :param sbml_file: The file to write
+    :type sbml_file: str
+    """
+
+    reactions = [model.reactions[r] for r in sorted(model.reactions)]
+    if model.biomass_reaction:
+        reactions.append(model.biomass_reaction)
+    # the compounds in model.compounds are keyed by name, so we take them from the reactions to keep each location
+    compounds = {}
+    for r in reactions:
+        for c in list(r.left_abundance) + list(r.right_abundance):
+            compounds.setdefault((c.name, c.location), c)
+    for c in model.compounds.values():
+        compounds.setdefault((c.name, c.location), c)
+    species = _species_ids(compounds.values())
+
+    with open(sbml_file, 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<sbml xmlns="{}" xmlns:pyfba="{}" level="2" version="1">\n'.format(SBML_NS, PYFBA_NS))
+        f.write("<model{}>\n".format(_attributes(id=_sid(model.id), name=model.name)))
+        f.write("<annotation><pyfba:model{}>\n".format(_attributes(id=model.id, organism_type=model.organism_type)))
+        for m in sorted(model.gapfilled_media):
+            f.write("<pyfba:media{}/>\n".format(_attributes(name=m)))
+        for role in sorted(model.roles):
+            f.write("<pyfba:role{}/>\n".format(_attributes(name=role, reactions=";".join(sorted(model.roles[role])))))
+        f.write("</pyfba:model></annotation>\n")
+
+        f.write("<listOfCompartments>\n")
+        for loc in sorted({str(k[1]) for k in compounds}):
+            f.write("<compartment{}/>\n".format(_attributes(id=_sid(loc), name=loc)))
+        f.write("</listOfCompartments>\n")
+
+        f.write("<listOfSpecies>\n")
+        for k, c in compounds.items():
+            f.write("<species{}>".format(_attributes(
+                id=species[k], name=c.name, compartment=_sid(c.location), charge=c.charge,
+                boundaryCondition=str(bool(c.uptake_secretion)).lower())))
+            f.write("<annotation><pyfba:compound{}/></annotation></species>\n".format(_attributes(
+                name=c.name, location=c.location, model_seed_id=c.model_seed_id, abbreviation=c.abbreviation,
+                formula=c.formula, mw=c.mw, charge=c.charge,
+                alternate_seed_ids=";".join(sorted(c.alternate_seed_ids)) or None)))
+        f.write("</listOfSpecies>\n")
+
+        f.write("<listOfReactions>\n")
+        for r in reactions:
+            _write_reaction(f, r, species, gapfilled=r.name in model.gf_reactions,
+                            biomass=r is model.biomass_reaction)
+        f.write("</listOfReactions>\n")
+        f.write("</model>\n</sbml>\n")
+
+
+def _local_name(tag):
+    """
+    The tag without its namespace.
+
+    :param tag: The tag
+    :type tag: str
+    :rtype: str
+    """
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else tag
+
+
+def _number(value, default=0):
+    """
+    Convert a number from the file back to an int or float.
+
+    :param value: The value from the file
+    :type value: str
+    :param default: The value to use if it is missing
+    :type default: object
+    :return: The number, or the value if it is not a number
+    :rtype: int or float
+    """
+    if value is None:
+        return default
+    for convert in [int, float]:
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _split(value):
+    """
+    Split a ; separated list from the file.
+
+    :param value: The value from the file
+    :type value: str
+    :rtype: set
+    """
+    return set(value.split(";")) if value else set()
+
+
+def read_sbml(sbml_file):
+    """
+    Read a model written by write_sbml (or Model.to_sbml).
+
+    We only use the SBML file, not the Model SEED biochemistry, so this is fast even for large models.
+
+    :param sbml_file: The SBML file
+    :type sbml_file: str
+    :return: The model
+    :rtype: Model
+    """
+
+    model = None
+    roles = {}
+    media = set()
+    compounds = {}
+    compound = None
+    reactions = set()
+    reaction = None
+    side = None
+    for event, elem in etree.iterparse(sbml_file, events=('start', 'end')):
+        tag = _local_name(elem.tag)
+        a = elem.attrib
+        if event == 'start':
+            if tag == 'model' and model is None:
+                model = PyFBA.model.Model(a.get('id'), a.get('name', ''))
+            elif tag == 'reaction' and reaction is None:
+                reaction = PyFBA.metabolism.Reaction(a['id'])
+                reaction.description = a.get('name')
+            elif tag in ('listOfReactants', 'listOfProducts'):
+                side = tag
+            continue
+
+        if elem.tag.startswith('{' + PYFBA_NS + '}'):
+            # our annotations
+            if tag == 'model':
+                model.id = a.get('id', model.id)
+                model.organism_type = a.get('organism_type', model.organism_type)
+            elif tag == 'media':
+                media.add(a['name'])
+            elif tag == 'role':
+                roles[a['name']] = _split(a.get('reactions'))
+            elif tag == 'compound':
+                compound = PyFBA.metabolism.Compound(a['name'], a.get('location', ''))
+                compound.model_seed_id = a.get('model_seed_id', compound.name)
+                compound.abbreviation = a.get('abbreviation')
+                compound.formula = a.get('formula')
+                compound.mw = _number(a.get('mw'))
+                compound.charge = _number(a.get('charge'))
+                compound.alternate_seed_ids = _split(a.get('alternate_seed_ids'))
+            elif tag == 'reaction' and reaction is not None:
+                reaction.name = a.get('name', reaction.name)
+                reaction.direction = a.get('direction')
+                reaction.description = a.get('description')
+                if a.get('equation') is not None:
+                    reaction.equation = a['equation']
+                reaction.deltaG = _number(a.get('deltaG'))
+                reaction.deltaG_error = _number(a.get('deltaG_error'))
+                reaction.pLR = _number(a.get('pLR'))
+                reaction.pRL = _number(a.get('pRL'))
+                reaction.enzymes = _split(a.get('enzymes'))
+                reaction.pegs = _split(a.get('pegs'))
+                reaction.is_transport = a.get('is_transport') == 'true'
+                reaction.is_uptake_secretion = a.get('is_uptake_secretion') == 'true'
+                reaction.is_gapfilled = a.get('is_gapfilled') == 'true'
+                reaction.gapfill_method = a.get('gapfill_method', "")
+                reaction.is_biomass_reaction = a.get('biomass') == 'true'
+                if a.get('gapfilled') == 'true':
+                    model.gf_reactions.add(reaction.name)
+        elif tag == 'species':
+            if compound is None:
+                # a species written by another tool
+                compound = PyFBA.metabolism.Compound(a.get('name', a['id']), a.get('compartment', ''))
+                compound.charge = _number(a.get('charge'))
+            compound.uptake_secretion = a.get('boundaryCondition') == 'true'
+            compounds[a['id']] = compound
+            compound = None
+            elem.clear()
+        elif tag == 'speciesReference' and reaction is not None:
+            c = compounds[a['species']]
+            if side == 'listOfReactants':
+                reaction.add_left_compounds({c})
+                reaction.set_left_compound_abundance(c, float(a.get('stoichiometry', 1)))
+            else:
+                reaction.add_right_compounds({c})
+                reaction.set_right_compound_abundance(c, float(a.get('stoichiometry', 1)))
+        elif tag == 'parameter' and reaction is not None:
+            if a['id'].lower() == 'lower_bound':
+                reaction.lower_bound = float(a['value'])
+            elif a['id'].lower() == 'upper_bound':
+                reaction.upper_bound = float(a['value'])
+        elif tag == 'reaction' and reaction is not None:
+            if reaction.direction is None:
+                reaction.direction = '=' if a.get('reversible') == 'true' else '>'
+            if reaction.is_biomass_reaction:
+                model.set_biomass_reaction(reaction)
+            else:
+                reactions.add(reaction)
+            reaction = None
+            elem.clear()
+
+    model.add_reactions(reactions)
+    model.add_roles(roles)
+    model.gapfilled_media = media
+    return model
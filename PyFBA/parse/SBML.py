@@ -2,7 +2,11 @@ import argparse
 import copy
 import os
 import sys
-from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+except ImportError:
+    import xml.etree.ElementTree as etree
 
 import PyFBA
 
@@ -13,6 +17,7 @@ class SBML:
     :ivar model_id: the identifier of the model
     :ivar model_name: the name of the model
     :ivar reactions: a dictionary of Reaction objects with str(obj) as the key
+    :ivar reactions_by_signature: a dictionary of Reaction objects with their stoichiometric signature as the key
     :ivar compounds: a dictionary of Compound objects with str(obj) as the key
     :ivar compounds_by_id: a dictionary of Compound objects with compound.model_seed_id as the key
     :ivar compartment: a dictionary of compartments in the model
@@ -21,6 +26,7 @@ class SBML:
 
     def __init__(self):
         self.reactions = {}
+        self.reactions_by_signature = {}
         self.compounds = {}
         self.compounds_by_id = {}
         self.model_id = ""
@@ -35,7 +41,7 @@ class SBML:
         :return: None
         :rtype: None
         """
-        self.compounds[str(cpd)] = cpd
+        self.compounds[cpd.key] = cpd
         if not cpd.abbreviation:
             sys.stderr.write("WARNING: No id for " + cpd.name + "\n")
         else:
@@ -52,15 +58,16 @@ class SBML:
     def get_a_compound(self, cpd):
         """
         Get a single compound with the same str() as the one provided
-        :param cpd: The compound to fetch
+        :param cpd: The compound to fetch, or its id in the compound registry
         :type cpd: object.
         :return: The compound from the model
         :rtype: Compound
         """
-        if str(cpd) in self.compounds:
-            return self.compounds[str(cpd)]
+        key = PyFBA.metabolism.compound_key(cpd)
+        if key in self.compounds:
+            return self.compounds[key]
         else:
-            raise ValueError(str(cpd) + " is not present in the model")
+            raise ValueError(key + " is not present in the model")
 
     def get_a_compound_by_id(self, cpdid):
         """
@@ -78,13 +85,22 @@ class SBML:
 
     def add_reaction(self, rxn):
         """
-        Add a reaction to the model
+        Add a reaction to the model, and index it by its stoichiometric signature. A reaction with the same id
+        replaces the one that is already in the model.
         :param rxn: The reaction to be added as a metabolism.Reaction object
         :type rxn: object.
-        :return: None
-        :rtype: None
+        :return: A reaction already in the model with the same stoichiometry, or None
+        :rtype: Reaction
         """
+        replaced = self.reactions.get(str(rxn))
+        if replaced is not None and self.reactions_by_signature.get(replaced.signature()) is replaced:
+            del self.reactions_by_signature[replaced.signature()]
         self.reactions[str(rxn)] = rxn
+        signature = rxn.signature()
+        duplicate = self.reactions_by_signature.get(signature)
+        if duplicate is None:
+            self.reactions_by_signature[signature] = rxn
+        return duplicate
 
     def get_all_reactions(self):
         """
@@ -109,11 +125,187 @@ class SBML:
         else:
             raise ValueError(str(rxn) + " is not present in the model")
 
+    def get_a_reaction_by_signature(self, rxn):
+        """
+        Get the reaction with the same stoichiometry as the one provided, whatever its name
+        :param rxn: The reaction to look for
+        :type rxn: Reaction
+        :return: The reaction object
+        :rtype: Reaction
+        """
+
+        signature = rxn.signature()
+        if signature in self.reactions_by_signature:
+            return self.reactions_by_signature[signature]
+        else:
+            raise ValueError(str(rxn) + " does not have the same stoichiometry as any reaction in the model")
+
+
+def _charge(value):
+    """
+    The charge of a species from its charge attribute.
+
+    :param value: The charge attribute, e.g. "-2"
+    :type value: str
+    :return: The charge, or None if the species does not have a charge that we can parse
+    :rtype: int or float
+    """
+    if value is None:
+        return None
+    try:
+        charge = float(value)
+    except ValueError:
+        return None
+    return int(charge) if charge.is_integer() else charge
+
+
+def _add_species(sbml, species, verbose=False):
+    """
+    Add a compound for a species element to the SBML object.
+
+    :param sbml: The SBML object
+    :type sbml: SBML
+    :param species: The attributes of the species element
+    :type species: dict
+    :param verbose: Whether to create more output
+    :type verbose: bool
+    """
+
+    cpd = PyFBA.metabolism.Compound(species['name'].replace('_c0', '').replace('_e0', ''),
+                                    species['compartment'].replace('0', ''))
+    cpd.abbreviation = species['id']
+    cpd.model_seed_id = species['id'].replace('_c0', '').replace('_e0', '')
+    cpd.charge = _charge(species.get('charge'))
+    if species['boundaryCondition'] == 'false':
+        cpd.uptake_secretion = False
+    elif species['boundaryCondition'] == 'true':
+        cpd.uptake_secretion = True
+    else:
+        if verbose:
+            sys.stderr.write("No boundary rule for {}\n".format(cpd.name))
+        cpd.uptake_secretion = False
+    sbml.add_compound(cpd)
+
+
+def _species_compound(sbml, species, verbose=False):
+    """
+    Get the compound for a species reference, adding it to the model if it is not already there.
+
+    :param sbml: The SBML object
+    :type sbml: SBML
+    :param species: The species id, e.g. cpd00001_c0
+    :type species: str
+    :param verbose: Whether to create more output
+    :type verbose: bool
+    :return: The compound
+    :rtype: PyFBA.metabolism.Compound
+    """
+
+    try:
+        newcm, cpdname, cpdloc = species.split("_")
+    except:
+        cpdname, cpdloc = species.split("_")
+    try:
+        # cpd = sbml.get_a_compound(Compound(cpdname, cpdloc))
+        return sbml.get_a_compound_by_id(species)
+    except ValueError:
+        # the compound is not in the model (but it should be!)
+        cpdnew = PyFBA.metabolism.Compound(cpdname, cpdloc)
+        if verbose:
+            sys.stderr.write("WARNING: {} loc: {}".format(cpdname, cpdloc) +
+                             " is supposed to be in the model but is not. Added\n")
+        sbml.add_compound(cpdnew)
+        return sbml.get_a_compound(PyFBA.metabolism.Compound(cpdname, cpdloc))
+
+
+def _add_reaction(sbml, reaction, reactants, products, parameters, verbose=False):
+    """
+    Add a reaction element to the SBML object. Both parsers use this, so they create the same reactions.
+
+    :param sbml: The SBML object
+    :type sbml: SBML
+    :param reaction: The attributes of the reaction element
+    :type reaction: dict
+    :param reactants: The species and stoichiometry of the reactants
+    :type reactants: list of (str, str)
+    :param products: The species and stoichiometry of the products
+    :type products: list of (str, str)
+    :param parameters: The id and value of the parameters
+    :type parameters: list of (str, str)
+    :param verbose: Whether to create more output
+    :type verbose: bool
+    """
+
+    # I am going to split off the location for the reaction.
+    # I don't believe we have the same reaction running in two different locations but maybe in plants, etc?
+    if 'biomass' in reaction['id'].lower():
+        rxnid = 'biomass_equation'
+    elif '_' not in reaction['id']:
+        if verbose:
+            sys.stderr.write("Warning: " + reaction['id'] + " seems to be a weird id\n")
+        rxnid = reaction['id']
+    elif reaction['id'].startswith('EX_'):
+        ex, rxnid, rxnloc = reaction['id'].split("_")
+        rxnid = 'EX_' + rxnid
+    elif reaction['id'].startswith('R_'):
+        rex, rxnid, rxnloc = reaction['id'].split("_")
+    else:
+        try:
+            rxnid, rxnloc = reaction['id'].split("_")
+        except IndexError:
+            if verbose:
+                sys.stderr.write("ERROR: Can't unpack " + reaction['id'] + "\n")
+            return
+
+    rxn = PyFBA.metabolism.Reaction(rxnid)
+    if verbose and str(rxn) in sbml.get_all_reactions():
+        sys.stderr.write("Already found reaction: " + str(rxn) + " ... overwriting it\n")
+    rxn.description = reaction['name']
+    if rxnid == 'biomass_equation':
+        rxn.set_direction('>')
+    elif reaction['reversible'] == 'true':
+        rxn.set_direction("=")
+    else:
+        rxn.set_direction(">")
+
+    # a hash to build the equation from
+    equation = {'left': [], 'right': []}
+    for species, stoichiometry in reactants:
+        cpd = _species_compound(sbml, species, verbose)
+        rxn.add_left_compounds({cpd})
+        rxn.set_left_compound_abundance(cpd, float(stoichiometry))
+        if cpd.uptake_secretion:
+            rxn.is_uptake_secretion = True
+        equation['left'].append(" (" + str(stoichiometry) + ") " + str(cpd))
+
+    for species, stoichiometry in products:
+        cpd = _species_compound(sbml, species, verbose)
+        rxn.add_right_compounds({cpd})
+        rxn.set_right_compound_abundance(cpd, float(stoichiometry))
+        if cpd.uptake_secretion:
+            rxn.is_uptake_secretion = True
+        equation['right'].append(" (" + str(stoichiometry) + ") " + str(cpd))
+
+    rxn.equation = " + ".join(equation['left']) + " " + rxn.direction + " " + " + ".join(equation['right'])
+
+    for pid, value in parameters:
+        if pid.lower() == 'lower_bound':
+            rxn.lower_bound = float(value)
+        if pid.lower() == 'upper_bound':
+            rxn.upper_bound = float(value)
+
+    duplicate = sbml.add_reaction(rxn)
+    if duplicate is not None and verbose:
+        sys.stderr.write("Reaction " + str(rxn) + " has the same stoichiometry as " + str(duplicate) + "\n")
+
 
 def parse_sbml_file(sbml_file, verbose=False):
     """
     Parse an SBML file and return an SBML object.
 
+    This reads the whole document with BeautifulSoup. For large models stream_sbml_file is faster and uses
+    less memory, and returns the same SBML object.
+
     :param sbml_file: the SBML file to parse
     :type sbml_file: str
     :param verbose: Whether to create more output
@@ -122,6 +314,8 @@ def parse_sbml_file(sbml_file, verbose=False):
     :rtype: object.
     """
 
+    from bs4 import BeautifulSoup
+
     if not os.path.exists(sbml_file):
         raise IOError("SBML file {} was not found".format(sbml_file))
     soup = BeautifulSoup(open(sbml_file, 'r'), 'xml')
@@ -135,116 +329,89 @@ def parse_sbml_file(sbml_file, verbose=False):
 
     # add the compounds
     for s in soup.listOfSpecies.find_all('species'):
-        cpd = PyFBA.metabolism.Compound(s['name'].replace('_c0', '').replace('_e0', ''),
-                                        s['compartment'].replace('0', ''))
-        cpd.abbreviation = s['id']
-        cpd.model_seed_id = s['id'].replace('_c0', '').replace('_e0', '')
-        cpd.charge = s['charge']
-        if s['boundaryCondition'] == 'false':
-            cpd.uptake_secretion = False
-        elif s['boundaryCondition'] == 'true':
-            cpd.uptake_secretion = True
-        else:
-            if verbose:
-                sys.stderr.write("No boundary rule for {}\n".format(cpd.name))
-            cpd.uptake_secretion = False
-        sbml.add_compound(cpd)
+        _add_species(sbml, s.attrs, verbose)
 
     # add the reactions
     for r in soup.listOfReactions.find_all('reaction'):
-        # I am going to split off the location for the reaction.
-        # I don't believe we have the same reaction running in two different locations but maybe in plants, etc?
-        if 'biomass' in r['id'].lower():
-            rxnid = 'biomass_equation'
-        elif '_' not in r['id']:
-            if verbose:
-                sys.stderr.write("Warning: " + r['id'] + " seems to be a weird id\n")
-            rxnid = r['id']
-        elif r['id'].startswith('EX_'):
-            ex, rxnid, rxnloc = r['id'].split("_")
-            rxnid = 'EX_' + rxnid
-        elif r['id'].startswith('R_'):
-            rex, rxnid, rxnloc = r['id'].split("_")
-        else:
-            try:
-                rxnid, rxnloc = r['id'].split("_")
-            except IndexError:
-                if verbose:
-                    sys.stderr.write("ERROR: Can't unpack " + r['id'] + "\n")
-                continue
-
-        rxn = PyFBA.metabolism.Reaction(rxnid)
-        if rxn in sbml.get_all_reactions():
-            if verbose:
-                sys.stderr.write("Already found reaction: " + str(rxn) + " ... not overwriting\n")
+        reactants = [(sp['species'], sp['stoichiometry']) for rc in r.find_all('listOfReactants')
+                     for sp in rc.find_all('speciesReference')]
+        products = [(sp['species'], sp['stoichiometry']) for rc in r.find_all('listOfProducts')
+                    for sp in rc.find_all('speciesReference')]
+        parameters = [(p['id'], p['value']) for params in r.find_all('listOfParameters')
+                      for p in params.find_all('parameter')]
+        _add_reaction(sbml, r.attrs, reactants, products, parameters, verbose)
+
+    return sbml
+
+
+def _local_name(tag):
+    """
+    The tag without its namespace, e.g. {http://www.sbml.org/sbml/level2}species is species
+
+    :param tag: The tag
+    :type tag: str
+    :rtype: str
+    """
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else tag
+
+
+def stream_sbml_file(sbml_file, verbose=False):
+    """
+    Parse an SBML file with iterparse and return an SBML object.
+
+    The species and reactions are added as each element is read, and the elements are then cleared and removed from
+    their parents so we never hold the whole document in memory. The SBML object is the same as the one from parse_sbml_file.
+    We use lxml if it is installed, and otherwise the ElementTree parser from the standard library.
+
+    :param sbml_file: the SBML file to parse
+    :type sbml_file: str
+    :param verbose: Whether to create more output
+    :type verbose: bool.
+    :return: An SBML object
+    :rtype: SBML
+    """
+
+    if not os.path.exists(sbml_file):
+        raise IOError("SBML file {} was not found".format(sbml_file))
+
+    sbml = SBML()
+    # the tags of the open elements, so we know where we are, and the elements, so we can remove each element from
+    # its parent once we have used it
+    stack = []
+    elements = []
+    reaction = None
+    for event, elem in etree.iterparse(sbml_file, events=('start', 'end')):
+        tag = _local_name(elem.tag)
+        if event == 'start':
+            stack.append(tag)
+            elements.append(elem)
+            if stack == ['sbml', 'model']:
+                sbml.model_name = elem.attrib['name']
+                sbml.model_id = elem.attrib['id']
+            elif tag == 'reaction' and stack[-2:-1] == ['listOfReactions']:
+                reaction = {'reactants': [], 'products': [], 'parameters': []}
             continue
-        rxn.description = r['name']
-        if rxnid == 'biomass_equation':
-            rxn.set_direction('>')
-        elif r['reversible'] == 'true':
-            rxn.set_direction("=")
-        else:
-            rxn.set_direction(">")
-
-        # a hash to build the equation from
-        equation = {'left': [], 'right': []}
-        for rc in r.find_all('listOfReactants'):
-            for sp in rc.find_all('speciesReference'):
-                try:
-                    newcm, cpdname, cpdloc = sp['species'].split("_")
-                except:
-                    cpdname, cpdloc = sp['species'].split("_")
-                try:
-                    # cpd = sbml.get_a_compound(Compound(cpdname, cpdloc))
-                    cpd = sbml.get_a_compound_by_id(sp['species'])
-                except ValueError:
-                    # the compound is not in the model (but it should be!)
-                    cpdnew = PyFBA.metabolism.Compound(cpdname, cpdloc)
-                    if verbose:
-                        sys.stderr.write("WARNING: {} loc: {}".format(cpdname, cpdloc) +
-                                         " is supposed to be in the model but is not. Added\n")
-                    sbml.add_compound(cpdnew)
-                    cpd = sbml.get_a_compound(PyFBA.metabolism.Compound(cpdname, cpdloc))
-
-                rxn.add_left_compounds({cpd})
-                rxn.set_left_compound_abundance(cpd, float(sp['stoichiometry']))
-                if cpd.uptake_secretion:
-                    rxn.is_uptake_secretion = True
-                equation['left'].append(" (" + str(sp['stoichiometry']) + ") " + str(cpd))
-
-        for rc in r.find_all('listOfProducts'):
-            for sp in rc.find_all('speciesReference'):
-                try:
-                    newcm, cpdname, cpdloc = sp['species'].split("_")
-                except:
-                    cpdname, cpdloc = sp['species'].split("_")
-                try:
-                    # cpd = sbml.get_a_compound(Compound(cpdname, cpdloc))
-                    cpd = sbml.get_a_compound_by_id(sp['species'])
-                except ValueError:
-                    # the compound is not in the model (but it should be!)
-                    cpdnew = PyFBA.metabolism.Compound(cpdname, cpdloc)
-                    if verbose:
-                        sys.stderr.write("WARNING: {} is supposed to be in the model but is not.\n".format(cpdnew))
-                    sbml.add_compound(cpdnew)
-                    cpd = sbml.get_a_compound(PyFBA.metabolism.Compound(cpdname, cpdloc))
-
-                rxn.add_right_compounds({cpd})
-                rxn.set_right_compound_abundance(cpd, float(sp['stoichiometry']))
-                if cpd.uptake_secretion:
-                    rxn.is_uptake_secretion = True
-                equation['right'].append(" (" + str(sp['stoichiometry']) + ") " + str(cpd))
-
-        rxn.equation = " + ".join(equation['left']) + " " + rxn.direction + " " + " + ".join(equation['right'])
-
-        for params in r.find_all('listOfParameters'):
-            for p in params.find_all('parameter'):
-                if p['id'].lower() == 'lower_bound':
-                    rxn.lower_bound = float(p['value'])
-                if p['id'].lower() == 'upper_bound':
-                    rxn.upper_bound = float(p['value'])
-
-        sbml.add_reaction(rxn)
+
+        stack.pop()
+        elements.pop()
+        if tag == 'compartment' and stack[-1:] == ['listOfCompartments']:
+            sbml.compartment[elem.attrib['id']] = elem.attrib['name']
+        elif tag == 'species' and stack[-1:] == ['listOfSpecies']:
+            _add_species(sbml, elem.attrib, verbose)
+            elem.clear()
+            elements[-1].remove(elem)
+        elif reaction is not None and tag == 'speciesReference' and stack[-1] == 'listOfReactants':
+            reaction['reactants'].append((elem.attrib['species'], elem.attrib['stoichiometry']))
+        elif reaction is not None and tag == 'speciesReference' and stack[-1] == 'listOfProducts':
+            reaction['products'].append((elem.attrib['species'], elem.attrib['stoichiometry']))
+        elif reaction is not None and tag == 'parameter' and stack[-1] == 'listOfParameters':
+            reaction['parameters'].append((elem.attrib['id'], elem.attrib['value']))
+        elif reaction is not None and tag == 'reaction' and stack[-1:] == ['listOfReactions']:
+            _add_reaction(sbml, elem.attrib, reaction['reactants'], reaction['products'], reaction['parameters'],
+                          verbose)
+            reaction = None
+            elem.clear()
+            elements[-1].remove(elem)
 
     return sbml
 
@@ -1,4 +1,39 @@
-from .read_media import read_media_file
-from .rast import read_assigned_functions, roles_of_function, roles_to_subsystem
-from .model_seed import compounds_reactions_enzymes
-from .SBML import parse_sbml_file, correct_media_names
+import importlib
+
+# The parsers pull in optional dependencies (e.g. BeautifulSoup for SBML) and the Model SEED database, so we
+# only import the module that provides a name when that name is first used.
+_EXPORTS = {
+    'read_media_file': 'read_media', 'MediaLibrary': 'read_media',
+    'read_assigned_functions': 'rast', 'roles_of_function': 'rast', 'roles_to_subsystem': 'rast',
+    'stream_assigned_functions': 'rast', 'read_assigned_functions_directory': 'rast',
+    'compounds_reactions_enzymes': 'model_seed', 'TemplateReactions': 'model_seed',
+    'parse_sbml_file': 'SBML', 'stream_sbml_file': 'SBML', 'correct_media_names': 'SBML',
+    'SubsystemIndex': 'subsystems', 'subsystem_index': 'subsystems',
+    'write_store': 'biochemistry_store', 'BiochemistryStore': 'biochemistry_store',
+    'diff_snapshots': 'biochemistry_diff', 'update_store': 'biochemistry_diff', 'affected_models': 'biochemistry_diff',
+}
+_SUBMODULES = {'model_seed', 'rast', 'read_media', 'SBML', 'biochemistry_store', 'biochemistry_diff', 'subsystems'}
+
+__all__ = list(_EXPORTS.keys())
+
+
+def __getattr__(name):
+    """
+    Import the parser that provides name on first access.
+
+    :param name: The name of the function or module that was requested
+    :type name: str
+    :return: The function or module
+    :rtype: object
+    """
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module("." + _EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals().keys()).union(_EXPORTS).union(_SUBMODULES))
@@ -0,0 +1,265 @@
+"""
+Compare two snapshots of the Model SEED Database, and update a biochemistry store with the changes.
+
+When the Model SEED Database is updated most of the compounds and reactions are the same. diff_snapshots compares
+the records in two copies of the database (e.g. the copy your store was written from and a new checkout) and finds
+the compounds, reactions and complexes that were added, removed, or changed, and the reactions that are affected
+by those changes. update_store then rewrites a store (see biochemistry_store.py) by parsing just the affected
+reactions from the new database and copying everything else from the old store, and affected_models finds the
+saved models that use any of the affected reactions so only those need to be rebuilt.
+
+    diff = PyFBA.parse.biochemistry_diff.diff_snapshots('ModelSEEDDatabase.old', 'ModelSEEDDatabase')
+    PyFBA.parse.biochemistry_diff.update_store('biochemistry.store', diff)
+    models = PyFBA.parse.biochemistry_diff.affected_models(diff['affected_reactions'], 'models')
+"""
+
+import hashlib
+import json
+import os
+
+try:
+    from lxml import etree
+except ImportError:
+    import xml.etree.ElementTree as etree
+
+from . import model_seed
+from .biochemistry_store import BiochemistryStore, write_store
+
+PYFBA_NS = "https://github.com/linsalrob/PyFBA"
+
+
+def _digest(record):
+    """
+    A digest of a record, so we do not need to keep every record of both databases in memory to compare them.
+
+    :param record: The record
+    :type record: object
+    :rtype: bytes
+    """
+    return hashlib.sha1(json.dumps(record, sort_keys=True).encode('utf-8')).digest()
+
+
+def _json_digests(json_file, compound_ids=None):
+    """
+    The digest of each record in a Model SEED json file.
+
+    :param json_file: The json file
+    :type json_file: str
+    :param compound_ids: If this is a dict, the compound ids used in each record are added to it
+    :type compound_ids: dict
+    :return: A dict of id and digest
+    :rtype: dict of str and bytes
+    """
+    digests = {}
+    for rid, record in model_seed.iter_json_records(json_file):
+        digests[rid] = _digest(record)
+        if compound_ids is not None:
+            compound_ids[rid] = frozenset(model_seed._equation_compound_ids(record))
+    return digests
+
+
+def _complexes(msd):
+    """
+    The digest of each complex from its definition (the roles in Annotations/Complexes.tsv) and its reactions
+    (Templates/Microbial/Reactions.tsv, see model_seed.complexes).
+
+    :param msd: The Model SEED Database directory
+    :type msd: str
+    :return: A dict of complex id and a tuple of the digest and the reactions of the complex
+    :rtype: dict of str and (bytes, frozenset)
+    """
+    rows = {}
+    cf = os.path.join(msd, 'Annotations', 'Complexes.tsv')
+    if os.path.exists(cf):
+        with open(cf, 'r') as f:
+            for l in f:
+                if l.startswith('#') or l.startswith('id'):
+                    continue
+                p = l.rstrip("\n").split("\t")
+                rows[p[0]] = p
+    reactions = {}
+    tf = os.path.join(msd, 'Templates', 'Microbial', 'Reactions.tsv')
+    if os.path.exists(tf):
+        with open(tf, 'r') as f:
+            for l in f:
+                if l.startswith('#') or l.startswith('id'):
+                    continue
+                p = l.strip().split("\t")
+                if len(p) < 9 or p[8] == "":
+                    continue
+                for cmplx in p[8].split('|'):
+                    reactions.setdefault(cmplx, set()).add(p[0])
+    return {c: (_digest([rows.get(c), sorted(reactions.get(c, []))]), frozenset(reactions.get(c, [])))
+            for c in set(rows) | set(reactions)}
+
+
+def _compare(old, new):
+    """
+    Compare two dicts of digests.
+
+    :param old: The old digests
+    :type old: dict
+    :param new: The new digests
+    :type new: dict
+    :return: A dict of the added, removed and changed ids
+    :rtype: dict of str and set
+    """
+    return {'added': set(new) - set(old), 'removed': set(old) - set(new),
+            'changed': {k for k in set(old) & set(new) if old[k] != new[k]}}
+
+
+def diff_snapshots(old_dir, new_dir=None):
+    """
+    Compare two snapshots of the Model SEED Database record by record.
+
+    The reactions are affected if they were added, removed, or changed, if they use a compound that was added,
+    removed, or changed, or if they are catalyzed by a complex that changed.
+
+    :param old_dir: The directory of the old database
+    :type old_dir: str
+    :param new_dir: The directory of the new database. The default is the ModelSEEDDatabase directory.
+    :type new_dir: str
+    :return: A dict with the 'added', 'removed' and 'changed' ids for each of 'compounds', 'reactions' and
+        'complexes', the set of 'affected_reactions', and the 'new_dir' that we compared
+    :rtype: dict
+    """
+    if not new_dir:
+        new_dir = model_seed.modelseed_dir()
+    for d in [old_dir, new_dir]:
+        if not os.path.exists(os.path.join(d, 'Biochemistry', 'reactions.json')):
+            raise IOError("{} does not look like a Model SEED Database directory".format(d))
+
+    diff = {'compounds': _compare(_json_digests(os.path.join(old_dir, 'Biochemistry', 'compounds.json')),
+                                  _json_digests(os.path.join(new_dir, 'Biochemistry', 'compounds.json')))}
+
+    compound_ids = {}
+    diff['reactions'] = _compare(_json_digests(os.path.join(old_dir, 'Biochemistry', 'reactions.json')),
+                                 _json_digests(os.path.join(new_dir, 'Biochemistry', 'reactions.json'), compound_ids))
+
+    old_complexes = _complexes(old_dir)
+    new_complexes = _complexes(new_dir)
+    diff['complexes'] = _compare({c: v[0] for c, v in old_complexes.items()},
+                                 {c: v[0] for c, v in new_complexes.items()})
+
+    affected = set().union(*diff['reactions'].values())
+    compounds = set().union(*diff['compounds'].values())
+    affected.update(rid for rid, cpds in compound_ids.items() if cpds & compounds)
+    for c in set().union(*diff['complexes'].values()):
+        for complexes in [old_complexes, new_complexes]:
+            if c in complexes:
+                affected.update(complexes[c][1])
+    diff['affected_reactions'] = affected
+    diff['new_dir'] = new_dir
+    return diff
+
+
+def update_store(store_file, diff, out_file=None, verbose=False):
+    """
+    Update a biochemistry store with the changes from diff_snapshots.
+
+    The affected reactions, and the compounds that changed, are parsed from the new database (the new_dir of the
+    diff, or the ModelSEEDDatabase directory for an older diff without one), and everything else is copied from the store, so we do not need to parse the whole database. If the
+    store has the enzymes of the reactions, the affected reactions get their enzymes from the complexes in the new
+    database.
+
+    :param store_file: The store written from the old database
+    :type store_file: str
+    :param diff: The differences between the old and new databases (see diff_snapshots)
+    :type diff: dict
+    :param out_file: The store to write. The default is to replace store_file.
+    :type out_file: str
+    :param verbose: Print more output
+    :type verbose: bool
+    :return: The number of reactions that were parsed from the new database
+    :rtype: int
+    """
+    affected = diff['affected_reactions']
+    removed_compounds = diff['compounds']['removed']
+    new_dir = diff.get('new_dir') or model_seed.modelseed_dir()
+    new_cpds, new_rxns = model_seed.reactions(stream=True, predicate=affected - diff['reactions']['removed'],
+                                              verbose=verbose, msd=new_dir)
+    changed_cpds = model_seed.compounds(os.path.join(new_dir, 'Biochemistry', 'compounds.json'), stream=True,
+                                        predicate=diff['compounds']['added'] | diff['compounds']['changed'])
+
+    with BiochemistryStore(store_file) as store:
+        has_enzymes = len(store.columns['enzymes']) > 0
+        reactions = {rid: store.reactions[rid] for rid in store.reactions if rid not in affected}
+        compounds = {}
+        for k in store.compounds:
+            c = store.compounds[k]
+            if c.model_seed_id in removed_compounds:
+                continue
+            c.reactions -= affected
+            compounds[k] = c
+
+    for k, c in list(changed_cpds.items()) + list(new_cpds.items()):
+        if k in compounds and compounds[k] is not c:
+            c.reactions |= compounds[k].reactions
+        compounds[k] = c
+
+    if has_enzymes:
+        enzymes = {}
+        for cmplx, rids in model_seed.complexes(msd=new_dir).items():
+            for rid in rids:
+                enzymes.setdefault(rid, set()).add(cmplx)
+        for rid, r in new_rxns.items():
+            r.enzymes = enzymes.get(rid, set())
+    reactions.update(new_rxns)
+
+    # write a new file and then replace the old one, because the old one may still be mapped by another process
+    if not out_file:
+        out_file = store_file
+    tmp_file = out_file + ".tmp"
+    write_store(tmp_file, compounds, reactions)
+    os.replace(tmp_file, out_file)
+    return len(new_rxns)
+
+
+def _model_reactions(model_file):
+    """
+    The reaction ids in a saved model, either the .reactions file written by save_model or an SBML file written by
+    write_sbml.
+
+    :param model_file: The file
+    :type model_file: str
+    :rtype: set
+    """
+    if model_file.endswith(".reactions"):
+        with open(model_file, 'r') as f:
+            return {l.strip() for l in f if l.strip()}
+
+    reactions = set()
+    for event, elem in etree.iterparse(model_file, events=('end',)):
+        if elem.tag == '{' + PYFBA_NS + '}reaction':
+            reactions.add(elem.attrib.get('name'))
+        elif isinstance(elem.tag, str) and elem.tag.endswith('reaction'):
+            elem.clear()
+    reactions.discard(None)
+    return reactions
+
+
+def affected_models(reactions, model_dir):
+    """
+    Find the saved models that use any of the reactions.
+
+    We look at the .reactions files written by save_model and the .sbml and .xml files written by write_sbml in the
+    directory.
+
+    :param reactions: The reaction ids, e.g. the affected_reactions from diff_snapshots
+    :type reactions: set
+    :param model_dir: The directory of saved models
+    :type model_dir: str
+    :return: A dict of the model file and the reactions that it uses
+    :rtype: dict of str and set
+    """
+    if not os.path.isdir(model_dir):
+        raise IOError("{} is not a directory".format(model_dir))
+
+    models = {}
+    for f in sorted(os.listdir(model_dir)):
+        if not f.endswith((".reactions", ".sbml", ".xml")):
+            continue
+        used = _model_reactions(os.path.join(model_dir, f)) & reactions
+        if used:
+            models[f] = used
+    return models
@@ -0,0 +1,473 @@
+"""
+A read only, memory mapped store of the Model SEED biochemistry.
+
+Parsing the biochemistry (or unpickling it) gives every process its own copy of all the Compound and Reaction
+objects. The store instead keeps the biochemistry in columns in one file:
+
+    * an interned string table (every distinct string is written once and referred to by its index)
+    * one column per compound and reaction attribute (e.g. the name, location, and molecular weight)
+    * compressed sparse row (CSR) arrays for the lists, e.g. the stoichiometry of each reaction, where the entries
+      for row i are entries[indptr[i]:indptr[i+1]]
+    * the incidence of the compounds and reactions in both directions (see PyFBA.metabolism.IncidenceIndex), so
+      the index does not need to be built when the store is opened
+
+The file is memory mapped, so many processes reading the same store share one copy in the page cache. Compound
+and Reaction objects are only created when you ask for them, and each store keeps the ones it has created, so
+asking again gives you the same object. They are shared, so wrap the reactions in a
+PyFBA.metabolism.ReactionOverlay before you change them.
+
+    PyFBA.parse.biochemistry_store.write_store('biochemistry.store', cpds, rxns)
+    with PyFBA.parse.BiochemistryStore('biochemistry.store') as store:
+        r = store.reactions['rxn00001']
+
+The columns are arrays from the standard library array module and are written in the native byte order.
+"""
+
+import array
+import json
+import math
+import mmap
+import struct
+import sys
+from collections.abc import Mapping
+
+import PyFBA
+
+MAGIC = b'PYFBACOL'
+VERSION = 4
+
+# the charge of a compound that does not have one
+MISSING_CHARGE = -2 ** 31
+
+# the columns that we write, and their array type codes. The string columns hold indices into the string table.
+COLUMNS = {'compound_key': 'i', 'compound_name': 'i', 'location': 'i', 'model_seed_id': 'i', 'abbreviation': 'i',
+           'formula': 'i', 'mw': 'd', 'charge': 'i', 'alternate_seed_ids_indptr': 'q', 'alternate_seed_ids': 'i',
+           'reactions_indptr': 'q', 'reactions': 'i',
+           'reaction_key': 'i', 'reaction_name': 'i', 'description': 'i', 'equation': 'i', 'direction': 'i', 'deltaG': 'd',
+           'deltaG_error': 'd', 'is_transport': 'b', 'enzymes_indptr': 'q', 'enzymes': 'i', 'aliases_indptr': 'q',
+           'aliases': 'i', 'ec_numbers_indptr': 'q', 'ec_numbers': 'i', 'stoichiometry_indptr': 'q',
+           'stoichiometry_compounds': 'i', 'stoichiometry_coefficients': 'd', 'incidence_compounds_indptr': 'q',
+           'incidence_compounds': 'i', 'incidence_reactions_indptr': 'q', 'incidence_reactions': 'i',
+           'strings_indptr': 'q', 'strings': 'B'}
+
+
+class _StringTable:
+    """
+    Collect the distinct strings as we write the store. None is stored as -1.
+    """
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, s):
+        """
+        The index of a string, adding it to the table if it is new.
+
+        :param s: The string
+        :type s: str
+        :return: The index of the string, or -1 for None
+        :rtype: int
+        """
+        if s is None:
+            return -1
+        s = str(s)
+        if s not in self.index:
+            self.index[s] = len(self.strings)
+            self.strings.append(s)
+        return self.index[s]
+
+
+def _float(value):
+    """
+    A number for a float column. Missing values are stored as nan.
+
+    :param value: The value, e.g. a float or a string from the biochemistry files
+    :type value: object
+    :rtype: float
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _charge(value):
+    """
+    A number for the charge column. Missing values are stored as MISSING_CHARGE.
+
+    :param value: The charge, e.g. an int or a string from the biochemistry files
+    :type value: object
+    :rtype: int
+    """
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return MISSING_CHARGE
+
+
+def write_store(filename, compounds, reactions):
+    """
+    Write the compounds and reactions to a store file.
+
+    The compounds and reactions are the dicts returned by PyFBA.parse.model_seed.reactions(), keyed by
+    str(compound) and reaction id. The rows are sorted by their keys so we can find them in the store without
+    building a dict.
+
+    :param filename: The file to write
+    :type filename: str
+    :param compounds: The compounds, keyed by str(compound)
+    :type compounds: dict of Compound
+    :param reactions: The reactions, keyed by reaction id
+    :type reactions: dict of Reaction
+    """
+
+    strings = _StringTable()
+    columns = {c: array.array(t) for c, t in COLUMNS.items()}
+
+    # the reactions can use compounds that are not in the compounds dict (e.g. copies in another location)
+    allcpds = dict(compounds)
+    for r in reactions.values():
+        for c in r.all_compounds():
+            allcpds.setdefault(str(c), c)
+    cpdkeys = sorted(allcpds)
+    cpdrow = {k: i for i, k in enumerate(cpdkeys)}
+    rxnkeys = sorted(reactions)
+
+    columns['alternate_seed_ids_indptr'].append(0)
+    columns['reactions_indptr'].append(0)
+    for k in cpdkeys:
+        c = allcpds[k]
+        columns['compound_key'].append(strings.add(k))
+        columns['compound_name'].append(strings.add(c.name))
+        for col in ['location', 'model_seed_id', 'abbreviation', 'formula']:
+            columns[col].append(strings.add(getattr(c, col)))
+        columns['mw'].append(_float(c.mw))
+        columns['charge'].append(_charge(c.charge))
+        columns['alternate_seed_ids'].extend([strings.add(s) for s in sorted(c.alternate_seed_ids)])
+        columns['alternate_seed_ids_indptr'].append(len(columns['alternate_seed_ids']))
+        columns['reactions'].extend([strings.add(s) for s in sorted(c.reactions)])
+        columns['reactions_indptr'].append(len(columns['reactions']))
+
+    for col in ['enzymes_indptr', 'aliases_indptr', 'ec_numbers_indptr', 'stoichiometry_indptr']:
+        columns[col].append(0)
+    for k in rxnkeys:
+        r = reactions[k]
+        columns['reaction_key'].append(strings.add(k))
+        columns['reaction_name'].append(strings.add(r.name))
+        columns['description'].append(strings.add(r.description))
+        # only keep equations that were set explicitly, the others are rendered from the compounds
+        columns['equation'].append(strings.add(r.explicit_equation))
+        columns['direction'].append(strings.add(r.direction))
+        columns['deltaG'].append(_float(r.deltaG))
+        columns['deltaG_error'].append(_float(r.deltaG_error))
+        columns['is_transport'].append(1 if r.is_transport else 0)
+        columns['enzymes'].extend([strings.add(s) for s in sorted(r.enzymes)])
+        columns['enzymes_indptr'].append(len(columns['enzymes']))
+        # aliases is None (or not set) if the reaction has no aliases, which we store as -1
+        aliases = getattr(r, 'aliases', None)
+        if aliases is None:
+            columns['aliases'].append(-1)
+        else:
+            columns['aliases'].extend([strings.add(s) for s in aliases])
+        columns['aliases_indptr'].append(len(columns['aliases']))
+        columns['ec_numbers'].extend([strings.add(s) for s in sorted(r.ec_numbers)])
+        columns['ec_numbers_indptr'].append(len(columns['ec_numbers']))
+        # the left compounds have negative coefficients
+        for c, q in r.left_abundance.items():
+            columns['stoichiometry_compounds'].append(cpdrow[str(c)])
+            columns['stoichiometry_coefficients'].append(-q)
+        for c, q in r.right_abundance.items():
+            columns['stoichiometry_compounds'].append(cpdrow[str(c)])
+            columns['stoichiometry_coefficients'].append(q)
+        columns['stoichiometry_indptr'].append(len(columns['stoichiometry_compounds']))
+
+    # the rows of the index are the same as the rows of the store, because both are sorted by their keys
+    index = PyFBA.metabolism.IncidenceIndex.from_reactions(reactions, allcpds)
+    columns['incidence_compounds_indptr'].fromlist(index.reaction_indptr.tolist())
+    columns['incidence_compounds'].fromlist(index.reaction_compounds.tolist())
+    columns['incidence_reactions_indptr'].fromlist(index.compound_indptr.tolist())
+    columns['incidence_reactions'].fromlist(index.compound_reactions.tolist())
+
+    encoded = [s.encode('utf-8') for s in strings.strings]
+    columns['strings_indptr'].append(0)
+    for e in encoded:
+        columns['strings_indptr'].append(columns['strings_indptr'][-1] + len(e))
+    columns['strings'].frombytes(b"".join(encoded))
+
+    # lay out the columns after the header, each aligned to 8 bytes
+    layout = {}
+    offset = 0
+    for col in sorted(columns):
+        layout[col] = [columns[col].typecode, offset, len(columns[col])]
+        offset += columns[col].itemsize * len(columns[col])
+        offset += -offset % 8
+    header = json.dumps({'version': VERSION, 'byteorder': sys.byteorder, 'ncompounds': len(cpdkeys),
+                         'nreactions': len(rxnkeys), 'columns': layout}).encode('utf-8')
+    start = len(MAGIC) + 8 + len(header)
+    start += -start % 8
+
+    with open(filename, 'wb') as out:
+        out.write(MAGIC)
+        out.write(struct.pack('<Q', len(header)))
+        out.write(header)
+        out.write(b"\0" * (start - out.tell()))
+        for col in sorted(columns):
+            out.write(b"\0" * (start + layout[col][1] - out.tell()))
+            columns[col].tofile(out)
+
+
+class _StoreMapping(Mapping):
+    """
+    A read only dict of the compounds or reactions in the store. The keys are sorted in the store, so we find
+    them with a binary search and create the object when it is requested.
+    """
+
+    def __init__(self, store, keys, factory):
+        """
+        :param store: The store
+        :type store: BiochemistryStore
+        :param keys: The column of string indices of the keys
+        :type keys: memoryview
+        :param factory: The function that creates the object for a row
+        :type factory: function
+        """
+        self.store = store
+        self.keys_column = keys
+        self.factory = factory
+
+    def row(self, key):
+        """
+        The row for a key.
+
+        :param key: The key
+        :type key: str
+        :return: The row or -1 if the key is not in the store
+        :rtype: int
+        """
+        lo, hi = 0, len(self.keys_column)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.store.string(self.keys_column[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.keys_column) and self.store.string(self.keys_column[lo]) == key:
+            return lo
+        return -1
+
+    def __getitem__(self, key):
+        i = self.row(key) if isinstance(key, str) else -1
+        if i < 0:
+            raise KeyError(key)
+        return self.factory(i)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.row(key) >= 0
+
+    def __iter__(self):
+        for s in self.keys_column:
+            yield self.store.string(s)
+
+    def __len__(self):
+        return len(self.keys_column)
+
+
+class BiochemistryStore:
+    """
+    A memory mapped biochemistry store written by write_store.
+
+    :ivar compounds: A read only dict of the compounds, keyed by str(compound)
+    :ivar reactions: A read only dict of the reactions, keyed by reaction id
+    """
+
+    def __init__(self, filename):
+        """
+        Open the store.
+
+        :param filename: The store file
+        :type filename: str
+        """
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise IOError("{} is not a biochemistry store".format(filename))
+        hlen = struct.unpack('<Q', self._mmap[len(MAGIC):len(MAGIC) + 8])[0]
+        self.header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + hlen].decode('utf-8'))
+        if self.header['version'] != VERSION or self.header['byteorder'] != sys.byteorder:
+            self._mmap.close()
+            raise IOError("{} was written by a different version of PyFBA or on a different platform. "
+                          "Please rebuild it".format(filename))
+        start = len(MAGIC) + 8 + hlen
+        start += -start % 8
+
+        self._buffer = memoryview(self._mmap)
+        self.columns = {}
+        for col, (typecode, offset, length) in self.header['columns'].items():
+            nbytes = array.array(typecode).itemsize * length
+            self.columns[col] = self._buffer[start + offset:start + offset + nbytes].cast(typecode)
+
+        # the objects that we have created, keyed by their row
+        self._compounds = {}
+        self._reaction_compounds = {}
+        self._reactions = {}
+        self.compounds = _StoreMapping(self, self.columns['compound_key'], self.compound)
+        self.reactions = _StoreMapping(self, self.columns['reaction_key'], self.reaction)
+
+    def close(self):
+        """
+        Close the store. Any compounds and reactions that you created are still valid.
+        """
+        for col in self.columns.values():
+            col.release()
+        self.columns = {}
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def string(self, i):
+        """
+        A string from the string table.
+
+        :param i: The index of the string
+        :type i: int
+        :return: The string, or None if i is -1
+        :rtype: str
+        """
+        if i < 0:
+            return None
+        indptr = self.columns['strings_indptr']
+        return sys.intern(bytes(self.columns['strings'][indptr[i]:indptr[i + 1]]).decode('utf-8'))
+
+    def _strings(self, column, row):
+        """
+        The strings in one row of a CSR column.
+
+        :param column: The name of the column
+        :type column: str
+        :param row: The row
+        :type row: int
+        :rtype: list of str
+        """
+        indptr = self.columns[column + '_indptr']
+        return [self.string(i) for i in self.columns[column][indptr[row]:indptr[row + 1]]]
+
+    def incidence(self):
+        """
+        The incidence index of the compounds and reactions in the store. The arrays are copied from the store, so
+        this does not create any compounds or reactions, and the index can be used after the store is closed.
+
+        :rtype: PyFBA.metabolism.IncidenceIndex
+        """
+        arrays = []
+        for c in ['incidence_compounds_indptr', 'incidence_compounds', 'incidence_reactions_indptr',
+                  'incidence_reactions']:
+            a = array.array(self.columns[c].format)
+            a.frombytes(self.columns[c].tobytes())
+            arrays.append(a)
+        return PyFBA.metabolism.IncidenceIndex([self.string(i) for i in self.columns['compound_key']],
+                                               [self.string(i) for i in self.columns['reaction_key']], *arrays)
+
+    def compound(self, row):
+        """
+        The Compound for a row of the store, with the reactions that it is in. It is only created once.
+
+        :param row: The row
+        :type row: int
+        :rtype: PyFBA.metabolism.Compound
+        """
+        if row not in self._compounds:
+            c = self._compound(row)
+            c.reactions = set(self._strings('reactions', row))
+            self._compounds[row] = c
+        return self._compounds[row]
+
+    def _compound(self, row):
+        """
+        Create the Compound for a row of the store, without its reactions. Some compounds (e.g. H2O and ATP) are in
+        thousands of reactions, so we only read them when the compound itself is requested.
+
+        :param row: The row
+        :type row: int
+        :rtype: PyFBA.metabolism.Compound
+        """
+        col = self.columns
+        c = PyFBA.metabolism.Compound(self.string(col['compound_name'][row]), self.string(col['location'][row]))
+        c.model_seed_id = self.string(col['model_seed_id'][row])
+        c.abbreviation = self.string(col['abbreviation'][row])
+        c.formula = self.string(col['formula'][row])
+        if not math.isnan(col['mw'][row]):
+            c.mw = col['mw'][row]
+        if col['charge'][row] != MISSING_CHARGE:
+            c.charge = col['charge'][row]
+        c.alternate_seed_ids = set(self._strings('alternate_seed_ids', row))
+        return c
+
+    def _reaction_compound(self, row):
+        """
+        The Compound for a row of the store as it is used in a reaction, without the reactions that it is in. It is
+        only created once, so every reaction from the store shares its compounds.
+
+        :param row: The row
+        :type row: int
+        :rtype: PyFBA.metabolism.Compound
+        """
+        if row not in self._reaction_compounds:
+            self._reaction_compounds[row] = self._compound(row)
+        return self._reaction_compounds[row]
+
+    def reaction(self, row):
+        """
+        The Reaction for a row of the store. It is only created once. The compounds of the reaction do not have
+        the reactions that they are in; use the compounds mapping for those.
+
+        :param row: The row
+        :type row: int
+        :rtype: PyFBA.metabolism.Reaction
+        """
+        if row not in self._reactions:
+            self._reactions[row] = self._reaction(row)
+        return self._reactions[row]
+
+    def _reaction(self, row):
+        """
+        Create the Reaction, and its compounds, for a row of the store.
+
+        :param row: The row
+        :type row: int
+        :rtype: PyFBA.metabolism.Reaction
+        """
+        col = self.columns
+        r = PyFBA.metabolism.Reaction(self.string(col['reaction_name'][row]))
+        r.description = self.string(col['description'][row])
+        r.equation = self.string(col['equation'][row])
+        r.direction = self.string(col['direction'][row])
+        if not math.isnan(col['deltaG'][row]):
+            r.deltaG = col['deltaG'][row]
+        if not math.isnan(col['deltaG_error'][row]):
+            r.deltaG_error = col['deltaG_error'][row]
+        r.is_transport = bool(col['is_transport'][row])
+        r.enzymes = set(self._strings('enzymes', row))
+        r.ec_numbers = set(self._strings('ec_numbers', row))
+        aliases = self._strings('aliases', row)
+        if aliases != [None]:
+            r.aliases = aliases
+
+        indptr = col['stoichiometry_indptr']
+        for i in range(indptr[row], indptr[row + 1]):
+            c = self._reaction_compound(col['stoichiometry_compounds'][i])
+            q = col['stoichiometry_coefficients'][i]
+            if q < 0:
+                r.add_left_compounds({c})
+                r.set_left_compound_abundance(c, -q)
+            else:
+                r.add_right_compounds({c})
+                r.set_right_compound_abundance(c, q)
+        return r
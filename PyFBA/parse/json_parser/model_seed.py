@@ -20,25 +20,10 @@ import io
 import json
 
 import PyFBA
+from PyFBA.parse.model_seed import modelseed_dir, _modelseed_dir_getattr
 
-MODELSEED_DIR = ""
-if 'ModelSEEDDatabase' in os.environ:
-        MODELSEED_DIR = os.environ['ModelSEEDDatabase']
-else:
-    sys.stderr.write("Please ensure that you install the Model SEED Database somewhere, and set the environment " +
-                     "variable ModelSEEDDatabase to point to that directory.\n" +
-                     " See INSTALLATION.md for more information\n")
-    sys.exit(-1)
 
-if not MODELSEED_DIR:
-    sys.stderr.write("The ModelSEEDDatabase environment variable is not set.\n")
-    sys.stderr.write("Please install the ModelSEEDDatabase, set the variable, and try again")
-    sys.exit(-1)
-
-if not os.path.exists(MODELSEED_DIR):
-    sys.stderr.write("The MODEL SEED directory: {} does not exist.\n".format(MODELSEED_DIR))
-    sys.stderr.write("Please check your installation.\n")
-    sys.exit(-1)
+__getattr__ = _modelseed_dir_getattr(__name__)
 
 
 def template_reactions(modeltype='microbial'):
@@ -71,12 +56,13 @@ def template_reactions(modeltype='microbial'):
     else:
         raise NotImplementedError("Parsing data for " + inputfile + " has not been implemented!")
 
-    if not os.path.exists(os.path.join(MODELSEED_DIR, inputfile)):
-        raise IOError(f"{bcolors.FAIL}FATAL: {bcolors.ENDC}" + os.path.join(MODELSEED_DIR, inputfile) +
-                      " was not found. Please check your model SEED directory (" + MODELSEED_DIR + ")")
+    msd = modelseed_dir()
+    if not os.path.exists(os.path.join(msd, inputfile)):
+        raise IOError("FATAL: " + os.path.join(msd, inputfile) +
+                      " was not found. Please check your model SEED directory (" + msd + ")")
 
     new_enz = {}
-    with open(os.path.join(MODELSEED_DIR, inputfile), 'r') as f:
+    with open(os.path.join(msd, inputfile), 'r') as f:
         for l in f:
             if l.startswith('id'):
                 continue
@@ -109,7 +95,7 @@ def compounds(compounds_file=None):
     cpds = {}
 
     if not compounds_file:
-        compounds_file = os.path.join(MODELSEED_DIR, 'Biochemistry/compounds.json')
+        compounds_file = os.path.join(modelseed_dir(), 'Biochemistry/compounds.json')
 
     try:
         with open(compounds_file, 'r') as infile:
@@ -125,11 +111,13 @@ def compounds(compounds_file=None):
                 if data[cpd][k] == "null" or data[cpd][k] == "none":
                     data[cpd][k] = None
 
-            for k in ["abbreviation", "abstract_compound", "aliases", "charge", "comprised_of", "deltag", "deltagerr",
-                      "formula", "id", "inchikey", "is_cofactor", "is_core", "is_obsolete", "linked_compound", "mass",
-                      "name", "pka", "pkb", "smiles", "source"]:
-                cc.k = data[cpd][k]
-                ce.k = data[cpd][k]
+            for c in [cc, ce]:
+                c.abbreviation = data[cpd].get('abbreviation')
+                c.formula = data[cpd].get('formula')
+                if data[cpd].get('mass') is not None:
+                    c.mw = float(data[cpd]['mass'])
+                if data[cpd].get('charge') is not None:
+                    c.charge = int(float(data[cpd]['charge']))
 
             # there are some compounds (like D-Glucose and Fe2+) that appear >1x in the table
             if str(cc) in cpds:
@@ -202,9 +190,10 @@ def reactions(organism_type="", rctf='Biochemistry/reactions.json', verbose=Fals
             cpds_by_id[cpds[c].location][asi] = cpds[c]
 
     all_reactions = {}
+    rctf = os.path.join(modelseed_dir(), rctf)
 
     try:
-        with open(os.path.join(MODELSEED_DIR, rctf), 'r') as rxnf:
+        with open(rctf, 'r') as rxnf:
             data = json.load(rxnf)
 
         for rid in data:
@@ -381,10 +370,11 @@ def complexes(cf="Microbial", verbose=False):
     :rtype: dict
     """
 
+    msd = modelseed_dir()
     cplxes = {}
     try:
         cfile = f"Templates/{cf}/Reactions.tsv"
-        with open(os.path.join(MODELSEED_DIR, cfile), 'r') as rin:
+        with open(os.path.join(msd, cfile), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -402,7 +392,7 @@ def complexes(cf="Microbial", verbose=False):
                         cplxes[cmplx] = set()
                     cplxes[cmplx].add(p[0])
     except IOError as e:
-        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(MODELSEED_DIR, cf)))
+        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(msd, cf)))
         sys.stderr.write("I/O error({0}): {1}\n".format(e.errno, e.strerror))
         sys.exit(-1)
 
@@ -429,10 +419,11 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :return: A dict of role name and complex ids that the roles is involved with
     :rtype: dict
     """
+    msd = modelseed_dir()
     rles_ec = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -452,7 +443,7 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -497,10 +488,11 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :rtype: dict
 
     """
+    msd = modelseed_dir()
     roles = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -515,7 +507,7 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -18,27 +18,98 @@ import re
 import sys
 import io
 import json
+from collections.abc import Mapping
 
 import PyFBA
 
-MODELSEED_DIR = ""
-if 'ModelSEEDDatabase' in os.environ:
-        MODELSEED_DIR = os.environ['ModelSEEDDatabase']
-else:
-    sys.stderr.write("Please ensure that you install the Model SEED Database somewhere, and set the environment " +
-                     "variable ModelSEEDDatabase to point to that directory.\n" +
-                     " See INSTALLATION.md for more information\n")
-    sys.exit(-1)
 
-if not MODELSEED_DIR:
-    sys.stderr.write("The ModelSEEDDatabase environment variable is not set.\n")
-    sys.stderr.write("Please install the ModelSEEDDatabase, set the variable, and try again")
-    sys.exit(-1)
+def modelseed_dir():
+    """
+    Find the Model SEED Database directory from the ModelSEEDDatabase environment variable.
+
+    We look this up the first time the database is used rather than when this module is imported, so that
+    PyFBA can be imported (e.g. by worker processes) without the database being installed.
+
+    :return: The path to the Model SEED Database directory
+    :rtype: str
+    :raises: IOError if the environment variable is not set or the directory does not exist
+    """
+    msd = os.environ.get('ModelSEEDDatabase', '')
+    if not msd:
+        raise IOError("The ModelSEEDDatabase environment variable is not set.\n" +
+                      "Please install the Model SEED Database somewhere, set the variable to point to that " +
+                      "directory, and try again. See INSTALLATION.md for more information")
+    if not os.path.exists(msd):
+        raise IOError("The MODEL SEED directory: {} does not exist.\n".format(msd) +
+                      "Please check your installation.")
+    return msd
+
+
+def _modelseed_dir_getattr(module_name):
+    """
+    Make the module __getattr__ that resolves MODELSEED_DIR for the Model SEED parsers.
+
+    MODELSEED_DIR used to be set when these modules were imported. It is now resolved when it is first accessed.
+
+    :param module_name: The name of the module the __getattr__ is for, used in the error message
+    :type module_name: str
+    :return: The module __getattr__
+    :rtype: function
+    """
+    def module_getattr(name):
+        if name == 'MODELSEED_DIR':
+            return modelseed_dir()
+        raise AttributeError("module {} has no attribute {}".format(module_name, name))
+    return module_getattr
+
+
+__getattr__ = _modelseed_dir_getattr(__name__)
+
+
+# the template overrides that we have already read, keyed by their file
+_templates = {}
+
+TEMPLATES = {'microbial': 'Microbial', 'gramnegative': 'GramNegative', 'gram_negative': 'GramNegative',
+             'grampositive': 'GramPositive', 'gram_positive': 'GramPositive', 'mycobacteria': 'Mycobacteria',
+             'plant': 'Plant', 'fungi': 'Fungi', 'human': 'Human'}
+
 
-if not os.path.exists(MODELSEED_DIR):
-    sys.stderr.write("The MODEL SEED directory: {} does not exist.\n".format(MODELSEED_DIR))
-    sys.stderr.write("Please check your installation.\n")
-    sys.exit(-1)
+def template_overrides(modeltype='microbial'):
+    """
+    The reaction directions and enzymes from a model template. Each template is only read once per process, and
+    the table is shared, so do not change it.
+
+    :param modeltype: which type of model to load e.g. GramNegative, GramPositive, Microbial
+    :type modeltype: str
+    :return: A dict of reaction id and a tuple of the direction and a frozenset of the enzymes
+    :rtype: dict of str and (str, frozenset)
+    """
+
+    if modeltype.lower() not in TEMPLATES:
+        raise NotImplementedError("Parsing data for " + modeltype + " has not been implemented!")
+    inputfile = "Templates/{}/Reactions.tsv".format(TEMPLATES[modeltype.lower()])
+
+    msd = modelseed_dir()
+    inputfile = os.path.join(msd, inputfile)
+    if inputfile in _templates:
+        return _templates[inputfile]
+    if not os.path.exists(inputfile):
+        raise IOError("FATAL: " + inputfile +
+                      " was not found. Please check your model SEED directory (" + msd + ")")
+
+    overrides = {}
+    enzymes = {}
+    with open(inputfile, 'r') as f:
+        for l in f:
+            if l.startswith('id'):
+                continue
+            p = l.strip().split("\t")
+            enz = frozenset(p[-1].split("|"))
+            # lots of reactions are catalyzed by the same enzymes, so we only keep one copy of each set
+            overrides[p[0]] = (sys.intern(p[2]), enzymes.setdefault(enz, enz))
+
+    _templates[inputfile] = overrides
+    return overrides
 
 
 def template_reactions(modeltype='microbial'):
@@ -53,42 +124,166 @@ def template_reactions(modeltype='microbial'):
     :rtype: dict
     """
 
-    inputfile = ""
-    if modeltype.lower() == 'microbial':
-        inputfile = "Templates/Microbial/Reactions.tsv"
-    elif modeltype.lower() == 'gramnegative' or modeltype.lower() == 'gram_negative':
-        inputfile = "Templates/GramNegative/Reactions.tsv"
-    elif modeltype.lower() == 'grampositive' or modeltype.lower() == 'gram_positive':
-        inputfile = "Templates/GramPositive/Reactions.tsv"
-    elif modeltype.lower() == 'mycobacteria':
-        inputfile = "Templates/Mycobacteria/Reactions.tsv"
-    elif modeltype.lower() == 'plant':
-        inputfile = "Templates/Plant/Reactions.tsv"
-    elif modeltype.lower() == 'fungi':
-        inputfile = "Templates/Fungi/Reactions.tsv"
-    elif modeltype.lower() == 'human':
-        inputfile = "Templates/Human/Reactions.tsv"
-    else:
-        raise NotImplementedError("Parsing data for " + inputfile + " has not been implemented!")
+    return {r: {'direction': direction, 'enzymes': set(enz)}
+            for r, (direction, enz) in template_overrides(modeltype).items()}
 
-    if not os.path.exists(os.path.join(MODELSEED_DIR, inputfile)):
-        raise IOError(f"{bcolors.FAIL}FATAL: {bcolors.ENDC}" + os.path.join(MODELSEED_DIR, inputfile) +
-                      " was not found. Please check your model SEED directory (" + MODELSEED_DIR + ")")
 
-    new_enz = {}
-    with open(os.path.join(MODELSEED_DIR, inputfile), 'r') as f:
-        for l in f:
-            if l.startswith('id'):
-                continue
-            p = l.strip().split("\t")
-            new_enz[p[0]] = {}
-            new_enz[p[0]]['direction'] = p[2]
-            new_enz[p[0]]['enzymes'] = set(p[-1].split("|"))
+class TemplateReactions(Mapping):
+    """
+    The reactions for one type of organism, as a view over the reactions for all organisms.
+
+    The template for the organism type changes the direction and the enzymes of some of the reactions. Rather than
+    changing the shared reactions, we return a copy of those reactions with the template direction and enzymes
+    the first time they are used. All the other reactions are the shared reactions, so you can parse the
+    biochemistry once (without an organism type) and then make a view for each type of organism:
+
+        cpds, rcts, enzs = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        gram_negative = TemplateReactions(rcts, 'gram_negative')
+        gram_positive = TemplateReactions(rcts, 'gram_positive')
+
+    Only the direction and enzymes belong to the view, the compounds of the reactions are still shared.
+
+    :ivar reactions: The shared reactions
+    :ivar organism_type: The type of organism
+    :ivar overrides: The template directions and enzymes (see template_overrides)
+    """
+
+    def __init__(self, reactions, organism_type):
+        """
+        Create the view.
+
+        :param reactions: The reactions for all organisms
+        :type reactions: dict of str and Reaction
+        :param organism_type: The type of organism, eg. microbial, gram_negative, gram_positive
+        :type organism_type: str
+        """
+        self.reactions = reactions
+        self.organism_type = organism_type
+        self.overrides = template_overrides(organism_type)
+        self._reactions = {}
+
+    def __getitem__(self, rid):
+        if rid not in self.overrides:
+            return self.reactions[rid]
+        if rid not in self._reactions:
+            r = copy.copy(self.reactions[rid])
+            r.direction, enz = self.overrides[rid]
+            # the shared reaction has the enzymes from the complexes, and we add the template enzymes
+            r.enzymes = set(enz) | r.enzymes
+            self._reactions[rid] = r
+        return self._reactions[rid]
+
+    def __iter__(self):
+        return iter(self.reactions)
+
+    def __len__(self):
+        return len(self.reactions)
+
+    def __contains__(self, rid):
+        return rid in self.reactions
+
+
+def iter_json_records(json_file, chunk_size=65536):
+    """
+    Incrementally decode a Model SEED json file, yielding one record at a time.
+
+    The biochemistry files are either a dict of records keyed by id, or a list of records that each have an 'id'.
+    Rather than decoding the whole file with json.load we read it in chunks and decode each record as we reach it,
+    so only one record needs to be held in memory at a time.
+
+    :param json_file: The json file to read
+    :type json_file: str
+    :param chunk_size: The number of characters to read from the file at a time
+    :type chunk_size: int
+    :return: A generator of (id, record) tuples
+    :rtype: generator of (str, dict)
+    :raises: ValueError if the file is not a json dict or list
+    """
 
-    return new_enz
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r'\s*')
+
+    with open(json_file, 'r') as f:
+        buf = ""
+        pos = 0
+
+        def more():
+            # read the next chunk, discarding what we have already decoded
+            nonlocal buf, pos
+            data = f.read(chunk_size)
+            if not data:
+                return False
+            buf = buf[pos:] + data
+            pos = 0
+            return True
+
+        def next_char():
+            # skip any whitespace and return the next character without consuming it
+            nonlocal pos
+            while True:
+                pos = whitespace.match(buf, pos).end()
+                if pos < len(buf):
+                    return buf[pos]
+                if not more():
+                    raise ValueError("Unexpected end of file in " + json_file)
+
+        def decode():
+            # decode the next json value, reading more of the file until it is complete
+            nonlocal pos
+            while True:
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if not more():
+                        raise
+                    continue
+                # a number at the very end of the buffer may have been split in two
+                if end == len(buf) and more():
+                    continue
+                pos = end
+                return obj
+
+        opener = next_char()
+        if opener not in '{[':
+            raise ValueError(json_file + " does not contain a json dict or list of records")
+        closer = '}' if opener == '{' else ']'
+        pos += 1
+
+        while True:
+            c = next_char()
+            if c == closer:
+                return
+            if c == ',':
+                pos += 1
+                next_char()
+            if opener == '{':
+                key = decode()
+                if next_char() != ':':
+                    raise ValueError("Expected ':' after " + key + " in " + json_file)
+                pos += 1
+                next_char()
+                yield key, decode()
+            else:
+                record = decode()
+                yield record['id'], record
 
 
-def compounds(compounds_file=None):
+def _predicate(predicate):
+    """
+    Convert a predicate into a function of an id. A predicate can either be a function that takes an id and
+    returns a bool, or a collection of ids (e.g. a set of reaction ids that a model needs).
+
+    :param predicate: The predicate or collection of ids
+    :type predicate: function or set
+    :return: A function that takes an id and returns whether to keep it, or None if everything should be kept
+    :rtype: function
+    """
+    if predicate is None or callable(predicate):
+        return predicate
+    return predicate.__contains__
+
+
+def compounds(compounds_file=None, stream=False, predicate=None):
     """
     Load the compounds mapping. This maps from cpd id to name (we use
     the name in our reactions, but use the cpd id to parse the model
@@ -99,37 +294,53 @@ def compounds(compounds_file=None):
 
     Note that the compounds file must be in json format. See model_seed_tsv for a tab separated parser.
 
+    If stream is True we decode the file one compound at a time (see iter_json_records) instead of loading
+    the whole json document, which reduces the peak memory. You can also provide a predicate, either a function
+    that takes a compound id or a collection of compound ids, and only those compounds will be created.
+
     :param compounds_file: An optional filename of a compounds file to parse
     :type compounds_file: str
+    :param stream: Decode the compounds one record at a time
+    :type stream: bool
+    :param predicate: An optional function of the compound id, or a collection of compound ids, to keep
+    :type predicate: function or set
     :return: A hash of compounds with the str(compound) as the key and the compound object as the value
     :rtype: dict
 
     """
 
     cpds = {}
+    keep = _predicate(predicate)
 
     if not compounds_file:
-        compounds_file = os.path.join(MODELSEED_DIR, 'Biochemistry/compounds.json')
+        compounds_file = os.path.join(modelseed_dir(), 'Biochemistry/compounds.json')
 
     try:
-        with open(compounds_file, 'r') as infile:
-            data = json.load(infile)
-
-        for cpd in data:
-            cc = PyFBA.metabolism.Compound(data[cpd]['name'], 'c')
+        if stream:
+            records = iter_json_records(compounds_file)
+        else:
+            with open(compounds_file, 'r') as infile:
+                records = json.load(infile).items()
+
+        for cpd, record in records:
+            if keep and not keep(cpd):
+                continue
+            cc = PyFBA.metabolism.Compound(record['name'], 'c')
             cc.model_seed_id = cpd
-            ce = PyFBA.metabolism.Compound(data[cpd]['name'], 'e')
+            ce = PyFBA.metabolism.Compound(record['name'], 'e')
             ce.model_seed_id = cpd
 
-            for k in data[cpd].keys():
-                if data[cpd][k] == "null" or data[cpd][k] == "none":
-                    data[cpd][k] = None
+            for k in record.keys():
+                if record[k] == "null" or record[k] == "none":
+                    record[k] = None
 
-            for k in ["abbreviation", "abstract_compound", "aliases", "charge", "comprised_of", "deltag", "deltagerr",
-                      "formula", "id", "inchikey", "is_cofactor", "is_core", "is_obsolete", "linked_compound", "mass",
-                      "name", "pka", "pkb", "smiles", "source"]:
-                cc.k = data[cpd][k]
-                ce.k = data[cpd][k]
+            for c in [cc, ce]:
+                c.abbreviation = record.get('abbreviation')
+                c.formula = record.get('formula')
+                if record.get('mass') is not None:
+                    c.mw = float(record['mass'])
+                if record.get('charge') is not None:
+                    c.charge = int(float(record['charge']))
 
             # there are some compounds (like D-Glucose and Fe2+) that appear >1x in the table
             if str(cc) in cpds:
@@ -167,198 +378,252 @@ def location():
     return all_locations
 
 
-def reactions(organism_type="", rctf='Biochemistry/reactions.json', verbose=False):
+def _equation_stoichiometry(equation):
+    """
+    Parse a Model SEED equation string into its stoichiometry. This is only used when a reaction does not have a
+    structured stoichiometry.
+
+    :param equation: The equation, e.g. (1) cpd00001[0] + (1) cpd00012[0] <=> (2) cpd00009[0]
+    :type equation: str
+    :return: A list of tuples of (coefficient, compound id, location code), with negative coefficients for the
+        compounds on the left side, or None if we can not find a separator
+    :rtype: list
     """
-    Parse the reaction information in Biochemistry/reactions.json
-
-    One reaction ID is associated with one equation and thus many
-    compounds and parts.
 
-    If the boolean verbose is set we will print out error/debugging
-    messages.
+    if not equation:
+        return None
+    # different reactions have different splits!
+    for separator in [" <=> ", " => ", " <= ", " = ", " < ", " > "]:
+        if separator in equation:
+            break
+    else:
+        return None
 
-    You can supply an alternative reactions file (rctf) if you
-    don't like the default but this must be in json format. See model_seed_tsv.py
-    to parse a tab separated values file.
+    left, right = equation.split(separator)
+    stoich = [(-float(q), cmpd, locval) for q, cmpd, locval in
+              re.findall(r'\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', left)]
+    stoich += [(float(q), cmpd, locval) for q, cmpd, locval in
+               re.findall(r'\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', right)]
+    return stoich
 
-    :param organism_type: The type of organism, eg. microbial, gram_negative, gram_positive
-    :type organism_type: str
-    :param rctf: The optional reaction file to provide
-    :type rctf: str
-    :param verbose: Print more output
-    :type verbose: bool
-    :return: Two components, a dict of the reactions and a dict of all the compounds used in the reactions.
-    :rtype: dict, dict
 
+def _stoichiometry(stoichiometry, equation=None):
+    """
+    The stoichiometry of a reaction. Model SEED provides this either as a string like
+    -1:cpd00001:0:0:"H2O";-1:cpd00012:0:0:"PPi";2:cpd00009:0:0:"Phosphate" (coefficient, compound id, compartment
+    index, community index and name) or as a list of dicts with coefficient, compound and compartment keys. If it is
+    missing we fall back to parsing the equation.
+
+    :param stoichiometry: The stoichiometry from the biochemistry file
+    :type stoichiometry: str or list
+    :param equation: The equation to parse if there is no stoichiometry
+    :type equation: str
+    :return: A list of tuples of (coefficient, compound id, location code), with negative coefficients for the
+        compounds on the left side, or None if neither can be parsed
+    :rtype: list
     """
 
-    locations = location()
-    cpds = compounds()
-    # cpds_by_id = {cpds[c].model_seed_id: cpds[c] for c in cpds}
-    cpds_by_id = {"e": {}, "c": {}, "h": {}}
-    for c in cpds:
-        cpds_by_id[cpds[c].location][cpds[c].model_seed_id] = cpds[c]
-        for asi in cpds[c].alternate_seed_ids:
-            cpds_by_id[cpds[c].location][asi] = cpds[c]
+    if stoichiometry and stoichiometry not in ("null", "none"):
+        if isinstance(stoichiometry, list):
+            return [(float(s['coefficient']), s['compound'], str(s.get('compartment', 0))) for s in stoichiometry]
+        return [(float(q), cmpd, locval) for q, cmpd, locval in
+                re.findall(r'([-\d\.e+]+):(cpd\d+):(\d+)', stoichiometry)]
+    return _equation_stoichiometry(equation)
 
-    all_reactions = {}
 
-    try:
-        with open(os.path.join(MODELSEED_DIR, rctf), 'r') as rxnf:
-            data = json.load(rxnf)
-
-        for rid in data:
-            rxn = data[rid]['equation']
-
-            for k in data[rid].keys():
-                if data[rid][k] == "null" or data[rid][k] == "none":
-                    data[rid][k] = None
-
-                if data[rid]['deltag'] and data[rid]['deltag'] != "null":
-                    deltaG = float(data[rid]['deltag'])
-                else:
-                    deltaG = 0.0
-                if data[rid]['deltagerr'] and data[rid]['deltagerr'] != "null":
-                    deltaG_error = float(data[rid]['deltagerr'])
-                else:
-                    deltaG_error = 0.0
-
-                # we need to split the reaction, but different reactions
-                # have different splits!
-
-                separator = ""
-                for separator in [" <=> ", " => ", " <= ", " = ", " < ", " > ", "Not found"]:
-                    if separator in rxn:
-                        break
-                if separator == "Not found":
-                    if verbose:
-                        sys.stderr.write("WARNING: Could not find a seperator in " + rxn +
-                                         ". This reaction was skipped. Please check it\n")
-                    continue
-
-                left, right = rxn.split(separator)
+def _equation_compound_ids(record):
+    """
+    The compound ids used in a Model SEED reaction.
 
-                # check and see we have a valid equation
-                left = left.strip()
-                right = right.strip()
-                if False:
-                    if left == "" or right == "":
-                        if verbose:
-                            sys.stderr.write("One side missing for " + rxn + " ignored\n")
-                        continue
+    :param record: The reaction record with the stoichiometry and/or equation
+    :type record: dict
+    :return: The set of compound ids
+    :rtype: set
+    """
+    return {cmpd for q, cmpd, locval in _stoichiometry(record.get('stoichiometry'), record.get('equation')) or []}
 
-                # create a new reaction object to hold all the information ...
 
-                r = PyFBA.metabolism.Reaction(rid)
+def _json_reaction(rid, record, cpds, cpds_by_id, locations, verbose=False):
+    """
+    Create a Reaction from one record in reactions.json, adding any new compounds to cpds.
+
+    We build the reaction from the structured stoichiometry, and the equation is only rendered from the compounds
+    if someone asks for it.
+
+    :param rid: The reaction id
+    :type rid: str
+    :param record: The decoded json record for the reaction
+    :type record: dict
+    :param cpds: The compounds dict, keyed by str(compound)
+    :type cpds: dict
+    :param cpds_by_id: The compounds keyed by location and then model seed id
+    :type cpds_by_id: dict of dict
+    :param locations: The location codes (see location())
+    :type locations: dict
+    :param verbose: Print more output
+    :type verbose: bool
+    :return: The reaction, or None if the stoichiometry can not be parsed
+    :rtype: Reaction
+    """
 
-                r.deltaG = deltaG
-                r.deltaG_error = deltaG_error
-                if data[rid]['is_transport'] != 0:
-                    r.is_transport = True
-                all_reactions[rid] = r
+    for k in record.keys():
+        if record[k] == "null" or record[k] == "none":
+            record[k] = None
+
+    stoich = _stoichiometry(record.get('stoichiometry'), record.get('equation'))
+    if stoich is None:
+        if verbose:
+            sys.stderr.write("WARNING: Could not find a stoichiometry or a seperator in " + str(record['equation']) +
+                             ". This reaction was skipped. Please check it\n")
+        return None
+    if stoich == [] and verbose:
+        sys.stderr.write("ERROR: Could not parse the compounds of the reaction " + rid + "\n")
+
+    if record['deltag'] and record['deltag'] != "null":
+        deltaG = float(record['deltag'])
+    else:
+        deltaG = 0.0
+    if record['deltagerr'] and record['deltagerr'] != "null":
+        deltaG_error = float(record['deltagerr'])
+    else:
+        deltaG_error = 0.0
 
-                r.direction = data[rid]['direction']
+    # create a new reaction object to hold all the information ...
 
-                # we have to rewrite the equation to accomodate
-                # the proper locations
-                newleft = []
-                newright = []
+    r = PyFBA.metabolism.Reaction(rid)
 
-                # deal with the compounds on the left side of the equation
-                m = re.findall('\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', left)
-                if m == [] and verbose:
-                    sys.stderr.write("ERROR: Could not parse the compounds" + " on the left side of the reaction " +
-                                     rid + ": " + rxn + "\n")
+    r.deltaG = deltaG
+    r.deltaG_error = deltaG_error
+    if record['is_transport'] != 0:
+        r.is_transport = True
 
-                for p in m:
-                    (q, cmpd, locval) = p
+    r.direction = record['direction']
 
-                    if locval in locations:
-                        loc = locations[locval]
-                    else:
-                        if verbose:
-                            sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
-                        loc = locval
+    for q, cmpd, locval in stoich:
+        if locval in locations:
+            loc = locations[locval]
+        else:
+            if verbose:
+                sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
+            loc = locval
 
-                    # we first look up to see whether we have the compound
-                    # and then we need to create a new compound with the
-                    # appropriate location
+        # we first look up to see whether we have the compound
+        # and then we need to create a new compound with the
+        # appropriate location
 
-                    if cmpd in cpds_by_id[loc]:
-                        nc = cpds_by_id[loc][cmpd]
-                    else:
-                        if verbose:
-                            sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
-                        nc = PyFBA.metabolism.Compound(cmpd, loc)
+        if cmpd in cpds_by_id.get(loc, {}):
+            nc = cpds_by_id[loc][cmpd]
+        else:
+            if verbose:
+                sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
+            nc = PyFBA.metabolism.Compound(cmpd, loc)
 
-                    ncstr = str(nc)
-                    nc.add_reactions({rid})
-                    cpds[ncstr] = nc
+        nc.add_reactions({rid})
+        cpds[str(nc)] = nc
 
-                    r.add_left_compounds({nc})
-                    r.set_left_compound_abundance(nc, float(q))
+        if q < 0:
+            r.add_left_compounds({nc})
+            r.set_left_compound_abundance(nc, -q)
+        else:
+            r.add_right_compounds({nc})
+            r.set_right_compound_abundance(nc, q)
 
-                    newleft.append("(" + str(q) + ") " + nc.name + "[" + loc + "]")
+    if record['aliases']:
+        r.aliases = record['aliases'].split(";")
+    else:
+        r.aliases = None
 
-                # deal with the right side of the equation
-                m = re.findall('\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', right)
-                if m == [] and verbose:
-                    sys.stderr.write("ERROR: Could not parse the compounds on the right side of the reaction " +
-                                     rid + ": " + rxn + " >>" + right + "<<\n")
+    # newer versions of the database have a list of EC numbers rather than a ; separated string
+    ecs = record.get('ec_numbers')
+    if ecs:
+        r.ec_numbers = set(ecs) if isinstance(ecs, list) else set(ecs.split(";"))
 
-                for p in m:
-                    (q, cmpd, locval) = p
+    return r
 
-                    if locval in locations:
-                        loc = locations[locval]
-                    else:
-                        if verbose:
-                            sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
-                        loc = locval
 
-                    # we first look up to see whether we have the compound
-                    # and then we need to create a new compound with the
-                    # appropriate location
+def reactions(organism_type="", rctf='Biochemistry/reactions.json', verbose=False, stream=False, predicate=None,
+              msd=None):
+    """
+    Parse the reaction information in Biochemistry/reactions.json
 
-                    if cmpd in cpds_by_id[loc]:
-                        nc = cpds_by_id[loc][cmpd]
-                    else:
-                        if verbose:
-                            sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
-                        nc = PyFBA.metabolism.Compound(cmpd, loc)
+    One reaction ID is associated with one equation and thus many
+    compounds and parts.
 
-                    ncstr = str(nc)
+    If the boolean verbose is set we will print out error/debugging
+    messages.
 
-                    nc.add_reactions({rid})
-                    cpds[ncstr] = nc
+    You can supply an alternative reactions file (rctf) if you
+    don't like the default but this must be in json format. See model_seed_tsv.py
+    to parse a tab separated values file.
 
-                    r.add_right_compounds({nc})
-                    r.set_right_compound_abundance(nc, float(q))
+    If stream is True the reactions (and compounds) are decoded one record at a time rather than loading the
+    whole json document. If you also provide a predicate, either a function that takes a reaction id or a
+    collection of reaction ids, only those reactions, and the compounds that they use, are created. In that case
+    we read the reactions file first to find the compounds that we need.
 
-                    newright.append("(" + str(q) + ") " + nc.name + "[" + loc + "]")
+    :param organism_type: The type of organism, eg. microbial, gram_negative, gram_positive
+    :type organism_type: str
+    :param rctf: The optional reaction file to provide
+    :type rctf: str
+    :param verbose: Print more output
+    :type verbose: bool
+    :param stream: Decode the reactions and compounds one record at a time
+    :type stream: bool
+    :param predicate: An optional function of the reaction id, or a collection of reaction ids, to keep
+    :type predicate: function or set
+    :param msd: The Model SEED Database directory to read. The default is the ModelSEEDDatabase directory.
+    :type msd: str
+    :return: Two components, a dict of the reactions and a dict of all the compounds used in the reactions.
+    :rtype: dict, dict
 
-                r.equation = " + ".join(newleft) + " <=> " + " + ".join(newright)
+    """
 
-                if data[rid]['aliases']:
-                    r.aliases = data[rid]['aliases'].split(";")
-                else:
-                    r.aliases = None
+    locations = location()
+    keep = _predicate(predicate)
+    if not msd:
+        msd = modelseed_dir()
+    rctf = os.path.join(msd, rctf)
+    compounds_file = os.path.join(msd, 'Biochemistry/compounds.json')
 
+    try:
+        if stream:
+            records = iter_json_records(rctf)
+        else:
+            with open(rctf, 'r') as rxnf:
+                records = json.load(rxnf).items()
+        if keep:
+            # only hold on to the records we need, and only load the compounds that they use
+            records = [(rid, record) for rid, record in records if keep(rid)]
+            cpdids = set()
+            for rid, record in records:
+                cpdids.update(_equation_compound_ids(record))
+            cpds = compounds(compounds_file, stream=stream, predicate=cpdids)
+        else:
+            cpds = compounds(compounds_file, stream=stream)
+
+        # cpds_by_id = {cpds[c].model_seed_id: cpds[c] for c in cpds}
+        cpds_by_id = {"e": {}, "c": {}, "h": {}}
+        for c in cpds:
+            cpds_by_id[cpds[c].location][cpds[c].model_seed_id] = cpds[c]
+            for asi in cpds[c].alternate_seed_ids:
+                cpds_by_id[cpds[c].location][asi] = cpds[c]
+
+        all_reactions = {}
+        for rid, record in records:
+            r = _json_reaction(rid, record, cpds, cpds_by_id, locations, verbose)
+            if r:
                 all_reactions[rid] = r
     except IOError as e:
         sys.exit("There was an error parsing " + rctf + "\n" + "I/O error({0}): {1}".format(e.errno, e.strerror))
 
     # finally, if we need to adjust the organism type based on Template reactions, we shall
     if organism_type:
-        new_rcts = template_reactions(organism_type)
-        for r in new_rcts:
-            all_reactions[r].direction = new_rcts[r]['direction']
-            all_reactions[r].enzymes = new_rcts[r]['enzymes']
+        all_reactions = dict(TemplateReactions(all_reactions, organism_type))
 
     return cpds, all_reactions
 
 
-def complexes(cf="Microbial", verbose=False):
+def complexes(cf="Microbial", verbose=False, msd=None):
     """
     Connection between complexes and reactions. A complex can be
     involved in many reactions.
@@ -377,14 +642,18 @@ def complexes(cf="Microbial", verbose=False):
     :type cf: str
     :param verbose: Print more output
     :type verbose: bool
+    :param msd: The Model SEED Database directory to read. The default is the ModelSEEDDatabase directory.
+    :type msd: str
     :return A dict of the complexes where the key is the complex id and the value is the set of reactions
     :rtype: dict
     """
 
+    if not msd:
+        msd = modelseed_dir()
     cplxes = {}
     try:
         cfile = f"Templates/{cf}/Reactions.tsv"
-        with open(os.path.join(MODELSEED_DIR, cfile), 'r') as rin:
+        with open(os.path.join(msd, cfile), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -402,7 +671,7 @@ def complexes(cf="Microbial", verbose=False):
                         cplxes[cmplx] = set()
                     cplxes[cmplx].add(p[0])
     except IOError as e:
-        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(MODELSEED_DIR, cf)))
+        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(msd, cf)))
         sys.stderr.write("I/O error({0}): {1}\n".format(e.errno, e.strerror))
         sys.exit(-1)
 
@@ -429,10 +698,11 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :return: A dict of role name and complex ids that the roles is involved with
     :rtype: dict
     """
+    msd = modelseed_dir()
     rles_ec = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -452,7 +722,7 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -497,10 +767,11 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :rtype: dict
 
     """
+    msd = modelseed_dir()
     roles = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -515,7 +786,7 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -600,6 +871,9 @@ def compounds_reactions_enzymes(organism_type='', verbose=False):
     We return three dicts, the compounds, the enzymes, and the reactions. See the individual methods for the dicts
     that we return!
 
+    If you need the reactions for more than one type of organism, parse the biochemistry once without an
+    organism_type and use a TemplateReactions view for each organism.
+
     :param organism_type: The type of organism, eg. Microbial, Gram_positive, Gram_negative
     :type organism_type:str
     :param verbose:Print more output
@@ -611,7 +885,7 @@ def compounds_reactions_enzymes(organism_type='', verbose=False):
 
     roleset = roles()
     cmplxset = complexes()
-    cpds, rcts = reactions(organism_type, verbose=verbose)
+    cpds, rcts = reactions(verbose=verbose)
     enzs = {}
 
     # for roles the key is the role name and the value is the complex it
@@ -640,6 +914,10 @@ def compounds_reactions_enzymes(organism_type='', verbose=False):
                 enzs[complexid].add_reaction(reactid)
                 rcts[reactid].add_enzymes({complexid})
 
+    # the template enzymes are added to the enzymes from the complexes
+    if organism_type:
+        rcts = dict(TemplateReactions(rcts, organism_type))
+
     return cpds, rcts, enzs
 
 
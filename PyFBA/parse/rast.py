@@ -2,6 +2,24 @@ import os
 import sys
 
 import re
+from functools import lru_cache
+from multiprocessing.pool import ThreadPool
+
+# comments at the end of a function, and the separators between the roles of a function
+COMMENT_REGEX = re.compile(r'\s+[#!]\s.*$')
+ROLE_SEPARATOR_REGEX = re.compile(r'\s*;\s+|\s+[;/@]\s+')
+
+
+@lru_cache(maxsize=65536)
+def _roles_of_function(role):
+    """
+    The roles of a function, cached because the same functions are found in every genome.
+
+    :param role: The functional role
+    :type role: str
+    :rtype: frozenset
+    """
+    return frozenset(ROLE_SEPARATOR_REGEX.split(COMMENT_REGEX.sub('', role)))
 
 
 def roles_of_function(role):
@@ -21,9 +39,27 @@ def roles_of_function(role):
     :rtype: set
     """
 
-    # remove comments from functions and split multiple functions
-    func = re.sub('\s+[#!]\s.*$', '', role)
-    return set(re.split('\s*;\s+|\s+[;/@]\s+', func))
+    # remove comments from functions and split multiple functions. We return a new set each time so the cached
+    # roles can not be changed
+    return set(_roles_of_function(role))
+
+
+def stream_downloaded_data(spreadsheet_file):
+    """
+    Read data downloaded from RAST as a 'spreadsheet (tab-separated text format)' one line at a time.
+
+    :param spreadsheet_file: The file downloaded from RAST
+    :type spreadsheet_file: str
+    :return: A generator of protein encoding gene identifier and the set of functional roles of that gene
+    :rtype: generator of (str, set)
+    """
+    if not os.path.exists(spreadsheet_file):
+        raise IOError("ERROR: {} does not exist".format(spreadsheet_file))
+
+    with open(spreadsheet_file, 'r') as f:
+        for l in f:
+            p = l.strip().split("\t")
+            yield p[1], roles_of_function(p[7])
 
 
 def read_downloaded_data(spreadsheet_file):
@@ -35,15 +71,25 @@ def read_downloaded_data(spreadsheet_file):
     :return: Dictionary of protein encoding gene identifiers and functional roles of those genes
     :rtype:dict of str and str
     """
-    if not os.path.exists(spreadsheet_file):
-        raise IOError("ERROR: {} does not exist".format(spreadsheet_file))
+    return dict(stream_downloaded_data(spreadsheet_file))
 
-    function = {}
-    with open(spreadsheet_file, 'r') as f:
+
+def stream_assigned_functions(assigned_functions_file):
+    """
+    Read the assigned functions file from RAST one line at a time, so that we do not keep the whole file in memory.
+
+    :param assigned_functions_file: The assigned functions file downloaded from RAST
+    :type assigned_functions_file: str
+    :return: A generator of peg and the set of the function(s) associated with that peg
+    :rtype: generator of (str, set)
+    """
+    if not os.path.exists(assigned_functions_file):
+        raise IOError("ERROR: {} does not exist".format(assigned_functions_file))
+
+    with open(assigned_functions_file, 'r') as f:
         for l in f:
             p = l.strip().split("\t")
-            function[p[1]] = roles_of_function(p[7])
-    return function
+            yield p[0], roles_of_function(p[1])
 
 
 def read_assigned_functions(assigned_functions_file):
@@ -57,47 +103,55 @@ def read_assigned_functions(assigned_functions_file):
     :rtype: dict of sets
 
     """
+    return dict(stream_assigned_functions(assigned_functions_file))
 
-    if not os.path.exists(assigned_functions_file):
-        raise IOError("ERROR: {} does not exist".format(assigned_functions_file))
 
-    function = {}
-    with open(assigned_functions_file, 'r') as f:
-        for l in f:
-            p = l.strip().split("\t")
-            function[p[0]] = roles_of_function(p[1])
-    return function
+def _genome_roles(assigned_functions_file):
+    """
+    All the roles in one assigned functions file.
+
+    :param assigned_functions_file: The assigned functions file
+    :type assigned_functions_file: str
+    :rtype: set
+    """
+    roles = set()
+    for peg, rls in stream_assigned_functions(assigned_functions_file):
+        roles.update(rls)
+    return roles
+
+
+def read_assigned_functions_directory(directory, threads=4):
+    """
+    Read all the assigned functions files in a directory, e.g. the annotations of a batch of genomes, and return
+    the roles in each genome. The files are read in a pool of threads.
+
+    :param directory: The directory of assigned functions files, one per genome
+    :type directory: str
+    :param threads: The number of files to read at once
+    :type threads: int
+    :return: A hash of the file name (the genome) and the set of roles in that genome
+    :rtype: dict of str and set
+    """
+    if not os.path.isdir(directory):
+        raise IOError("ERROR: {} is not a directory".format(directory))
+
+    genomes = sorted(f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f)))
+    with ThreadPool(max(1, min(threads, len(genomes)))) as pool:
+        roles = pool.map(_genome_roles, [os.path.join(directory, g) for g in genomes])
+    return dict(zip(genomes, roles))
 
 
 def roles_to_subsystem(roles):
     """
     Find the subsystem categories for a set of functional roles.
 
+    The roles and subsystems are read from util/full_roles_ss.tsv the first time this is called, and then kept (see
+    PyFBA.parse.subsystems).
+
     :param roles: The functional roles
     :type roles: set
     :rtype: dict of sets of 3-tuples
     """
-    ss_data = {}
-    with open(os.path.join(os.path.dirname(__file__), "..", "util", "full_roles_ss.tsv")) as f:
-        for l in f:
-            func, cat, subcat, ss = l.rstrip("\n").split("\t")
-            # Functions can be associated with multiple subsystems
-            try:
-                ss_data[func]
-            except KeyError:
-                ss_data[func] = set()
-            ss_data[func].add((cat, subcat, ss))
-
-    roles_to_ss = {}
-    for r in roles:
-        roles_to_ss[r] = set()
-        if r not in ss_data:
-            roles_to_ss[r].add(("Unknown", "Unknown", "Unknown"))
-        else:
-            for cat, subcat, ss in ss_data[r]:
-                cat = cat if cat != "" else "Unknown"
-                subcat = subcat if subcat != "" else "Unknown"
-                ss = ss if ss != "" else "Unknown"
-                roles_to_ss[r].add((cat, subcat, ss))
-
-    return roles_to_ss
+    from .subsystems import subsystem_index
+    index = subsystem_index()
+    return {r: index.classify(r) for r in roles}
@@ -1,5 +1,6 @@
 import os
 import sys
+from collections.abc import Mapping
 
 import PyFBA
 
@@ -40,3 +41,151 @@ def read_media_file(mediaf):
     return media
 
 
+
+
+class MediaLibrary(Mapping):
+    """
+    All the media in a directory, read once.
+
+    Each medium is a frozenset of the (interned) names of its compounds, so the same compound in different media
+    is one string, and comparing media is cheap set algebra. The library behaves like a read only dict of the media
+    names and these frozensets. Use compounds() to get the set of Compound objects that read_media_file returns.
+
+        library = PyFBA.parse.MediaLibrary()
+        media = library.compounds('ArgonneLB.txt')
+
+    :ivar media_dir: The directory that we read
+    :ivar media: A dict of the media file names and frozensets of the compound names
+    """
+
+    def __init__(self, media_dir=None):
+        """
+        Read all the media files in a directory.
+
+        :param media_dir: The directory of media files. The default is the directory in the PYFBA_MEDIA_DIR
+            environment variable
+        :type media_dir: str
+        """
+        if not media_dir:
+            media_dir = os.environ.get('PYFBA_MEDIA_DIR', '')
+        if not os.path.isdir(media_dir):
+            raise IOError("Media directory {} can not be found\nPlease set the environment variable PYFBA_MEDIA_DIR "
+                          "to point to a directory with all the media files".format(media_dir))
+        self.media_dir = media_dir
+        self.media = {}
+        for mediaf in sorted(os.listdir(media_dir)):
+            if os.path.isfile(os.path.join(media_dir, mediaf)) and not mediaf.startswith('.'):
+                self.media[mediaf] = self._read(os.path.join(media_dir, mediaf))
+
+    @staticmethod
+    def _read(mediaf):
+        """
+        Read the names of the compounds in one media file. This reads the same format as read_media_file.
+
+        :param mediaf: The file to read
+        :type mediaf: str
+        :rtype: frozenset of str
+        """
+        names = set()
+        with open(mediaf, 'r') as f:
+            for li, l in enumerate(f):
+                # skip the header line
+                if li == 0:
+                    continue
+                p = l.strip().split("\t")
+                if len(p) < 2:
+                    sys.stderr.write("Skipped line {} as it does not have enough columns\n".format(l.strip()))
+                    continue
+                names.add(sys.intern(p[1]))
+        return frozenset(names)
+
+    def _name(self, name):
+        """
+        The name of a medium in the library. You can leave off the extension, e.g. ArgonneLB for ArgonneLB.txt
+
+        :param name: The name of the medium
+        :type name: str
+        :rtype: str
+        """
+        if name in self.media:
+            return name
+        if name + ".txt" in self.media:
+            return name + ".txt"
+        raise KeyError(name)
+
+    def __getitem__(self, name):
+        return self.media[self._name(name)]
+
+    def __contains__(self, name):
+        try:
+            self._name(name)
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.media)
+
+    def __len__(self):
+        return len(self.media)
+
+    def compounds(self, name):
+        """
+        The compounds in a medium. This is the same as read_media_file, but does not read the file again.
+
+        :param name: The name of the medium
+        :type name: str
+        :return: A new set of the media compounds
+        :rtype: set of metabolism.Compound
+        """
+        return {PyFBA.metabolism.Compound(n, 'e') for n in self[name]}
+
+    def all_compounds(self, names=None):
+        """
+        All the compounds in any of the media, sorted by name.
+
+        :param names: The media to include. The default is all the media in the library
+        :type names: list of str
+        :rtype: list of str
+        """
+        return sorted(set().union(*[self[n] for n in (names or self.media)]))
+
+    def matrix(self, names=None):
+        """
+        A compound by media matrix of whether each compound is in each medium. Each row is a bytearray so you can
+        use it directly to set the bounds of the uptake reactions for several media at once.
+
+        :param names: The media to include. The default is all the media in the library
+        :type names: list of str
+        :return: The compound names (rows), the media names (columns), and the rows of 0 and 1
+        :rtype: list of str, list of str, list of bytearray
+        """
+        names = list(names or self.media)
+        media = [self[n] for n in names]
+        compounds = self.all_compounds(names)
+        return compounds, names, [bytearray(c in m for m in media) for c in compounds]
+
+    def core(self, names=None):
+        """
+        The compounds that are in every medium.
+
+        :param names: The media to include. The default is all the media in the library
+        :type names: list of str
+        :rtype: frozenset of str
+        """
+        media = [self[n] for n in (names or self.media)]
+        return frozenset.intersection(*media) if media else frozenset()
+
+    def deltas(self, names=None):
+        """
+        The compounds in each medium that are not in the core shared by all the media. For a panel of media you
+        only need to change the bounds for these compounds between runs.
+
+        :param names: The media to include. The default is all the media in the library
+        :type names: list of str
+        :return: A dict of the media names and the compounds that are not in the core
+        :rtype: dict of str and frozenset of str
+        """
+        names = list(names or self.media)
+        core = self.core(names)
+        return {n: self[n] - core for n in names}
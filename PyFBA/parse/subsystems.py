@@ -0,0 +1,175 @@
+"""
+An index of the subsystems and the functional roles in them.
+
+We have two sources of subsystem information: util/full_roles_ss.tsv has the classification (category, subcategory
+and subsystem) of each role, and the SEED SS_functions.txt file has the functions in each subsystem. Reading and
+splitting these files is slow, so we build each part of the index the first time it is used and then keep it for
+the rest of the process. Use subsystem_index() to get the shared index.
+"""
+
+import io
+import os
+import pickle
+import sys
+
+from .rast import roles_of_function
+
+FULL_ROLES_SS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "util",
+                             "full_roles_ss.tsv")
+
+UNKNOWN = ("Unknown", "Unknown", "Unknown")
+
+# the indexes we have already built, keyed by their files
+_indexes = {}
+
+
+class SubsystemIndex:
+    """
+    Roles, subsystems, and their classification.
+
+    :ivar roles_file: The file of role, category, subcategory, and subsystem (full_roles_ss.tsv)
+    :ivar ss_file: The file of function and subsystem (SS_functions.txt)
+    """
+
+    def __init__(self, roles_file=FULL_ROLES_SS, ss_file=None, verbose=False):
+        """
+        Create the index. The files are not read until the index is used.
+
+        :param roles_file: The file of role, category, subcategory, and subsystem
+        :type roles_file: str
+        :param ss_file: The file of function and subsystem
+        :type ss_file: str
+        :param verbose: Report the lines that we can not parse
+        :type verbose: bool
+        """
+        self.roles_file = roles_file
+        self.ss_file = ss_file
+        self.verbose = verbose
+        self._classification = None
+        self._roles_to_subsystems = None
+        self._subsystems_to_roles = None
+
+    @property
+    def classification(self):
+        """
+        The (category, subcategory, subsystem) tuples for each role, from the roles file. Empty parts of the
+        classification are Unknown.
+
+        :rtype: dict of str and set of tuple
+        """
+        if self._classification is None:
+            classification = {}
+            with open(self.roles_file) as f:
+                for l in f:
+                    func, cat, subcat, ss = l.rstrip("\n").split("\t")
+                    # Functions can be associated with multiple subsystems
+                    if func not in classification:
+                        classification[func] = set()
+                    classification[func].add((cat or "Unknown", subcat or "Unknown", ss or "Unknown"))
+            self._classification = classification
+        return self._classification
+
+    def classify(self, role):
+        """
+        The classification of a role.
+
+        :param role: The functional role
+        :type role: str
+        :return: A new set of (category, subcategory, subsystem) tuples. If we do not know the role, this is just
+            (Unknown, Unknown, Unknown)
+        :rtype: set of tuple
+        """
+        return set(self.classification.get(role, {UNKNOWN}))
+
+    def _read_ss_file(self):
+        """
+        Read the functions in each subsystem from the ss file, splitting each function into its roles.
+        """
+        if not self.ss_file or not os.path.exists(self.ss_file):
+            raise IOError("The subsystems file {} does not exist".format(self.ss_file))
+        subsys_to_roles = {}
+        roles_to_subsys = {}
+        with io.open(self.ss_file, 'r', encoding="utf-8", errors='replace') as sin:
+            for l in sin:
+                if l.startswith('#'):
+                    continue
+                p = l.strip().split("\t")
+                if len(p) < 2:
+                    if self.verbose:
+                        sys.stderr.write("Too few columns in subsystem file at line: {}\n".format(l.strip()))
+                    continue
+                if p[1] not in subsys_to_roles:
+                    subsys_to_roles[p[1]] = set()
+                for role in roles_of_function(p[0]):
+                    if role not in roles_to_subsys:
+                        roles_to_subsys[role] = set()
+                    subsys_to_roles[p[1]].add(role)
+                    roles_to_subsys[role].add(p[1])
+        self._subsystems_to_roles = subsys_to_roles
+        self._roles_to_subsystems = roles_to_subsys
+
+    @property
+    def roles_to_subsystems(self):
+        """
+        The subsystems that each role is in, from the ss file.
+
+        :rtype: dict of str and set of str
+        """
+        if self._roles_to_subsystems is None:
+            self._read_ss_file()
+        return self._roles_to_subsystems
+
+    @property
+    def subsystems_to_roles(self):
+        """
+        The roles in each subsystem, from the ss file.
+
+        :rtype: dict of str and set of str
+        """
+        if self._subsystems_to_roles is None:
+            self._read_ss_file()
+        return self._subsystems_to_roles
+
+    def dump(self, filename):
+        """
+        Save the index so another process can load it without reading the files. We save the parts of the index
+        that we can build.
+
+        :param filename: The file to write
+        :type filename: str
+        """
+        self.classification
+        if self.ss_file and os.path.exists(self.ss_file):
+            self.roles_to_subsystems
+        with open(filename, 'wb') as out:
+            pickle.dump(self.__dict__, out, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load an index saved with dump.
+
+        :param filename: The file to read
+        :type filename: str
+        :rtype: SubsystemIndex
+        """
+        index = cls.__new__(cls)
+        with open(filename, 'rb') as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+
+def subsystem_index(roles_file=FULL_ROLES_SS, ss_file=None):
+    """
+    The shared subsystem index for these files. The index is only built once per process.
+
+    :param roles_file: The file of role, category, subcategory, and subsystem
+    :type roles_file: str
+    :param ss_file: The file of function and subsystem
+    :type ss_file: str
+    :rtype: SubsystemIndex
+    """
+    key = (roles_file, ss_file)
+    if key not in _indexes:
+        _indexes[key] = SubsystemIndex(roles_file, ss_file)
+    return _indexes[key]
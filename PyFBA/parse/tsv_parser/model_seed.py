@@ -18,27 +18,13 @@ import re
 import sys
 import io
 import json
+import multiprocessing
 
 import PyFBA
+from PyFBA.parse.model_seed import _stoichiometry, modelseed_dir, _modelseed_dir_getattr
 
-MODELSEED_DIR = ""
-if 'ModelSEEDDatabase' in os.environ:
-        MODELSEED_DIR = os.environ['ModelSEEDDatabase']
-else:
-    sys.stderr.write("Please ensure that you install the Model SEED Database somewhere, and set the environment " +
-                     "variable ModelSEEDDatabase to point to that directory.\n" +
-                     " See INSTALLATION.md for more information\n")
-    sys.exit(-1)
 
-if not MODELSEED_DIR:
-    sys.stderr.write("The ModelSEEDDatabase environment variable is not set.\n")
-    sys.stderr.write("Please install the ModelSEEDDatabase, set the variable, and try again")
-    sys.exit(-1)
-
-if not os.path.exists(MODELSEED_DIR):
-    sys.stderr.write("The MODEL SEED directory: {} does not exist.\n".format(MODELSEED_DIR))
-    sys.stderr.write("Please check your installation.\n")
-    sys.exit(-1)
+__getattr__ = _modelseed_dir_getattr(__name__)
 
 
 def template_reactions(modeltype='microbial'):
@@ -71,12 +57,13 @@ def template_reactions(modeltype='microbial'):
     else:
         raise NotImplementedError("Parsing data for " + inputfile + " has not been implemented!")
 
-    if not os.path.exists(os.path.join(MODELSEED_DIR, inputfile)):
-        raise IOError(f"{bcolors.FAIL}FATAL: {bcolors.ENDC}" + os.path.join(MODELSEED_DIR, inputfile) +
-                      " was not found. Please check your model SEED directory (" + MODELSEED_DIR + ")")
+    msd = modelseed_dir()
+    if not os.path.exists(os.path.join(msd, inputfile)):
+        raise IOError("FATAL: " + os.path.join(msd, inputfile) +
+                      " was not found. Please check your model SEED directory (" + msd + ")")
 
     new_enz = {}
-    with open(os.path.join(MODELSEED_DIR, inputfile), 'r') as f:
+    with open(os.path.join(msd, inputfile), 'r') as f:
         for l in f:
             if l.startswith('id'):
                 continue
@@ -87,7 +74,156 @@ def template_reactions(modeltype='microbial'):
 
     return new_enz
 
-def compounds(compounds_file=None):
+def _chunks(filename, nchunks):
+    """
+    Split a file into byte ranges that start and end on line boundaries so that each range can be parsed
+    independently.
+
+    :param filename: The file to split
+    :type filename: str
+    :param nchunks: The (maximum) number of chunks
+    :type nchunks: int
+    :return: A list of tuples of filename, start and end offsets, in the order they appear in the file
+    :rtype: list
+    """
+
+    size = os.path.getsize(filename)
+    offsets = [0]
+    with open(filename, 'rb') as f:
+        for i in range(1, nchunks):
+            if i * size // nchunks <= offsets[-1]:
+                continue
+            f.seek(i * size // nchunks)
+            f.readline()
+            if f.tell() >= size:
+                break
+            offsets.append(f.tell())
+    offsets.append(size)
+    return [(filename, offsets[i], offsets[i+1]) for i in range(len(offsets) - 1) if offsets[i] < offsets[i+1]]
+
+
+def _chunk_lines(chunk):
+    """
+    The lines in one chunk of a file.
+
+    :param chunk: A tuple of filename, start and end offsets (see _chunks)
+    :type chunk: tuple
+    :return: The lines in the chunk
+    :rtype: list
+    """
+
+    filename, start, end = chunk
+    with open(filename, 'rb') as f:
+        f.seek(start)
+        lines = f.read(end - start).decode('utf-8').split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _compound_records(lines):
+    """
+    Parse lines of the compounds file into compact records that are cheap to send between processes.
+
+    :param lines: The lines of the file, without their newlines
+    :type lines: iterable of str
+    :return: Tuples of id, abbreviation, name, formula and mass
+    :rtype: generator
+    """
+
+    for l in lines:
+        if l.startswith('id'):
+            continue
+        p = l.strip().split("\t")
+        yield p[0], p[1], p[2], p[3], p[4]
+
+
+def _reaction_records(lines):
+    """
+    Parse lines of the reactions file into compact records that are cheap to send between processes.
+
+    Lines that we can not parse are returned as (None, line) so the caller can report them in file order.
+
+    :param lines: The lines of the file, without their newlines
+    :type lines: iterable of str
+    :return: Tuples of id, stoichiometry, is transport, direction, deltaG, deltaG error, equation, and EC numbers
+    :rtype: generator
+    """
+
+    for l in lines:
+        if l.startswith('id'):
+            # ignore the header line
+            continue
+        if l.startswith("#"):
+            # ignore any comment lines
+            continue
+
+        pieces = l.strip().split("\t")
+        if len(pieces) < 20:
+            yield None, l + "\n"
+            continue
+
+        for i in range(len(pieces)):
+            if pieces[i] == "none" or pieces[i] == "null":
+                pieces[i] = None
+
+        if pieces[14]:
+            deltaG = float(pieces[14])
+        else:
+            deltaG = 0.0
+        if pieces[15]:
+            deltaG_error = float(pieces[15])
+        else:
+            deltaG_error = 0.0
+
+        yield (pieces[0], _stoichiometry(pieces[4], pieces[6]), pieces[5] != '0', pieces[9], deltaG,
+               deltaG_error, pieces[6], pieces[13])
+
+
+def _parse_chunk(job):
+    """
+    Parse one chunk of a file in a worker process.
+
+    :param job: A tuple of the parser (_compound_records or _reaction_records) and the chunk (see _chunks)
+    :type job: tuple
+    :return: The records in the chunk
+    :rtype: list
+    """
+
+    parser, chunk = job
+    return list(parser(_chunk_lines(chunk)))
+
+
+def _parse_chunks(parser, filename, processes=1):
+    """
+    Parse a file with parser, either one line at a time in this process or by splitting it into chunks and
+    parsing them in a pool of processes. Either way the records are returned in the order they appear in the file.
+
+    :param parser: The function to parse the lines (_compound_records or _reaction_records)
+    :type parser: function
+    :param filename: The file to parse
+    :type filename: str
+    :param processes: The number of processes to use
+    :type processes: int
+    :return: The records in file order
+    :rtype: generator
+    """
+
+    if processes <= 1:
+        with open(filename, 'r', encoding='utf-8') as f:
+            for record in parser(l.rstrip("\n") for l in f):
+                yield record
+        return
+    # use a few chunks per process so one slow chunk does not hold everyone up
+    chunks = _chunks(filename, processes * 4)
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_parse_chunk, [(parser, c) for c in chunks])
+    for result in results:
+        for record in result:
+            yield record
+
+
+def compounds(compounds_file=None, processes=1):
     """
     Load the compounds mapping. This maps from cpd id to name (we use
     the name in our reactions, but use the cpd to parse the model
@@ -96,8 +232,13 @@ def compounds(compounds_file=None):
     Optionally, you can provide a compounds file. If not, the default
     in MODELSEED_DIR/Biochemistry/compounds.master.tsv will be used.
 
+    If processes is more than one the file is split into chunks that are parsed in parallel. The
+    compounds are identical to those from parsing the file serially.
+
     :param compounds_file: An optional filename of a compounds file to parse
     :type compounds_file: str
+    :param processes: The number of processes to use
+    :type processes: int
     :return: A hash of compounds with the str(compound) as the key and the compound object as the value
     :rtype: dict
 
@@ -106,24 +247,20 @@ def compounds(compounds_file=None):
     cpds = {}
 
     if not compounds_file:
-        compounds_file = os.path.join(MODELSEED_DIR, 'Biochemistry/compounds.tsv')
+        compounds_file = os.path.join(modelseed_dir(), 'Biochemistry/compounds.tsv')
 
     try:
-        with open(compounds_file, 'r') as f:
-            for l in f:
-                if l.startswith('id'):
-                    continue
-                p = l.strip().split("\t")
-                c = PyFBA.metabolism.Compound(p[2], '')
-                c.model_seed_id = p[0]
-                c.abbreviation = p[1]
-                c.formula = p[3]
-                c.mw = p[4]
-                # there are some compounds (like D-Glucose and Fe2+) that appear >1x in the table
-                if str(c) in cpds:
-                    cpds[str(c)].alternate_seed_ids.add(p[0])
-                else:
-                    cpds[str(c)] = c
+        for mid, abbreviation, name, formula, mw in _parse_chunks(_compound_records, compounds_file, processes):
+            c = PyFBA.metabolism.Compound(name, '')
+            c.model_seed_id = mid
+            c.abbreviation = abbreviation
+            c.formula = formula
+            c.mw = mw
+            # there are some compounds (like D-Glucose and Fe2+) that appear >1x in the table
+            if str(c) in cpds:
+                cpds[str(c)].alternate_seed_ids.add(mid)
+            else:
+                cpds[str(c)] = c
     except IOError as e:
         sys.exit("There was an error parsing " +
                  compounds_file + "\n" + "I/O error({0}): {1}".format(e.errno, e.strerror))
@@ -150,7 +287,7 @@ def location():
     return all_locations
 
 
-def reactions(organism_type="", rctf='Biochemistry/reactions.tsv', verbose=False):
+def reactions(organism_type="", rctf='Biochemistry/reactions.tsv', verbose=False, processes=1):
     """
     Parse the reaction information in Biochemistry/reactions.tsv
 
@@ -163,19 +300,26 @@ def reactions(organism_type="", rctf='Biochemistry/reactions.tsv', verbose=False
     You can supply an alternative reactions file (rctf) if you
     don't like the default.
 
+    The compounds are taken from the stoichiometry column, and we only parse the equation if that is missing.
+
+    If processes is more than one the compounds and reactions files are split into chunks that are parsed in
+    parallel, and the records are merged in file order so the result is identical to parsing them serially.
+
     :param organism_type: The type of organism, eg. microbial, gram_negative, gram_positive
     :type organism_type: str
     :param rctf: The optional reaction file to provide
     :type rctf: str
     :param verbose: Print more output
     :type verbose: bool
+    :param processes: The number of processes to use
+    :type processes: int
     :return: Two components, a dict of the reactions and a dict of all the compounds used in the reactions.
     :rtype: dict, dict
 
     """
 
     locations = location()
-    cpds = compounds()
+    cpds = compounds(processes=processes)
     cpds_by_id = {}
     for c in cpds:
         cpds_by_id[cpds[c].model_seed_id] = cpds[c]
@@ -183,157 +327,69 @@ def reactions(organism_type="", rctf='Biochemistry/reactions.tsv', verbose=False
             cpds_by_id[asi] = cpds[c]
 
     all_reactions = {}
+    rctf = os.path.join(modelseed_dir(), rctf)
 
     try:
-        with open(os.path.join(MODELSEED_DIR, rctf), 'r') as rxnf:
-            for l in rxnf:
-                if l.startswith('id'):
-                    # ignore the header line
-                    continue
-                if l.startswith("#"):
-                    # ignore any comment lines
-                    continue
+        for record in _parse_chunks(_reaction_records, rctf, processes):
+            if record[0] is None:
+                sys.stderr.write("ERROR PARSING REACTION INFO: " + record[1])
+                continue
 
-                pieces = l.strip().split("\t")
-                if len(pieces) < 20:
-                    sys.stderr.write("ERROR PARSING REACTION INFO: " + l)
-                    continue
+            rid, stoich, is_transport, direction, deltaG, deltaG_error, rxn, ecs = record
+            if stoich is None:
+                if verbose:
+                    sys.stderr.write("WARNING: Could not find a stoichiometry or a seperator in " +
+                                     str(rxn) + ". This reaction was skipped. Please check it\n")
+                continue
+            if stoich == [] and verbose:
+                sys.stderr.write("ERROR: Could not parse the compounds of the reaction " + rid + "\n")
 
-                rid = pieces[0]
+            # create a new reaction object to hold all the information ...
 
-                rxn = pieces[6]
-                for i in range(len(pieces)):
-                    if pieces[i] == "none" or pieces[i] == "null":
-                        pieces[i] = None
+            r = PyFBA.metabolism.Reaction(rid)
 
-                if pieces[14]:
-                    deltaG = float(pieces[14])
-                else:
-                    deltaG = 0.0
-                if pieces[15]:
-                    deltaG_error = float(pieces[15])
-                else:
-                    deltaG_error = 0.0
+            r.deltaG = deltaG
+            r.deltaG_error = deltaG_error
+            if is_transport:
+                r.is_transport = True
 
-                # we need to split the reaction; different reactions have different splits!
+            r.direction = direction
+            if ecs:
+                r.ec_numbers = set(ecs.split(";"))
 
-                separator = ""
-                for separator in [" <=> ", " => ", " <= ", " = ", " < ", " > ", "Not found"]:
-                    if separator in rxn:
-                        break
-                if separator == "Not found":
+            for q, cmpd, locval in stoich:
+                if locval in locations:
+                    loc = locations[locval]
+                else:
                     if verbose:
-                        sys.stderr.write("WARNING: Could not find a seperator in " + rxn +
-                                         ". This reaction was skipped. Please check it\n")
-                    continue
-
-                left, right = rxn.split(separator)
-
-                # check and see we have a valid equation
-                left = left.strip()
-                right = right.strip()
-                if False:
-                    if left == "" or right == "":
-                        if verbose:
-                            sys.stderr.write("One side missing for " + rxn + " ignored\n")
-                        continue
-
-                # create a new reaction object to hold all the information ...
-
-                r = PyFBA.metabolism.Reaction(rid)
-
-                r.deltaG = deltaG
-                r.deltaG_error = deltaG_error
-                if pieces[5] != '0':
-                    r.is_transport = True
-                all_reactions[rid] = r
-
-                r.direction = pieces[9]
-
-                # we have to rewrite the equation to accomodate the proper locations
-                newleft = []
-                newright = []
-
-                # deal with the compounds on the left side of the equation
-                m = re.findall('\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', left)
-                if m == [] and verbose:
-                    sys.stderr.write("ERROR: Could not parse the compounds" + " on the left side of the reaction " +
-                                     rid + ": " + rxn + "\n")
+                        sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
+                    loc = locval
 
-                for p in m:
-                    (q, cmpd, locval) = p
+                # we first look up to see whether we have the compound
+                # and then we need to create a new compound with the
+                # appropriate location
 
-                    if locval in locations:
-                        loc = locations[locval]
-                    else:
-                        if verbose:
-                            sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
-                        loc = locval
-
-                    # we first look up to see whether we have the compound
-                    # and then we need to create a new compound with the
-                    # appropriate location
-
-                    if cmpd in cpds_by_id:
-                        nc = PyFBA.metabolism.Compound(cpds_by_id[cmpd].name, loc)
-                    else:
-                        if verbose:
-                            sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
-                        nc = PyFBA.metabolism.Compound(cmpd, loc)
-
-                    ncstr = str(nc)
+                if cmpd in cpds_by_id:
+                    nc = PyFBA.metabolism.Compound(cpds_by_id[cmpd].name, loc)
+                else:
+                    if verbose:
+                        sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
+                    nc = PyFBA.metabolism.Compound(cmpd, loc)
 
-                    if ncstr in cpds:
-                        nc = copy.copy(cpds[ncstr])
-                    nc.add_reactions({rid})
-                    cpds[ncstr] = nc
+                ncstr = str(nc)
+                if ncstr in cpds:
+                    nc = copy.copy(cpds[ncstr])
+                nc.add_reactions({rid})
+                cpds[ncstr] = nc
 
+                if q < 0:
                     r.add_left_compounds({nc})
-                    r.set_left_compound_abundance(nc, float(q))
-
-                    newleft.append("(" + str(q) + ") " + nc.name + "[" + loc + "]")
-
-                # deal with the right side of the equation
-                m = re.findall('\(([\d\.e-]+)\)\s+(.*?)\[(\d+)\]', right)
-                if m == [] and verbose:
-                        sys.stderr.write("ERROR: Could not parse the compounds on the right side of the reaction " +
-                                         rid + ": " + rxn + " >>" + right + "<<\n")
-
-                for p in m:
-                    (q, cmpd, locval) = p
-
-                    if locval in locations:
-                        loc = locations[locval]
-                    else:
-                        if verbose:
-                            sys.stderr.write("WARNING: Could not get a location " + " for " + locval + "\n")
-                        loc = locval
-
-                    # we first look up to see whether we have the compound
-                    # and then we need to create a new compound with the
-                    # appropriate location
-
-                    if cmpd in cpds_by_id:
-                        nc = PyFBA.metabolism.Compound(cpds_by_id[cmpd].name, loc)
-                    else:
-                        if verbose:
-                            sys.stderr.write("ERROR: Did not find " + cmpd + " in the compounds file.\n")
-                        nc = PyFBA.metabolism.Compound(cmpd, loc)
-
-                    ncstr = str(nc)
-                    if ncstr in cpds:
-                        nc = copy.copy(cpds[ncstr])
-                    nc.add_reactions({rid})
-                    cpds[ncstr] = nc
-
+                    r.set_left_compound_abundance(nc, -q)
+                else:
                     r.add_right_compounds({nc})
-                    r.set_right_compound_abundance(nc, float(q))
-
-                    newright.append("(" + str(q) + ") " + nc.name + "[" + loc + "]")
-
-                r.equation = " + ".join(newleft) + " <=> " + " + ".join(newright)
+                    r.set_right_compound_abundance(nc, q)
 
-                all_reactions[rid] = r
+            all_reactions[rid] = r
     except IOError as e:
         sys.exit("There was an error parsing " + rctf + "\n" + "I/O error({0}): {1}".format(e.errno, e.strerror))
 
@@ -370,10 +426,11 @@ def complexes(cf="Microbial", verbose=False):
     :rtype: dict
     """
 
+    msd = modelseed_dir()
     cplxes = {}
     try:
         cfile = f"Templates/{cf}/Reactions.tsv"
-        with open(os.path.join(MODELSEED_DIR, cfile), 'r') as rin:
+        with open(os.path.join(msd, cfile), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -391,7 +448,7 @@ def complexes(cf="Microbial", verbose=False):
                         cplxes[cmplx] = set()
                     cplxes[cmplx].add(p[0])
     except IOError as e:
-        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(MODELSEED_DIR, cf)))
+        sys.stderr.write("There was an error parsing {}\n".format(os.path.join(msd, cf)))
         sys.stderr.write("I/O error({0}): {1}\n".format(e.errno, e.strerror))
         sys.exit(-1)
 
@@ -418,10 +475,11 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :return: A dict of role name and complex ids that the roles is involved with
     :rtype: dict
     """
+    msd = modelseed_dir()
     rles_ec = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -441,7 +499,7 @@ def roles_ec(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -486,10 +544,11 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
     :rtype: dict
 
     """
+    msd = modelseed_dir()
     roles = {}
     try:
         rles = {}
-        with open(os.path.join(MODELSEED_DIR, rf), 'r') as rin:
+        with open(os.path.join(msd, rf), 'r') as rin:
             for l in rin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -504,7 +563,7 @@ def roles(rf="Annotations/Roles.tsv", cf="Annotations/Complexes.tsv"):
 
     try:
         cplxes = {}
-        with open(os.path.join(MODELSEED_DIR, cf), 'r') as cin:
+        with open(os.path.join(msd, cf), 'r') as cin:
             for l in cin:
                 if l.startswith("#") or l.startswith('id'):
                     # ignore any comment lines
@@ -581,7 +640,7 @@ def enzymes(verbose=False):
     return enzs
 
 
-def compounds_reactions_enzymes(organism_type='', verbose=False):
+def compounds_reactions_enzymes(organism_type='', verbose=False, processes=1):
     """
     Convert each of the roles and complexes into a set of enzymes, and
     connect them to reactions.
@@ -593,6 +652,8 @@ def compounds_reactions_enzymes(organism_type='', verbose=False):
     :type organism_type:str
     :param verbose:Print more output
     :type verbose:bool
+    :param processes: The number of processes to use to parse the compounds and reactions
+    :type processes: int
     :return: The compounds, the reactions, and the enzymes in that order
     :rtype: dict of Compound, dict of Reaction, dict of Enzyme
 
@@ -600,7 +661,7 @@ def compounds_reactions_enzymes(organism_type='', verbose=False):
 
     roleset = roles()
     cmplxset = complexes()
-    cpds, rcts = reactions(organism_type, verbose=verbose)
+    cpds, rcts = reactions(organism_type, verbose=verbose, processes=processes)
     enzs = {}
 
     # for roles the key is the role name and the value is the complex it
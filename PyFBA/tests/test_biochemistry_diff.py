@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+from PyFBA.tests.test_build_model import PPASE, TRANSPORTER, write_database
+
+"""
+Test comparing two snapshots of the Model SEED Database and updating a biochemistry store with the changes.
+"""
+
+
+class TestBiochemistryDiff(unittest.TestCase):
+
+    def setUp(self):
+        """Write an old and a new database, where the new one has a new reaction and compound and a changed
+        reaction and complex"""
+        self.dir = tempfile.mkdtemp()
+        self.old = os.path.join(self.dir, 'old')
+        self.new = os.path.join(self.dir, 'new')
+        write_database(self.old)
+        write_database(self.new)
+
+        cf = os.path.join(self.new, 'Biochemistry', 'compounds.json')
+        with open(cf) as f:
+            compounds = json.load(f)
+        compounds['cpd00002'] = dict(compounds['cpd00001'], id='cpd00002', name='ATP', formula='C10H13N5O13P3')
+        with open(cf, 'w') as out:
+            json.dump(compounds, out)
+        rf = os.path.join(self.new, 'Biochemistry', 'reactions.json')
+        with open(rf) as f:
+            reactions = json.load(f)
+        reactions['rxn05145']['direction'] = '='
+        reactions['rxn00010'] = dict(reactions['rxn00001'], id='rxn00010', stoichiometry="null",
+                                     equation="(1) cpd00002[0] + (1) cpd00001[0] <=> (1) cpd00012[0]")
+        with open(rf, 'w') as out:
+            json.dump(reactions, out)
+        # the pyrophosphatase complex now also catalyzes the new reaction
+        with open(os.path.join(self.new, 'Templates', 'Microbial', 'Reactions.tsv'), 'a') as out:
+            out.write("rxn00010\tc\t=\t=\tconditional\t0\t0\t0\tcpx00001\n")
+
+        self.oldmsd = os.environ.get('ModelSEEDDatabase')
+
+    def tearDown(self):
+        if self.oldmsd is None:
+            os.environ.pop('ModelSEEDDatabase', None)
+        else:
+            os.environ['ModelSEEDDatabase'] = self.oldmsd
+        shutil.rmtree(self.dir)
+
+    def test_diff_snapshots(self):
+        """Find the records that changed and the reactions that they affect"""
+        diff = PyFBA.parse.diff_snapshots(self.old, self.new)
+        self.assertEqual(diff['compounds'], {'added': {'cpd00002'}, 'removed': set(), 'changed': set()})
+        self.assertEqual(diff['reactions'], {'added': {'rxn00010'}, 'removed': set(), 'changed': {'rxn05145'}})
+        self.assertEqual(diff['complexes'], {'added': set(), 'removed': set(), 'changed': {'cpx00001'}})
+        self.assertEqual(diff['affected_reactions'], {'rxn00001', 'rxn00010', 'rxn05145'})
+        self.assertEqual(PyFBA.parse.diff_snapshots(self.old, self.old)['affected_reactions'], set())
+
+    def test_update_store(self):
+        """Updating a store gives the same store as writing it from the new database"""
+        os.environ['ModelSEEDDatabase'] = self.old
+        store_file = os.path.join(self.dir, 'biochemistry.store')
+        cpds, rxns, enzs = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        PyFBA.parse.write_store(store_file, cpds, rxns)
+
+        os.environ['ModelSEEDDatabase'] = self.new
+        diff = PyFBA.parse.diff_snapshots(self.old)
+        self.assertEqual(PyFBA.parse.update_store(store_file, diff), 3)
+        cpds, rxns, enzs = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        with PyFBA.parse.BiochemistryStore(store_file) as store:
+            self.assertEqual(set(store.compounds), set(cpds))
+            for k in cpds:
+                self.assertEqual(store.compounds[k].reactions, cpds[k].reactions)
+                self.assertEqual(store.compounds[k].formula, cpds[k].formula)
+            self.assertEqual(set(store.reactions), set(rxns))
+            for rid in rxns:
+                r = store.reactions[rid]
+                self.assertEqual(r.direction, rxns[rid].direction)
+                self.assertEqual(r.enzymes, rxns[rid].enzymes)
+                self.assertEqual(r.left_abundance, rxns[rid].left_abundance)
+                self.assertEqual(r.right_abundance, rxns[rid].right_abundance)
+            self.assertEqual(store.reactions['rxn00010'].enzymes, {'cpx00001'})
+
+    def test_update_store_from_new_dir(self):
+        """The store is updated from the new database that was compared, not the ModelSEEDDatabase directory"""
+        os.environ['ModelSEEDDatabase'] = self.old
+        store_file = os.path.join(self.dir, 'biochemistry.store')
+        cpds, rxns, enzs = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        PyFBA.parse.write_store(store_file, cpds, rxns)
+
+        diff = PyFBA.parse.diff_snapshots(self.old, self.new)
+        self.assertEqual(diff['new_dir'], self.new)
+        self.assertEqual(PyFBA.parse.update_store(store_file, diff), 3)
+        with PyFBA.parse.BiochemistryStore(store_file) as store:
+            self.assertIn('rxn00010', store.reactions)
+            self.assertIn('ATP (location: c)', store.compounds)
+            self.assertEqual(store.reactions['rxn05145'].direction, '=')
+            self.assertEqual(store.reactions['rxn00010'].enzymes, {'cpx00001'})
+
+    def test_affected_models(self):
+        """Find the saved models that use the affected reactions"""
+        os.environ['ModelSEEDDatabase'] = self.old
+        model_dir = os.path.join(self.dir, 'models')
+        cpds, rxns, enzs = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        builder = PyFBA.model.ModelBuilder(rxns, 'gramnegative')
+        builder.build({TRANSPORTER}, 'm1', 'transporter').to_sbml(os.path.join(self.dir, 'm1.sbml'))
+        os.makedirs(model_dir)
+        shutil.move(os.path.join(self.dir, 'm1.sbml'), model_dir)
+        PyFBA.model.save_model(builder.build({PPASE}, 'm2', 'ppase'), model_dir)
+
+        self.assertEqual(PyFBA.parse.affected_models({'rxn05145'}, model_dir), {'m1.sbml': {'rxn05145'}})
+        self.assertEqual(PyFBA.parse.affected_models({'rxn00001', 'rxn05145', 'rxn00010'}, model_dir),
+                         {'m1.sbml': {'rxn05145'}, 'ppase.reactions': {'rxn00001'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
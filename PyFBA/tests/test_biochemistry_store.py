@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+
+"""
+Test writing the biochemistry to a memory mapped store and reading it back.
+"""
+
+
+def biochemistry():
+    """A couple of reactions and their compounds"""
+    h2o = PyFBA.metabolism.Compound('H2O', 'c')
+    h2o.model_seed_id = 'cpd00001'
+    h2o.formula = 'H2O'
+    h2o.mw = '18.0'
+    h2o.alternate_seed_ids = {'cpd15275'}
+    ppi = PyFBA.metabolism.Compound('PPi', 'c')
+    ppi.model_seed_id = 'cpd00012'
+    ppi.charge = -3
+    pi = PyFBA.metabolism.Compound('Phosphate', 'c')
+    pi.model_seed_id = 'cpd00009'
+    pie = PyFBA.metabolism.Compound('Phosphate', 'e')
+    pie.model_seed_id = 'cpd00009'
+
+    r1 = PyFBA.metabolism.Reaction('rxn00001')
+    r1.add_left_compounds({h2o, ppi})
+    r1.set_left_compound_abundance(h2o, 1)
+    r1.set_left_compound_abundance(ppi, 1)
+    r1.add_right_compounds({pi})
+    r1.set_right_compound_abundance(pi, 2)
+    r1.direction = '='
+    r1.deltaG = -3.46
+    r1.enzymes = {'cpx00001', 'cpx00002'}
+    r1.ec_numbers = {'3.6.1.1'}
+    r1.aliases = ['KEGG: R00004']
+
+    r2 = PyFBA.metabolism.Reaction('rxn05145')
+    r2.add_left_compounds({pie})
+    r2.set_left_compound_abundance(pie, 1)
+    r2.add_right_compounds({pi})
+    r2.set_right_compound_abundance(pi, 1)
+    r2.direction = '>'
+    r2.is_transport = True
+    r2.equation = 'Phosphate[e] => Phosphate[c]'
+
+    for c, rids in [(h2o, {'rxn00001'}), (ppi, {'rxn00001'}), (pi, {'rxn00001', 'rxn05145'}), (pie, {'rxn05145'})]:
+        c.add_reactions(rids)
+    # pie is deliberately not in the compounds dict, but it is used by a reaction
+    return {str(c): c for c in [h2o, ppi, pi]}, {'rxn00001': r1, 'rxn05145': r2}
+
+
+class TestBiochemistryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.storef = os.path.join(self.dir, 'biochemistry.store')
+        self.cpds, self.rxns = biochemistry()
+        PyFBA.parse.write_store(self.storef, self.cpds, self.rxns)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_compounds(self):
+        """Read the compounds back from the store"""
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            self.assertEqual(len(store.compounds), 4)
+            self.assertEqual(list(store.compounds), sorted(list(self.cpds) + ['Phosphate (location: e)']))
+            self.assertIn('H2O (location: c)', store.compounds)
+            self.assertNotIn('H2O (location: e)', store.compounds)
+            with self.assertRaises(KeyError):
+                store.compounds['H2O (location: e)']
+            h2o = store.compounds['H2O (location: c)']
+            self.assertEqual(h2o, self.cpds['H2O (location: c)'])
+            self.assertEqual(h2o.model_seed_id, 'cpd00001')
+            self.assertEqual(h2o.formula, 'H2O')
+            self.assertEqual(h2o.mw, 18.0)
+            self.assertEqual(h2o.alternate_seed_ids, {'cpd15275'})
+            self.assertIsNone(h2o.abbreviation)
+            ppi = store.compounds['PPi (location: c)']
+            self.assertEqual(ppi.charge, -3)
+            self.assertIsInstance(ppi.charge, int)
+            self.assertEqual(store.compounds['Phosphate (location: c)'].reactions, {'rxn00001', 'rxn05145'})
+
+    def test_reactions(self):
+        """Read the reactions back from the store"""
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            self.assertEqual(set(store.reactions), set(self.rxns))
+            for rid in self.rxns:
+                r = store.reactions[rid]
+                self.assertEqual(r, self.rxns[rid])
+                self.assertEqual(r.equation, self.rxns[rid].equation)
+                self.assertEqual(r.left_abundance, self.rxns[rid].left_abundance)
+                self.assertEqual(r.right_abundance, self.rxns[rid].right_abundance)
+                self.assertEqual(r.direction, self.rxns[rid].direction)
+                self.assertEqual(r.deltaG, self.rxns[rid].deltaG)
+                self.assertEqual(r.is_transport, self.rxns[rid].is_transport)
+                self.assertEqual(r.enzymes, self.rxns[rid].enzymes)
+                self.assertEqual(r.ec_numbers, self.rxns[rid].ec_numbers)
+            self.assertEqual(store.reactions['rxn00001'].aliases, ['KEGG: R00004'])
+            self.assertFalse(hasattr(store.reactions['rxn05145'], 'aliases'))
+            self.assertEqual(store.reactions['rxn00001'].equation, "(1) H2O[c] + (1) PPi[c] <=> (2) Phosphate[c]")
+
+    def test_created_once(self):
+        """Each compound and reaction is only created once, and the compounds of reactions do not read their
+        reactions"""
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            r = store.reactions['rxn00001']
+            self.assertIs(store.reactions['rxn00001'], r)
+            self.assertIs(store.compounds['PPi (location: c)'], store.compounds['PPi (location: c)'])
+            pi = [c for c in r.right_compounds if c.name == 'Phosphate'][0]
+            self.assertFalse(pi.reactions)
+            self.assertIs([c for c in store.reactions['rxn05145'].right_compounds][0], pi)
+            self.assertEqual(store.compounds['Phosphate (location: c)'].reactions, {'rxn00001', 'rxn05145'})
+
+    def test_charges(self):
+        """Charges are stored as integers, and missing charges are read back as missing"""
+        self.cpds['H2O (location: c)'].charge = None
+        self.cpds['Phosphate (location: c)'].charge = '-2'
+        PyFBA.parse.write_store(self.storef, self.cpds, self.rxns)
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            self.assertEqual(store.compounds['H2O (location: c)'].charge,
+                             PyFBA.metabolism.Compound('H2O', 'c').charge)
+            self.assertEqual(store.compounds['Phosphate (location: c)'].charge, -2)
+
+    def test_reaction_keys(self):
+        """The reactions are found by their keys, which do not have to be their names"""
+        self.rxns['rxn05145'].name = 'Phosphate transport'
+        self.rxns['a reaction'] = self.rxns.pop('rxn00001')
+        PyFBA.parse.write_store(self.storef, self.cpds, self.rxns)
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            self.assertEqual(list(store.reactions), ['a reaction', 'rxn05145'])
+            self.assertEqual(store.reactions['rxn05145'].name, 'Phosphate transport')
+            self.assertEqual(store.reactions['a reaction'].name, 'rxn00001')
+            self.assertNotIn('Phosphate transport', store.reactions)
+            self.assertEqual(store.incidence().reaction_ids, ['a reaction', 'rxn05145'])
+
+    def test_incidence(self):
+        """The incidence index in the store is the same as the index of the reactions"""
+        index = PyFBA.metabolism.IncidenceIndex.from_reactions(self.rxns, self.cpds)
+        with PyFBA.parse.BiochemistryStore(self.storef) as store:
+            stored = store.incidence()
+        self.assertEqual(stored.compound_keys, index.compound_keys)
+        self.assertEqual(stored.reaction_ids, index.reaction_ids)
+        self.assertEqual(list(stored.degrees()), list(index.degrees()))
+        self.assertEqual(stored.reactions_of({'Phosphate (location: c)'}), {'rxn00001', 'rxn05145'})
+        self.assertEqual(stored.compounds_of({'rxn05145'}), {'Phosphate (location: c)', 'Phosphate (location: e)'})
+
+    def test_not_a_store(self):
+        """Opening something that is not a store raises an IOError"""
+        notf = os.path.join(self.dir, 'not.store')
+        with open(notf, 'w') as out:
+            out.write("this is not a store\n")
+        self.assertRaises(IOError, PyFBA.parse.BiochemistryStore, notf)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase
 import PyFBA
 
@@ -31,3 +33,48 @@ class TestBiomass_equation(TestCase):
         biomass_eqn = PyFBA.metabolism.biomass_equation('gram_negative')
         self.assertEqual(biomass_eqn.number_of_left_compounds(), 53)
         self.assertEqual(biomass_eqn.number_of_right_compounds(), 7)
+
+    def test_built_once(self):
+        """
+        Each biomass equation is only built once, and changes to the reaction we get are not shared.
+        """
+        first = PyFBA.metabolism.biomass_equation('gram_negative')
+        second = PyFBA.metabolism.biomass_equation('gramnegative')
+        self.assertIs(first.base, second.base)
+        self.assertIs(first.compound_indices, second.compound_indices)
+        # the compounds are shared until they are used
+        self.assertEqual(first.overrides(), {})
+        first.is_biomass_reaction = True
+        self.assertFalse(second.is_biomass_reaction)
+        water = [c for c in first.left_compounds if c.name == 'H2O'][0]
+        self.assertIn(water, PyFBA.metabolism.biomass_equation('kbase').left_compounds)
+        # each reaction has its own compounds
+        self.assertIsNot(water, [c for c in second.left_compounds if c.name == 'H2O'][0])
+        water.add_reactions({'rxn00001'})
+        water.uptake_secretion = True
+        for c in PyFBA.metabolism.biomass_equation('gram_negative').left_compounds:
+            self.assertFalse(c.reactions)
+            self.assertFalse(c.uptake_secretion)
+        first.set_left_compound_abundance(water, 100)
+        self.assertEqual(second.get_left_compound_abundance(water), first.base.get_left_compound_abundance(water))
+        self.assertNotEqual(second.get_left_compound_abundance(water), 100)
+
+    def test_custom_biomass(self):
+        """
+        Test reading a custom biomass composition from a file.
+        """
+        fd, biomass_file = tempfile.mkstemp(suffix='.biomass')
+        with os.fdopen(fd, 'w') as out:
+            out.write("# a very small organism\nATP\t-40\nH2O\t-35.5\nADP\t40\nBiomass\t1\n")
+        try:
+            name = PyFBA.metabolism.read_biomass_file(biomass_file)
+        finally:
+            os.remove(biomass_file)
+        self.assertEqual(name, os.path.splitext(os.path.basename(biomass_file))[0])
+        biomass_eqn = PyFBA.metabolism.biomass_equation(name)
+        self.assertEqual(biomass_eqn.number_of_left_compounds(), 2)
+        self.assertEqual(biomass_eqn.number_of_right_compounds(), 2)
+        self.assertEqual(biomass_eqn.equation, "(40.0) ATP + (35.5) H2O > (40.0) ADP + (1.0) Biomass")
+
+        PyFBA.metabolism.register_biomass(name, {'ATP': 1}, {'Biomass': 1})
+        self.assertEqual(PyFBA.metabolism.biomass_equation(name).number_of_left_compounds(), 1)
@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+from PyFBA.tests.test_model_seed_streaming import COMPOUNDS, REACTIONS
+
+"""
+Test building models from the roles in a genome. We write a tiny Model SEED Database with the biochemistry, the
+annotations, and the templates so these tests do not need the real database.
+"""
+
+PPASE = "Inorganic pyrophosphatase (EC 3.6.1.1)"
+TRANSPORTER = "Phosphate transport protein"
+
+
+def write_database(msd):
+    """Write the biochemistry, the roles and complexes, and the templates"""
+    os.makedirs(os.path.join(msd, 'Biochemistry'))
+    with open(os.path.join(msd, 'Biochemistry', 'compounds.json'), 'w') as out:
+        json.dump(COMPOUNDS, out)
+    with open(os.path.join(msd, 'Biochemistry', 'reactions.json'), 'w') as out:
+        json.dump(REACTIONS, out)
+    os.makedirs(os.path.join(msd, 'Annotations'))
+    with open(os.path.join(msd, 'Annotations', 'Roles.tsv'), 'w') as out:
+        out.write("id\tname\tsource\taliases\n")
+        out.write("ftr01\t{}\tModelSEED\tnull\n".format(PPASE))
+        out.write("ftr02\t{}\tModelSEED\tnull\n".format(TRANSPORTER))
+    with open(os.path.join(msd, 'Annotations', 'Complexes.tsv'), 'w') as out:
+        out.write("id\tname\tsource\treference\tconfidence\troles\n")
+        out.write("cpx00001\tcpx1\tModelSEED\tnull\t0\tftr01;1;1;0\n")
+        out.write("cpx00002\tcpx2\tModelSEED\tnull\t0\tftr02;1;1;0\n")
+    for template, direction in [('Microbial', '='), ('GramNegative', '>')]:
+        os.makedirs(os.path.join(msd, 'Templates', template))
+        with open(os.path.join(msd, 'Templates', template, 'Reactions.tsv'), 'w') as out:
+            out.write("id\tcompartment\tdirection\tgfdir\ttype\tbase_cost\tforward_cost\treverse_cost\tcomplexes\n")
+            out.write("rxn00001\tc\t{}\t=\tconditional\t0\t0\t0\tcpx00001\n".format(direction))
+            # rxn99999 is not in the biochemistry
+            out.write("rxn05145\tc\t>\t=\tconditional\t0\t0\t0\tcpx00002\n")
+            out.write("rxn99999\tc\t>\t=\tconditional\t0\t0\t0\tcpx00002\n")
+
+
+class TestBuildModel(unittest.TestCase):
+
+    def setUp(self):
+        self.msd = tempfile.mkdtemp()
+        write_database(self.msd)
+        self.oldmsd = os.environ.get('ModelSEEDDatabase')
+        os.environ['ModelSEEDDatabase'] = self.msd
+        self.af = os.path.join(self.msd, 'assigned_functions')
+        with open(self.af, 'w') as out:
+            out.write("fig|1.1.peg.1\t{}\n".format(PPASE))
+            out.write("fig|1.1.peg.2\t{} / {}\n".format(TRANSPORTER, "hypothetical protein"))
+
+    def tearDown(self):
+        if self.oldmsd is None:
+            os.environ.pop('ModelSEEDDatabase')
+        else:
+            os.environ['ModelSEEDDatabase'] = self.oldmsd
+        shutil.rmtree(self.msd)
+
+    def test_role_reactions_index(self):
+        """The index has the reactions for each role and is only built once"""
+        index = PyFBA.filters.roles_and_reactions.role_reactions_index()
+        self.assertEqual(index, {PPASE: {'rxn00001'}, TRANSPORTER: {'rxn05145', 'rxn99999'}})
+        self.assertIs(PyFBA.filters.roles_and_reactions.role_reactions_index(), index)
+        self.assertEqual(PyFBA.filters.roles_to_reactions({PPASE, "hypothetical protein"}), {PPASE: {'rxn00001'}})
+
+    def test_model_builder(self):
+        """Build models for several genomes from one builder"""
+        compounds, reactions, enzymes = PyFBA.parse.model_seed.compounds_reactions_enzymes()
+        builder = PyFBA.model.ModelBuilder(reactions, 'gramnegative')
+        model = builder.build({PPASE, TRANSPORTER, "hypothetical protein"}, 'm1', 'Model 1')
+        self.assertEqual(set(model.reactions), {'rxn00001', 'rxn05145'})
+        self.assertEqual(model.roles, {PPASE: {'rxn00001'}, TRANSPORTER: {'rxn05145'}})
+        self.assertEqual(model.reactions['rxn00001'].direction, '>')
+        self.assertEqual(reactions['rxn00001'].direction, '=')
+        self.assertIn('H2O', model.compounds)
+        self.assertEqual(model.biomass_reaction.name, 'biomass_equation')
+
+        other = builder.build({PPASE}, 'm2', 'Model 2')
+        self.assertEqual(set(other.reactions), {'rxn00001'})
+        self.assertIs(other.reactions['rxn00001'], model.reactions['rxn00001'])
+
+    def test_roles_to_model(self):
+        """Build a model from an assigned functions file"""
+        model = PyFBA.model.roles_to_model(self.af, 'm1', 'Model 1')
+        self.assertEqual(set(model.reactions), {'rxn00001', 'rxn05145'})
+        self.assertEqual(model.organism_type, 'gramnegative')
+        self.assertEqual(model.reactions['rxn00001'].direction, '>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import PyFBA
+from PyFBA.gapfill import ECIndex, suggest_reactions_using_ec
+
+"""
+Test the index of EC numbers and reactions, and suggesting reactions from the EC numbers in the roles.
+"""
+
+
+def make_reactions():
+    """A few reactions with EC numbers"""
+    ecs = {'rxn00001': {'1.1.1.1'}, 'rxn00002': {'1.1.1.2', '2.7.1.1'}, 'rxn00003': {'1.2.3.4'},
+           'rxn00004': {'1.2.-.-'}, 'rxn00005': set(), 'rxn00006': {'1.10.1.1'}}
+    reactions = {}
+    for rid, ec in ecs.items():
+        reactions[rid] = PyFBA.metabolism.Reaction(rid)
+        reactions[rid].ec_numbers = ec
+    return reactions
+
+
+class TestECNumbers(unittest.TestCase):
+
+    def setUp(self):
+        self.reactions = make_reactions()
+        self.index = ECIndex.from_reactions(self.reactions)
+
+    def test_exact(self):
+        """Complete EC numbers only match those EC numbers"""
+        self.assertEqual(self.index.reactions('1.1.1.1'), {'rxn00001'})
+        self.assertEqual(self.index.reactions('2.7.1.1'), {'rxn00002'})
+        self.assertEqual(self.index.reactions('9.9.9.9'), set())
+        self.assertNotIn('9.9.9.9', self.index)
+
+    def test_wildcards(self):
+        """Partial EC numbers match every reaction below them in the trie"""
+        self.assertEqual(self.index.reactions('1.1.1.-'), {'rxn00001', 'rxn00002'})
+        self.assertEqual(self.index.reactions('1.2.-.-'), {'rxn00003', 'rxn00004'})
+        self.assertEqual(self.index.reactions('1.-.-.-'),
+                         {'rxn00001', 'rxn00002', 'rxn00003', 'rxn00004', 'rxn00006'})
+        # 1.1 is not a prefix of 1.10
+        self.assertNotIn('rxn00006', self.index.reactions('1.1.-.-'))
+        self.assertEqual(self.index.reactions('3.-.-.-'), set())
+
+    def test_reactions_is_a_copy(self):
+        """Changing the set we get back does not change the index"""
+        self.index.reactions('1.1.1.1').add('rxn99999')
+        self.index.reactions('1.1.-.-').add('rxn99999')
+        self.assertEqual(self.index.reactions('1.1.-.-'), {'rxn00001', 'rxn00002'})
+
+    def test_suggest(self):
+        """Suggest the reactions for EC numbers in the roles that we are not already running"""
+        roles = {'Alcohol dehydrogenase (EC 1.1.1.1)', 'Hexokinase (EC 2.7.1.1) / something (EC 1.2.-.-)',
+                 'hypothetical protein', 'Unknown (EC 5.5.5.5)'}
+        suggested = suggest_reactions_using_ec(roles, self.reactions, {'rxn00001'}, ec_index=self.index)
+        self.assertEqual(suggested, {'rxn00002', 'rxn00003', 'rxn00004'})
+        # without an index we build one
+        self.assertEqual(suggest_reactions_using_ec(roles, self.reactions, {'rxn00001'}), suggested)
+        # reactions that are in the index but not in the reactions are not suggested
+        del self.reactions['rxn00003']
+        self.assertEqual(suggest_reactions_using_ec(roles, self.reactions, set(), ec_index=self.index),
+                         {'rxn00001', 'rxn00002', 'rxn00004'})
+
+    def test_reactions_file(self):
+        """Without an index, and reactions without EC numbers, we read the EC numbers from the reactions file"""
+        msd = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, msd)
+        with open(os.path.join(msd, 'reactions.tsv'), 'w') as out:
+            out.write("id\t" + "\t".join("col{}".format(i) for i in range(1, 14)) + "\n")
+            for rid, ecs in [('rxn00001', '1.1.1.1'), ('rxn00002', '1.1.1.2;2.7.1.1'), ('rxn00005', 'null')]:
+                out.write(rid + "\t" + "\t".join(["x"] * 12) + "\t" + ecs + "\n")
+        reactions = {rid: PyFBA.metabolism.Reaction(rid) for rid in ['rxn00001', 'rxn00002', 'rxn00005']}
+        roles = {'Alcohol dehydrogenase (EC 1.1.1.1)', 'Hexokinase (EC 2.7.1.1)'}
+        with mock.patch.dict(os.environ, {'ModelSEEDDatabase': msd}):
+            self.assertEqual(suggest_reactions_using_ec(roles, reactions, set(), 'reactions.tsv'),
+                             {'rxn00001', 'rxn00002'})
+            self.assertEqual(suggest_reactions_using_ec(roles, reactions, set(), 'missing.tsv'), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import PyFBA
+
+"""
+Test parsing formulas, calculating molecular weights, and checking the balance of reactions
+"""
+
+
+class TestFormula(unittest.TestCase):
+
+    def compound(self, name, formula, charge=0):
+        """Make a compound with a formula and charge"""
+        c = PyFBA.metabolism.Compound(name, 'c')
+        c.formula = formula
+        c.charge = charge
+        return c
+
+    def reaction(self, name, left, right):
+        """Make a reaction from dicts of compounds and their abundances"""
+        r = PyFBA.metabolism.Reaction(name)
+        r.add_left_compounds(set(left))
+        for c, q in left.items():
+            r.set_left_compound_abundance(c, q)
+        r.add_right_compounds(set(right))
+        for c, q in right.items():
+            r.set_right_compound_abundance(c, q)
+        return r
+
+    def test_parse_formula(self):
+        """Test parsing formulas, including brackets and R groups"""
+        self.assertEqual(PyFBA.metabolism.parse_formula('C6H12O6'), {'C': 6, 'H': 12, 'O': 6})
+        self.assertEqual(PyFBA.metabolism.parse_formula('Ca(OH)2'), {'Ca': 1, 'O': 2, 'H': 2})
+        self.assertEqual(PyFBA.metabolism.parse_formula('C5H7O4R'), {'C': 5, 'H': 7, 'O': 4, 'R': 1})
+        # we get a new dict each time
+        PyFBA.metabolism.parse_formula('H2O')['H'] = 3
+        self.assertEqual(PyFBA.metabolism.parse_formula('H2O'), {'H': 2, 'O': 1})
+        for bad in ['', 'C6H12O6)', '(C6H10O5)n', 'c6']:
+            self.assertRaises(ValueError, PyFBA.metabolism.parse_formula, bad)
+
+    def test_molecular_weight(self):
+        """Test the molecular weight of formulas and compounds"""
+        self.assertAlmostEqual(PyFBA.metabolism.molecular_weight('H2O'), 18.015)
+        self.assertAlmostEqual(self.compound('glucose', 'C6H12O6').calculate_molecular_weight(), 180.156)
+        self.assertRaises(ValueError, self.compound('acyl', 'C5H7O4R').calculate_molecular_weight)
+        self.assertRaises(ValueError, self.compound('unknown', None).calculate_molecular_weight)
+
+    def test_balance_report(self):
+        """Test the mass and charge balance of reactions"""
+        h2o = self.compound('H2O', 'H2O')
+        ppi = self.compound('PPi', 'HO7P2', -3)
+        pi = self.compound('Phosphate', 'HO4P', -2)
+        h = self.compound('H+', 'H', 1)
+        ppase = self.reaction('ppase', {h2o: 1, ppi: 1}, {pi: 2, h: 1})
+        no_proton = self.reaction('no_proton', {h2o: 1, ppi: 1}, {pi: 2})
+        unknown = self.reaction('unknown', {h2o: 1}, {self.compound('X', None): 1})
+        report = PyFBA.metabolism.balance_report([ppase, no_proton, unknown])
+        self.assertEqual(report['ppase'], {'elements': {}, 'mass': 0.0, 'charge': 0.0})
+        self.assertEqual(report['no_proton']['elements'], {'H': -1.0})
+        self.assertAlmostEqual(report['no_proton']['mass'], -1.008)
+        self.assertEqual(report['no_proton']['charge'], -1.0)
+        self.assertIsNone(report['unknown']['elements'])
+        self.assertIsNone(report['unknown']['mass'])
+
+        # charges read from files may be strings, and a charge that we can not parse is unknown
+        ppi.charge = '-3'
+        pi.charge = 'not a charge'
+        report = PyFBA.metabolism.balance_report([ppase, self.reaction('water', {h2o: 1, ppi: 1}, {h2o: 1, ppi: 1})])
+        self.assertIsNone(report['ppase']['charge'])
+        self.assertEqual(report['water']['charge'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
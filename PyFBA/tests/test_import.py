@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import unittest
+
+"""
+Test that importing PyFBA is cheap and does not need the Model SEED database. Each test runs in a new
+interpreter so that the modules imported by other tests do not interfere.
+"""
+
+
+def run_python(code):
+    """Run some code in a new interpreter without the ModelSEEDDatabase variable and return stdout"""
+    env = dict(os.environ)
+    env.pop('ModelSEEDDatabase', None)
+    pkgdir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join([pkgdir] + ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+    proc = subprocess.run([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    if proc.returncode != 0:
+        raise AssertionError(proc.stderr)
+    return proc.stdout.strip()
+
+
+class TestImport(unittest.TestCase):
+
+    def test_import_is_lazy(self):
+        """Importing PyFBA should not import any of the subpackages"""
+        out = run_python("import sys, PyFBA; print(sorted(m for m in sys.modules if m.startswith('PyFBA.')))")
+        self.assertEqual(out, "[]")
+
+    def test_subpackage_on_access(self):
+        """Accessing a subpackage imports just that subpackage"""
+        out = run_python("import sys, PyFBA; c = PyFBA.metabolism.Compound('x', 'c'); "
+                         "print('PyFBA.metabolism' in sys.modules, 'PyFBA.fba' in sys.modules, str(c))")
+        self.assertEqual(out, "True False x (location: c)")
+
+    def test_model_seed_without_database(self):
+        """We can import the model seed parser without the database, and get an error when we use it"""
+        out = run_python("import PyFBA\n"
+                         "try:\n"
+                         "    PyFBA.parse.model_seed.compounds()\n"
+                         "except IOError as e:\n"
+                         "    print('IOError')\n")
+        self.assertEqual(out, "IOError")
+
+    def test_unknown_attribute(self):
+        """Unknown attributes still raise an AttributeError"""
+        out = run_python("import PyFBA; print(hasattr(PyFBA, 'not_a_module'), hasattr(PyFBA.parse, 'not_a_parser'))")
+        self.assertEqual(out, "False False")
+
+
+if __name__ == '__main__':
+    unittest.main()
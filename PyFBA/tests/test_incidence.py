@@ -0,0 +1,102 @@
+import unittest
+import PyFBA
+
+"""
+Test the incidence index of compounds and reactions
+"""
+
+
+class TestIncidence(unittest.TestCase):
+
+    def setUp(self):
+        """Make a small chain of reactions a -> b -> c -> d, where h is in every reaction"""
+        self.cpds = {n: PyFBA.metabolism.Compound(n, 'c') for n in ['a', 'b', 'c', 'd', 'h']}
+        self.reactions = {}
+        for i, (left, right) in enumerate([('a', 'b'), ('b', 'c'), ('c', 'd')]):
+            r = PyFBA.metabolism.Reaction('rxn0000{}'.format(i + 1))
+            r.add_left_compounds({self.cpds[left], self.cpds['h']})
+            r.add_right_compounds({self.cpds[right]})
+            for c in r.left_compounds:
+                r.set_left_compound_abundance(c, 1)
+            r.set_right_compound_abundance(self.cpds[right], 1)
+            self.reactions[r.name] = r
+        self.index = PyFBA.metabolism.IncidenceIndex.from_reactions(self.reactions)
+
+    def test_degree(self):
+        """The number of reactions each compound is in"""
+        self.assertEqual(self.index.degree(self.cpds['h']), 3)
+        self.assertEqual(self.index.degree(self.cpds['b']), 2)
+        self.assertEqual(self.index.degree('a (location: c)'), 1)
+        self.assertEqual(self.index.degree(self.cpds['b'].id), 2)
+        self.assertEqual(self.index.degree(PyFBA.metabolism.Compound('x', 'c')), 0)
+
+    def test_degrees(self):
+        """The number of reactions each compound is in, counting only some reactions"""
+        degrees = dict(zip(self.index.compound_keys, self.index.degrees()))
+        self.assertEqual(degrees, {'a (location: c)': 1, 'b (location: c)': 2, 'c (location: c)': 2,
+                                   'd (location: c)': 1, 'h (location: c)': 3})
+        degrees = dict(zip(self.index.compound_keys, self.index.degrees({'rxn00001', 'rxn99999'})))
+        self.assertEqual(degrees, {'a (location: c)': 1, 'b (location: c)': 1, 'c (location: c)': 0,
+                                   'd (location: c)': 0, 'h (location: c)': 1})
+        self.assertEqual(self.index.common_compounds(2), {'h (location: c)'})
+
+    def test_compounds_and_reactions(self):
+        """The compounds in reactions and the reactions of compounds"""
+        self.assertEqual(self.index.compounds_of({'rxn00001'}), {'a (location: c)', 'b (location: c)',
+                                                                 'h (location: c)'})
+        self.assertEqual(self.index.reactions_of({self.cpds['c']}), {'rxn00002', 'rxn00003'})
+        self.assertEqual(self.index.reactions_of({self.cpds['a'], 'd (location: c)'}), {'rxn00001', 'rxn00003'})
+        self.assertEqual([self.index.compound_keys[i] for i in self.index.compound_rows_of('rxn00003')],
+                         ['c (location: c)', 'd (location: c)', 'h (location: c)'])
+        self.assertEqual(len(self.index.compound_rows_of('rxn99999')), 0)
+
+    def test_neighborhood(self):
+        """The reactions that share a compound, ignoring the common compounds"""
+        self.assertEqual(self.index.neighborhood({'rxn00001'}), {'rxn00002', 'rxn00003'})
+        self.assertEqual(self.index.neighborhood({'rxn00001'}, max_degree=2), {'rxn00002'})
+        self.assertEqual(self.index.neighborhood({'rxn00001', 'rxn00002'}, max_degree=2), {'rxn00003'})
+
+    def test_limit_reactions(self):
+        """Limiting suggestions by compound gives the same answer with and without a full index"""
+        run = {'rxn00001', 'rxn00002'}
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, run, {'rxn00003'}, 2),
+                         {'rxn00003'})
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, run, {'rxn00003'}, 1), set())
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, run, {'rxn00003'}, 2,
+                                                                   index=self.index), {'rxn00003'})
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, {'rxn00001'}, {'rxn00003'}, 2,
+                                                                   index=self.index), {'rxn00003'})
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, {'rxn00001'}, {'rxn00003'}, 1,
+                                                                   index=self.index), set())
+
+    def test_reactions_added_later(self):
+        """Reactions that are added after the index was built are counted"""
+        e = PyFBA.metabolism.Compound('e', 'c')
+        r = PyFBA.metabolism.Reaction('UPTAKE_d')
+        r.add_left_compounds({self.cpds['d'], e})
+        r.set_left_compound_abundance(self.cpds['d'], 1)
+        r.set_left_compound_abundance(e, 1)
+        self.reactions[r.name] = r
+        compounds = {str(c): c for c in list(self.cpds.values()) + [e]}
+        # the reactions that the compounds are in, in the biochemistry
+        self.cpds['d'].add_reactions({'rxn00002', 'rxn00003', 'UPTAKE_d'})
+        e.add_reactions({'rxn00001', 'UPTAKE_d'})
+
+        index = self.index.with_reactions(self.reactions)
+        self.assertEqual(index.reaction_ids[:3], self.index.reaction_ids)
+        self.assertEqual(index.degree(self.cpds['d']), 2)
+        self.assertEqual(index.degree(e), 1)
+        self.assertEqual(index.reactions_of({e}), {'UPTAKE_d'})
+        self.assertIs(index.including(self.reactions, {'UPTAKE_d'}), index)
+
+        run = {'rxn00003', 'UPTAKE_d'}
+        self.assertEqual(PyFBA.gapfill.suggest_by_compound(compounds, self.reactions, run, 1, index=self.index),
+                         {'rxn00001'})
+        self.assertEqual(PyFBA.gapfill.suggest_by_compound(compounds, self.reactions, run, 1), {'rxn00001'})
+        self.assertEqual(PyFBA.gapfill.limit_reactions_by_compound(self.reactions, run, {'rxn00002'}, 2,
+                                                                   index=self.index),
+                         PyFBA.gapfill.limit_reactions_by_compound(self.reactions, run, {'rxn00002'}, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
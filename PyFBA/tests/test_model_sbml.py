@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import PyFBA
+
+"""
+Test writing a model to SBML and reading it back. We build the models from scratch so we do not need the
+Model SEED database.
+"""
+
+
+def build_model(nreactions=10, gapfilled_every=4):
+    """
+    Build a model with a chain of reactions, some of them gap-filled, and a biomass reaction.
+
+    :param nreactions: The number of reactions
+    :type nreactions: int
+    :param gapfilled_every: Every nth reaction was gap-filled
+    :type gapfilled_every: int
+    :rtype: PyFBA.model.Model
+    """
+    model = PyFBA.model.Model('test_model', 'A test model & friends', 'gramnegative')
+    cpds = []
+    for i in range(nreactions + 1):
+        c = PyFBA.metabolism.Compound('Compound <{}>'.format(i), 'c' if i % 3 else 'e')
+        c.model_seed_id = 'cpd{:05d}'.format(i)
+        c.formula = 'C{}H{}'.format(i, 2 * i)
+        c.charge = i % 3 - 1
+        c.uptake_secretion = c.location == 'e'
+        cpds.append(c)
+    rxns = set()
+    for i in range(nreactions):
+        r = PyFBA.metabolism.Reaction('rxn{:05d}'.format(i))
+        r.add_left_compounds({cpds[i]})
+        r.set_left_compound_abundance(cpds[i], 1)
+        r.add_right_compounds({cpds[i + 1]})
+        r.set_right_compound_abundance(cpds[i + 1], 0.5 + i)
+        r.set_direction('=' if i % 2 else '>')
+        r.lower_bound = -1000.0 if i % 2 else 0.0
+        r.upper_bound = 1000.0
+        r.deltaG = -0.1 * i
+        r.enzymes = {'cpx{:05d}'.format(i)}
+        r.is_transport = cpds[i].location != cpds[i + 1].location
+        if i % gapfilled_every == 0:
+            r.is_gapfilled = True
+            r.gapfill_method = 'media'
+            model.gf_reactions.add(r.name)
+        rxns.add(r)
+    model.add_reactions(rxns)
+    model.add_roles({'Role one; with (EC 1.1.1.1)': {'rxn00000', 'rxn00001'}, 'Role two': {'rxn00002'}})
+    model.gapfilled_media.add('ArgonneLB.txt')
+
+    biomass = PyFBA.metabolism.Reaction('BIOMASS_EQN')
+    biomass.add_left_compounds({cpds[-1]})
+    biomass.set_left_compound_abundance(cpds[-1], 0.25)
+    biomass.set_direction('>')
+    biomass.is_biomass_reaction = True
+    model.set_biomass_reaction(biomass)
+    return model
+
+
+class TestModelSBML(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sbmlf = os.path.join(self.dir, 'model.sbml')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def assertSameModel(self, model, loaded):
+        """The loaded model has the same reactions, compounds, and gap-fill information"""
+        self.assertEqual(loaded.id, model.id)
+        self.assertEqual(loaded.name, model.name)
+        self.assertEqual(loaded.organism_type, model.organism_type)
+        self.assertEqual(loaded.roles, model.roles)
+        self.assertEqual(loaded.gapfilled_media, model.gapfilled_media)
+        self.assertEqual(loaded.gf_reactions, model.gf_reactions)
+        self.assertEqual(set(loaded.reactions), set(model.reactions))
+        self.assertEqual(set(loaded.compounds), set(model.compounds))
+        for rid, r in model.reactions.items():
+            lr = loaded.reactions[rid]
+            self.assertEqual(lr.left_abundance, r.left_abundance)
+            self.assertEqual(lr.right_abundance, r.right_abundance)
+            self.assertEqual(lr.equation, r.equation)
+            for att in ['direction', 'lower_bound', 'upper_bound', 'deltaG', 'enzymes', 'is_transport',
+                        'is_gapfilled', 'gapfill_method']:
+                self.assertEqual(getattr(lr, att), getattr(r, att), "{} of {}".format(att, rid))
+        for name, c in model.compounds.items():
+            lc = loaded.compounds[name]
+            for att in ['location', 'model_seed_id', 'formula', 'charge', 'uptake_secretion']:
+                self.assertEqual(getattr(lc, att), getattr(c, att), "{} of {}".format(att, name))
+        self.assertEqual(loaded.biomass_reaction.name, model.biomass_reaction.name)
+        self.assertEqual(loaded.biomass_reaction.left_abundance, model.biomass_reaction.left_abundance)
+
+    def test_round_trip(self):
+        """Write a model to SBML and read it back"""
+        model = build_model()
+        model.to_sbml(self.sbmlf)
+        self.assertSameModel(model, PyFBA.model.read_sbml(self.sbmlf))
+
+    def test_other_readers(self):
+        """The SBML file can be read by the streaming SBML parser"""
+        model = build_model()
+        model.to_sbml(self.sbmlf)
+        sbml = PyFBA.parse.stream_sbml_file(self.sbmlf)
+        self.assertEqual(set(sbml.reactions), set(model.reactions) | {'biomass_equation'})
+
+    def test_duplicate_reactions(self):
+        """Reactions with the same stoichiometry but different names are both kept in the model"""
+        model = build_model()
+        r = model.reactions['rxn00001']
+        dup = PyFBA.metabolism.Reaction('rxn99999')
+        dup.add_left_compounds(set(r.left_compounds))
+        dup.left_abundance = dict(r.left_abundance)
+        dup.add_right_compounds(set(r.right_compounds))
+        dup.right_abundance = dict(r.right_abundance)
+        dup.set_direction('>')
+        self.assertEqual(dup, r)
+        model.add_reactions({dup})
+        self.assertIn('rxn99999', model.reactions)
+        model.to_sbml(self.sbmlf)
+        loaded = PyFBA.model.read_sbml(self.sbmlf)
+        self.assertSameModel(model, loaded)
+
+    def test_large_gapfilled_model(self):
+        """Round trip a large gap-filled model, and check that it is quick"""
+        model = build_model(nreactions=5000, gapfilled_every=3)
+        start = time.time()
+        model.to_sbml(self.sbmlf)
+        loaded = PyFBA.model.read_sbml(self.sbmlf)
+        elapsed = time.time() - start
+        self.assertSameModel(model, loaded)
+        self.assertEqual(len(loaded.gf_reactions), 1667)
+        # this takes well under a second, but give slow test machines plenty of room
+        self.assertLess(elapsed, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
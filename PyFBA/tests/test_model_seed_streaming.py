@@ -0,0 +1,164 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+
+"""
+Test the streaming json parser for the model seed biochemistry. We write a tiny biochemistry in the same format
+as the Model SEED Database so these tests do not need the real database.
+"""
+
+COMPOUNDS = {
+    "cpd00001": {"id": "cpd00001", "name": "H2O", "abbreviation": "h2o", "formula": "H2O", "charge": 0,
+                 "mass": 18.0, "aliases": "null"},
+    "cpd00009": {"id": "cpd00009", "name": "Phosphate", "abbreviation": "pi", "formula": "HO4P", "charge": -2,
+                 "mass": 95.0, "aliases": "null"},
+    "cpd00012": {"id": "cpd00012", "name": "PPi", "abbreviation": "ppi", "formula": "HO7P2", "charge": -3,
+                 "mass": 175.0, "aliases": "null"},
+    "cpd00067": {"id": "cpd00067", "name": "H+", "abbreviation": "h", "formula": "H", "charge": 1,
+                 "mass": 1.0, "aliases": "null"},
+}
+
+REACTIONS = {
+    "rxn00001": {"id": "rxn00001", "equation": "(1) cpd00001[0] + (1) cpd00012[0] <=> (2) cpd00009[0] + (1) cpd00067[0]",
+                 "stoichiometry": "-1:cpd00001:0:0:\"H2O\";-1:cpd00012:0:0:\"PPi\";2:cpd00009:0:0:\"Phosphate\";"
+                                  "1:cpd00067:0:0:\"H+\"",
+                 "direction": "=", "deltag": "-3.46", "deltagerr": "0.05", "is_transport": 0,
+                 "aliases": "KEGG: R00004"},
+    "rxn05145": {"id": "rxn05145", "equation": "(1) cpd00009[1] + (1) cpd00067[1] => (1) cpd00009[0] + (1) cpd00067[0]",
+                 "stoichiometry": "null", "direction": ">", "deltag": "null", "deltagerr": "null", "is_transport": 1, "aliases": "null"},
+}
+
+# the model seed has a value for every one of these keys, even if it is null
+for c in COMPOUNDS:
+    for k in ["abbreviation", "abstract_compound", "aliases", "charge", "comprised_of", "deltag", "deltagerr",
+              "formula", "id", "inchikey", "is_cofactor", "is_core", "is_obsolete", "linked_compound", "mass",
+              "name", "pka", "pkb", "smiles", "source"]:
+        COMPOUNDS[c].setdefault(k, "null")
+
+
+class TestModelSeedStreaming(unittest.TestCase):
+
+    def setUp(self):
+        """Write the tiny biochemistry and point ModelSEEDDatabase at it"""
+        self.msd = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.msd, 'Biochemistry'))
+        with open(os.path.join(self.msd, 'Biochemistry', 'compounds.json'), 'w') as out:
+            json.dump(COMPOUNDS, out, indent=2)
+        with open(os.path.join(self.msd, 'Biochemistry', 'reactions.json'), 'w') as out:
+            json.dump(REACTIONS, out, indent=2)
+        self.oldmsd = os.environ.get('ModelSEEDDatabase')
+        os.environ['ModelSEEDDatabase'] = self.msd
+
+    def tearDown(self):
+        if self.oldmsd is None:
+            os.environ.pop('ModelSEEDDatabase')
+        else:
+            os.environ['ModelSEEDDatabase'] = self.oldmsd
+        shutil.rmtree(self.msd)
+
+    def test_iter_json_records(self):
+        """Test decoding records across chunk boundaries"""
+        cf = os.path.join(self.msd, 'Biochemistry', 'compounds.json')
+        for chunk_size in [1, 7, 64, 65536]:
+            records = list(PyFBA.parse.model_seed.iter_json_records(cf, chunk_size=chunk_size))
+            self.assertEqual(records, list(COMPOUNDS.items()))
+
+    def test_iter_json_list(self):
+        """Test decoding a list of records rather than a dict"""
+        lf = os.path.join(self.msd, 'list.json')
+        with open(lf, 'w') as out:
+            json.dump(list(REACTIONS.values()), out)
+        records = list(PyFBA.parse.model_seed.iter_json_records(lf, chunk_size=5))
+        self.assertEqual([r[0] for r in records], list(REACTIONS.keys()))
+
+    def test_streaming_compounds(self):
+        """Streaming the compounds gives the same compounds as loading the whole file"""
+        cpds = PyFBA.parse.model_seed.compounds()
+        scpds = PyFBA.parse.model_seed.compounds(stream=True)
+        self.assertEqual(set(cpds.keys()), set(scpds.keys()))
+        self.assertEqual(len(scpds), 8)
+        pcpds = PyFBA.parse.model_seed.compounds(stream=True, predicate={'cpd00001'})
+        self.assertEqual(set(pcpds.keys()), {'H2O (location: c)', 'H2O (location: e)'})
+
+    def test_streaming_reactions(self):
+        """Streaming the reactions gives the same reactions as loading the whole file"""
+        cpds, rxns = PyFBA.parse.model_seed.reactions()
+        scpds, srxns = PyFBA.parse.model_seed.reactions(stream=True)
+        self.assertEqual(set(rxns.keys()), set(srxns.keys()))
+        for r in rxns:
+            self.assertEqual(rxns[r].equation, srxns[r].equation)
+            self.assertEqual(rxns[r].direction, srxns[r].direction)
+            self.assertEqual(rxns[r].deltaG, srxns[r].deltaG)
+            self.assertEqual(rxns[r].left_abundance, srxns[r].left_abundance)
+            self.assertEqual(rxns[r].right_abundance, srxns[r].right_abundance)
+        self.assertTrue(srxns['rxn05145'].is_transport)
+        self.assertEqual(srxns['rxn00001'].deltaG, -3.46)
+
+    def test_reaction_predicate(self):
+        """Only the reactions (and compounds) that pass the predicate are created"""
+        cpds, rxns = PyFBA.parse.model_seed.reactions(stream=True, predicate={'rxn00001'})
+        self.assertEqual(set(rxns.keys()), {'rxn00001'})
+        self.assertIn('PPi (location: c)', cpds)
+        cpds, rxns = PyFBA.parse.model_seed.reactions(predicate=lambda x: x.endswith('45'))
+        self.assertEqual(set(rxns.keys()), {'rxn05145'})
+        self.assertNotIn('PPi (location: c)', cpds)
+
+    def test_stoichiometry(self):
+        """Parse the stoichiometry strings and lists, and fall back to the equation"""
+        st = PyFBA.parse.model_seed._stoichiometry(REACTIONS['rxn00001']['stoichiometry'])
+        self.assertEqual(st, [(-1.0, 'cpd00001', '0'), (-1.0, 'cpd00012', '0'), (2.0, 'cpd00009', '0'),
+                              (1.0, 'cpd00067', '0')])
+        self.assertEqual(st, PyFBA.parse.model_seed._stoichiometry(None, REACTIONS['rxn00001']['equation']))
+        self.assertEqual(PyFBA.parse.model_seed._stoichiometry([{"coefficient": -0.5, "compound": "cpd00001",
+                                                                 "compartment": 1}]), [(-0.5, 'cpd00001', '1')])
+        self.assertIsNone(PyFBA.parse.model_seed._stoichiometry("null", "cpd00001"))
+
+    def test_reaction_equation(self):
+        """The equation is rendered from the stoichiometry with the compound names"""
+        cpds, rxns = PyFBA.parse.model_seed.reactions()
+        self.assertIsNone(rxns['rxn00001'].explicit_equation)
+        self.assertEqual(rxns['rxn00001'].equation, "(1) H2O[c] + (1) PPi[c] <=> (2) Phosphate[c] + (1) H+[c]")
+        self.assertEqual(rxns['rxn05145'].equation, "(1) Phosphate[e] + (1) H+[e] <=> (1) Phosphate[c] + (1) H+[c]")
+
+    def write_templates(self):
+        """Write a template for gram negative and gram positive organisms that change rxn00001"""
+        for template, direction, enzymes in [('GramNegative', '>', 'cpx00001|cpx00002'),
+                                             ('GramPositive', '<', 'cpx00003')]:
+            os.makedirs(os.path.join(self.msd, 'Templates', template))
+            with open(os.path.join(self.msd, 'Templates', template, 'Reactions.tsv'), 'w') as out:
+                out.write("id\tcompartment\tdirection\tgfdir\ttype\tbase_cost\tforward_cost\treverse_cost\t"
+                          "complexes\n")
+                out.write("rxn00001\tc\t{}\t=\tconditional\t0\t0\t0\t{}\n".format(direction, enzymes))
+
+    def test_template_reactions(self):
+        """The template changes the direction and enzymes for that organism without changing the shared reactions"""
+        self.write_templates()
+        self.assertEqual(PyFBA.parse.model_seed.template_reactions('gram_negative'),
+                         {'rxn00001': {'direction': '>', 'enzymes': {'cpx00001', 'cpx00002'}}})
+        cpds, rxns = PyFBA.parse.model_seed.reactions()
+        gneg = PyFBA.parse.model_seed.TemplateReactions(rxns, 'gram_negative')
+        gpos = PyFBA.parse.model_seed.TemplateReactions(rxns, 'GramPositive')
+        self.assertEqual(len(gneg), len(rxns))
+        self.assertEqual(gneg['rxn00001'].direction, '>')
+        self.assertEqual(gneg['rxn00001'].enzymes, {'cpx00001', 'cpx00002'})
+        self.assertIs(gneg['rxn00001'], gneg['rxn00001'])
+        self.assertEqual(gpos['rxn00001'].direction, '<')
+        self.assertEqual(gpos['rxn00001'].enzymes, {'cpx00003'})
+        self.assertEqual(rxns['rxn00001'].direction, '=')
+        self.assertEqual(rxns['rxn00001'].enzymes, set())
+        # the reactions that are not in the template are shared
+        self.assertIs(gneg['rxn05145'], rxns['rxn05145'])
+        # and parsing for one organism gives the same reactions
+        cpds, grxns = PyFBA.parse.model_seed.reactions('gram_negative')
+        self.assertEqual(grxns['rxn00001'].direction, '>')
+        self.assertEqual(grxns['rxn00001'].enzymes, {'cpx00001', 'cpx00002'})
+        with self.assertRaises(NotImplementedError):
+            PyFBA.parse.model_seed.TemplateReactions(rxns, 'archaea')
+
+
+if __name__ == '__main__':
+    unittest.main()
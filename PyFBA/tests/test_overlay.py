@@ -0,0 +1,152 @@
+import copy
+import pickle
+import unittest
+import PyFBA
+
+"""
+Test the per-model overlays of shared reactions
+"""
+
+
+class TestOverlay(unittest.TestCase):
+
+    def setUp(self):
+        """Make some shared reactions"""
+        self.a = PyFBA.metabolism.Compound('a', 'c')
+        self.b = PyFBA.metabolism.Compound('b', 'c')
+        r = PyFBA.metabolism.Reaction('rxn00001')
+        r.add_left_compounds({self.a})
+        r.set_left_compound_abundance(self.a, 1)
+        r.add_right_compounds({self.b})
+        r.set_right_compound_abundance(self.b, 1)
+        r.direction = '='
+        r.add_enzymes({'cpx00001'})
+        self.shared = {'rxn00001': r, 'rxn00002': PyFBA.metabolism.Reaction('rxn00002')}
+
+    def test_read_through(self):
+        """The overlay reactions read the fields that are not set from the shared reactions"""
+        reactions = PyFBA.metabolism.ReactionOverlay(self.shared)
+        r = reactions['rxn00001']
+        self.assertIsInstance(r, PyFBA.metabolism.Reaction)
+        self.assertIs(r.base, self.shared['rxn00001'])
+        self.assertIs(reactions['rxn00001'], r)
+        self.assertEqual(r.name, 'rxn00001')
+        self.assertEqual(r.direction, '=')
+        self.assertEqual(r.left_compounds, {self.a})
+        self.assertEqual(r, self.shared['rxn00001'])
+        self.assertEqual(hash(r), hash(self.shared['rxn00001']))
+        self.assertEqual(reactions.overrides(), {})
+
+    def test_changes_are_per_model(self):
+        """Changes to the overlay reactions are not seen in the shared reactions or in other overlays"""
+        reactions = PyFBA.metabolism.ReactionOverlay(self.shared)
+        other = PyFBA.metabolism.ReactionOverlay(self.shared)
+        r = reactions['rxn00001']
+        r.is_gapfilled = True
+        r.gapfill_method = 'media'
+        r.pLR = 0.5
+        r.add_enzymes({'cpx00002'})
+        r.reverse_reaction()
+        self.assertTrue(r.is_gapfilled)
+        self.assertEqual(r.enzymes, {'cpx00001', 'cpx00002'})
+        self.assertEqual(r.direction, '=')
+        self.assertEqual(r.left_compounds, {self.b})
+        self.assertEqual(r.pRL, 0.5)
+        self.assertFalse(self.shared['rxn00001'].is_gapfilled)
+        self.assertEqual(self.shared['rxn00001'].enzymes, {'cpx00001'})
+        self.assertEqual(self.shared['rxn00001'].left_compounds, {self.a})
+        self.assertEqual(self.shared['rxn00001'].pRL, 0)
+        self.assertFalse(other['rxn00001'].is_gapfilled)
+        self.assertEqual(set(reactions.overrides()['rxn00001']),
+                         {'_left_compounds', '_right_compounds', '_left_abundance', '_right_abundance', 'inp',
+                          'outp', 'pLR', 'pRL', 'deltaG', '_enzymes', 'is_gapfilled', 'gapfill_method'})
+
+    def test_reverse_then_add(self):
+        """Adding to a reversed overlay reaction does not change the shared reaction"""
+        shared = self.shared['rxn00001']
+        equation = shared.equation
+        r = PyFBA.metabolism.ReactionOverlay(self.shared)['rxn00001']
+        r.reverse_reaction()
+        x = PyFBA.metabolism.Compound('x', 'c')
+        r.add_right_compounds({x})
+        r.set_right_compound_abundance(x, 3)
+        r.set_left_compound_abundance(self.b, 2)
+        self.assertEqual(r.right_compounds, {self.a, x})
+        self.assertEqual(shared.equation, equation)
+        self.assertEqual(shared.left_compounds, {self.a})
+        self.assertEqual(shared.right_compounds, {self.b})
+        self.assertEqual(shared.right_abundance, {self.b: 1})
+
+    def test_reading_is_not_a_change(self):
+        """Reading the containers of an overlay reaction does not set them on the overlay"""
+        reactions = PyFBA.metabolism.ReactionOverlay(self.shared)
+        self.assertEqual(reactions['rxn00001'].enzymes, {'cpx00001'})
+        self.assertEqual(reactions['rxn00001'].pegs, set())
+        self.assertEqual(reactions['rxn00002'].ec_numbers, set())
+        self.assertEqual(reactions['rxn00002'].left_abundance, {})
+        self.assertEqual(reactions.overrides(), {})
+        self.assertIsNone(self.shared['rxn00002']._pegs)
+        reactions['rxn00002'].add_pegs({'fig|1.1.peg.1'})
+        self.assertEqual(reactions['rxn00002'].pegs, {'fig|1.1.peg.1'})
+        self.assertIsNone(self.shared['rxn00002']._pegs)
+
+    def test_add_and_remove(self):
+        """Reactions are only added to and removed from the overlay"""
+        reactions = PyFBA.metabolism.ReactionOverlay(self.shared)
+        reactions['UPTAKE'] = PyFBA.metabolism.Reaction('UPTAKE')
+        del reactions['rxn00002']
+        self.assertEqual(set(reactions), {'rxn00001', 'UPTAKE'})
+        self.assertEqual(len(reactions), 2)
+        self.assertNotIn('rxn00002', reactions)
+        self.assertRaises(KeyError, reactions.__getitem__, 'rxn00002')
+        self.assertEqual(set(self.shared), {'rxn00001', 'rxn00002'})
+        reactions.pop('UPTAKE')
+        self.assertEqual(set(reactions.keys()), {'rxn00001'})
+
+    def test_copy_and_pickle(self):
+        """Copying or pickling an overlay reaction gives a Reaction with the changes"""
+        r = PyFBA.metabolism.ReactionOverlay(self.shared)['rxn00001']
+        r.is_gapfilled = True
+        for c in [copy.copy(r), pickle.loads(pickle.dumps(r))]:
+            self.assertIs(type(c), PyFBA.metabolism.Reaction)
+            self.assertTrue(c.is_gapfilled)
+            self.assertEqual(c.enzymes, {'cpx00001'})
+            self.assertEqual(c.direction, '=')
+
+    def test_overlay_compound(self):
+        """Changes to an overlay compound are not seen in the shared compound"""
+        self.a.add_reactions({'rxn00001'})
+        c = PyFBA.metabolism.OverlayCompound(self.a)
+        self.assertIsInstance(c, PyFBA.metabolism.Compound)
+        self.assertEqual(c, self.a)
+        self.assertEqual(c.id, self.a.id)
+        self.assertEqual(c.reactions, {'rxn00001'})
+        c.add_reactions({'rxn00002'})
+        c.uptake_secretion = True
+        self.assertEqual(c.reactions, {'rxn00001', 'rxn00002'})
+        self.assertEqual(self.a.reactions, {'rxn00001'})
+        self.assertFalse(self.a.uptake_secretion)
+        copied = copy.copy(c)
+        self.assertIs(type(copied), PyFBA.metabolism.Compound)
+        self.assertTrue(copied.uptake_secretion)
+
+    def test_compound_overlay_reaction(self):
+        """The compounds are only wrapped the first time they are used, and the stoichiometry is shared"""
+        shared = self.shared['rxn00001']
+        stoichiometry = shared.stoichiometry()
+        r = PyFBA.metabolism.CompoundOverlayReaction(shared)
+        self.assertIs(r.stoichiometry(), stoichiometry)
+        self.assertFalse(r._is_set('_left_compounds'))
+        a = list(r.left_compounds)[0]
+        self.assertIsInstance(a, PyFBA.metabolism.OverlayCompound)
+        self.assertIs(a.base, self.a)
+        self.assertIs(r.stoichiometry(), stoichiometry)
+        self.assertEqual(r, shared)
+        a.add_reactions({'rxn99999'})
+        self.assertFalse(self.a.reactions)
+        r.set_left_compound_abundance(a, 2)
+        self.assertEqual(shared.get_left_compound_abundance(self.a), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+
+"""
+Test reading the functions from RAST annotations.
+"""
+
+FUNCTIONS = [("fig|83333.1.peg.1", "Thr operon leader peptide"),
+             ("fig|83333.1.peg.2", "Aspartokinase (EC 2.7.2.4) / Homoserine dehydrogenase (EC 1.1.1.3)"),
+             ("fig|83333.1.peg.3", "Homoserine kinase (EC 2.7.1.39) # a comment"),
+             ("fig|83333.1.peg.4", "Threonine synthase (EC 4.2.3.1)"),
+             ("fig|83333.1.peg.5", "Aspartokinase (EC 2.7.2.4) / Homoserine dehydrogenase (EC 1.1.1.3)")]
+
+
+class TestRAST(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        for genome, n in [('genome1', 5), ('genome2', 2)]:
+            with open(os.path.join(self.dir, genome), 'w') as out:
+                for peg, func in FUNCTIONS[:n]:
+                    out.write("{}\t{}\n".format(peg, func))
+        self.af = os.path.join(self.dir, 'genome1')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_roles_of_function(self):
+        """Split functions into their roles"""
+        self.assertEqual(PyFBA.parse.roles_of_function(FUNCTIONS[1][1]),
+                         {"Aspartokinase (EC 2.7.2.4)", "Homoserine dehydrogenase (EC 1.1.1.3)"})
+        self.assertEqual(PyFBA.parse.roles_of_function(FUNCTIONS[2][1]), {"Homoserine kinase (EC 2.7.1.39)"})
+        self.assertEqual(PyFBA.parse.roles_of_function("A ; B @ C"), {"A", "B", "C"})
+
+    def test_roles_of_function_is_not_shared(self):
+        """The roles are cached, but changing the set we get does not change the next one"""
+        roles = PyFBA.parse.roles_of_function(FUNCTIONS[0][1])
+        roles.add("Something else")
+        self.assertEqual(PyFBA.parse.roles_of_function(FUNCTIONS[0][1]), {FUNCTIONS[0][1]})
+
+    def test_stream_assigned_functions(self):
+        """Stream the assigned functions one peg at a time"""
+        functions = PyFBA.parse.stream_assigned_functions(self.af)
+        self.assertEqual(next(functions), ("fig|83333.1.peg.1", {"Thr operon leader peptide"}))
+        self.assertEqual(len(list(functions)), 4)
+        self.assertEqual(PyFBA.parse.read_assigned_functions(self.af),
+                         dict(PyFBA.parse.stream_assigned_functions(self.af)))
+        with self.assertRaises(IOError):
+            list(PyFBA.parse.stream_assigned_functions(os.path.join(self.dir, 'missing')))
+
+    def test_read_assigned_functions_directory(self):
+        """Read the roles of each genome in a directory"""
+        genomes = PyFBA.parse.read_assigned_functions_directory(self.dir, threads=2)
+        self.assertEqual(set(genomes), {'genome1', 'genome2'})
+        self.assertEqual(len(genomes['genome1']), 5)
+        self.assertEqual(genomes['genome2'], {"Thr operon leader peptide", "Aspartokinase (EC 2.7.2.4)",
+                                              "Homoserine dehydrogenase (EC 1.1.1.3)"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import copy
+import pickle
+import unittest
+import PyFBA
+
+"""
+Test the bitset sets of reaction ids
+"""
+
+
+class TestReactionSet(unittest.TestCase):
+
+    def setUp(self):
+        self.a = PyFBA.metabolism.ReactionSet({'rxn00001', 'rxn00002', 'rxn00003'})
+        self.b = PyFBA.metabolism.ReactionSet(['rxn00003', 'rxn00004'])
+
+    def test_set(self):
+        """A ReactionSet behaves like a frozenset of the reaction ids"""
+        self.assertEqual(len(self.a), 3)
+        self.assertIn('rxn00001', self.a)
+        self.assertNotIn('rxn00004', self.a)
+        self.assertNotIn('not a reaction we have seen', self.a)
+        self.assertEqual(self.a, {'rxn00001', 'rxn00002', 'rxn00003'})
+        self.assertEqual({'rxn00001', 'rxn00002', 'rxn00003'}, self.a)
+        self.assertNotEqual(self.a, self.b)
+        self.assertEqual(sorted(self.a), ['rxn00001', 'rxn00002', 'rxn00003'])
+        self.assertFalse(PyFBA.metabolism.ReactionSet())
+        self.assertEqual(PyFBA.metabolism.ReactionSet(self.a), self.a)
+
+    def test_operations(self):
+        """Union, intersection and difference with ReactionSets and other sets"""
+        self.assertEqual(self.a | self.b, {'rxn00001', 'rxn00002', 'rxn00003', 'rxn00004'})
+        self.assertEqual(self.a & self.b, {'rxn00003'})
+        self.assertEqual(self.a - self.b, {'rxn00001', 'rxn00002'})
+        self.assertEqual(self.a ^ self.b, {'rxn00001', 'rxn00002', 'rxn00004'})
+        self.assertIsInstance(self.a | {'rxn00005'}, PyFBA.metabolism.ReactionSet)
+        self.assertEqual({'rxn00005'} | self.a, {'rxn00001', 'rxn00002', 'rxn00003', 'rxn00005'})
+        self.assertEqual({'rxn00001', 'rxn00005'} - self.a, {'rxn00005'})
+        self.assertEqual(self.a.union(['rxn00004'], {'rxn00005'}),
+                         {'rxn00001', 'rxn00002', 'rxn00003', 'rxn00004', 'rxn00005'})
+        self.assertEqual(self.a.intersection(self.b, ['rxn00003']), {'rxn00003'})
+        self.assertEqual(self.a.difference(['rxn00001'], self.b), {'rxn00002'})
+        self.assertTrue(self.a.issuperset(['rxn00001']))
+        self.assertTrue((self.a & self.b).issubset(self.b))
+        self.assertTrue(self.a & self.b <= self.b)
+        self.assertTrue(self.a.isdisjoint({'rxn00004'}))
+        self.assertEqual(self.a, {'rxn00001', 'rxn00002', 'rxn00003'})
+
+    def test_hash(self):
+        """ReactionSets can be used as dict keys, and hash like frozensets of the same ids"""
+        same = PyFBA.metabolism.ReactionSet(['rxn00003', 'rxn00002', 'rxn00001'])
+        self.assertEqual(hash(same), hash(self.a))
+        self.assertEqual(hash(self.a), hash(frozenset(self.a)))
+        results = {self.a: True}
+        self.assertTrue(results[same])
+        self.assertTrue(results[frozenset(['rxn00001', 'rxn00002', 'rxn00003'])])
+
+    def test_copy_and_pickle(self):
+        """The sets are immutable, and are pickled as their reaction ids"""
+        self.assertIs(copy.copy(self.a), self.a)
+        self.assertEqual(pickle.loads(pickle.dumps(self.a)), self.a)
+
+    def test_mask(self):
+        """The columns of a matrix that are in the set"""
+        self.assertEqual(self.a.mask(['rxn00004', 'rxn00001', 'rxn00003', 'unknown']), bytes([0, 1, 1, 0]))
+        self.assertEqual(self.a.bits & self.b.bits, (self.a & self.b).bits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,35 @@ class TestReadMedia(unittest.TestCase):
         gluc = PyFBA.metabolism.Compound('D-Glucose', 'e')
         self.assertIn(gluc, media)
 
+    def test_media_library(self):
+        """Test reading all the media at once"""
+        if media_file_loc == "":
+            return
+        library = PyFBA.parse.MediaLibrary(media_file_loc)
+        self.assertIn('ArgonneLB.txt', library)
+        self.assertIn('ArgonneLB', library)
+        self.assertNotIn('NoSuchMedia', library)
+        self.assertEqual(library.compounds('ArgonneLB'),
+                         PyFBA.parse.read_media_file(os.path.join(media_file_loc, 'ArgonneLB.txt')))
+        self.assertIn('D-Glucose', library['ArgonneLB.txt'])
+
+    def test_media_library_sets(self):
+        """Test the matrix, core, and deltas of a panel of media"""
+        if media_file_loc == "":
+            return
+        library = PyFBA.parse.MediaLibrary(media_file_loc)
+        panel = ['MOPS_NoC_Adenosine.txt', 'MOPS_NoC_Cellobiose.txt', 'ArgonneLB.txt']
+        compounds, names, rows = library.matrix(panel)
+        self.assertEqual(names, panel)
+        self.assertEqual(compounds, library.all_compounds(panel))
+        for c, row in zip(compounds, rows):
+            self.assertEqual(list(row), [int(c in library[n]) for n in panel])
+        core = library.core(panel)
+        for n, delta in library.deltas(panel).items():
+            self.assertEqual(core | delta, library[n])
+            self.assertFalse(core & delta)
+        self.assertIn('Adenosine', library.deltas(panel)['MOPS_NoC_Adenosine.txt'])
+
 
 if __name__ == '__main__':
     unittest.main()
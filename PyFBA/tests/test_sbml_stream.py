@@ -0,0 +1,197 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import PyFBA
+
+"""
+Test the streaming SBML parser. We use a small SBML document, and the example model if it is available.
+"""
+
+SBML_DOC = """<?xml version="1.0" encoding="UTF-8"?>
+<sbml xmlns="http://www.sbml.org/sbml/level2" level="2" version="1" xmlns:html="http://www.w3.org/1999/xhtml">
+<model id="test_model" name="A test model">
+<listOfCompartments>
+<compartment id="c0" name="c0" />
+<compartment id="e0" name="e0" />
+</listOfCompartments>
+<listOfSpecies>
+<species id="cpd00001_c0" name="H2O_c0" compartment="c0" charge="0" boundaryCondition="false"/>
+<species id="cpd00009_c0" name="Phosphate_c0" compartment="c0" charge="-2" boundaryCondition="false"/>
+<species id="cpd00009_e0" name="Phosphate_e0" compartment="e0" charge="-2" boundaryCondition="true"/>
+</listOfSpecies>
+<listOfReactions>
+<reaction id="rxn00001_c0" name="pyrophosphatase_c0" reversible="true">
+<notes><html:p>GENE_ASSOCIATION:Unknown</html:p></notes>
+<listOfReactants>
+<speciesReference species="cpd00001_c0" stoichiometry="1"/>
+<speciesReference species="cpd00012_c0" stoichiometry="1"/>
+</listOfReactants>
+<listOfProducts>
+<speciesReference species="cpd00009_c0" stoichiometry="2"/>
+</listOfProducts>
+<kineticLaw>
+<listOfParameters>
+<parameter id="LOWER_BOUND" value="-1000"/>
+<parameter id="UPPER_BOUND" value="500"/>
+</listOfParameters>
+</kineticLaw>
+</reaction>
+<reaction id="rxn05145_c0" name="phosphate transport" reversible="false">
+<listOfReactants>
+<speciesReference species="cpd00009_e0" stoichiometry="1"/>
+</listOfReactants>
+<listOfProducts>
+<speciesReference species="cpd00009_c0" stoichiometry="1"/>
+</listOfProducts>
+</reaction>
+<reaction id="rxn90001_c0" name="phosphate transport, written backwards" reversible="true">
+<listOfReactants>
+<speciesReference species="cpd00009_c0" stoichiometry="1"/>
+</listOfReactants>
+<listOfProducts>
+<speciesReference species="cpd00009_e0" stoichiometry="1"/>
+</listOfProducts>
+</reaction>
+</listOfReactions>
+</model>
+</sbml>
+"""
+
+EXAMPLE = os.path.join(os.path.dirname(__file__), '..', '..', 'example_data', 'Citrobacter',
+                       'Citrobacter_sedlakii.sbml')
+
+
+class TestSBMLStream(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sbmlf = os.path.join(self.dir, 'test.sbml')
+        with open(self.sbmlf, 'w') as out:
+            out.write(SBML_DOC)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_stream_sbml(self):
+        """Parse the species and reactions"""
+        sbml = PyFBA.parse.stream_sbml_file(self.sbmlf)
+        self.assertEqual(sbml.model_id, 'test_model')
+        self.assertEqual(sbml.model_name, 'A test model')
+        self.assertEqual(sbml.compartment, {'c0': 'c0', 'e0': 'e0'})
+        # PPi is not in the species, so it is added when we read the reaction
+        self.assertEqual(set(sbml.compounds), {'H2O (location: c)', 'Phosphate (location: c)',
+                                               'Phosphate (location: e)', 'cpd00012 (location: c0)'})
+        self.assertTrue(sbml.get_a_compound_by_id('cpd00009_e0').uptake_secretion)
+        self.assertEqual(set(sbml.reactions), {'rxn00001', 'rxn05145', 'rxn90001'})
+        r = sbml.reactions['rxn00001']
+        self.assertEqual(r.direction, '=')
+        self.assertEqual(r.description, 'pyrophosphatase_c0')
+        self.assertEqual(r.lower_bound, -1000)
+        self.assertEqual(r.upper_bound, 500)
+        self.assertEqual(r.get_right_compound_abundance(sbml.get_a_compound_by_id('cpd00009_c0')), 2)
+        t = sbml.reactions['rxn05145']
+        self.assertEqual(t.direction, '>')
+        self.assertTrue(t.is_uptake_secretion)
+        self.assertEqual(t.equation, " (1) Phosphate (location: e) > " + " (1) Phosphate (location: c)")
+
+    def test_balance_report(self):
+        """The charges from the SBML species are numbers, so we can check the balance of the reactions"""
+        sbml = PyFBA.parse.stream_sbml_file(self.sbmlf)
+        self.assertEqual(sbml.get_a_compound_by_id('cpd00009_c0').charge, -2)
+        report = PyFBA.metabolism.balance_report(sbml.reactions)
+        self.assertEqual(report['rxn05145']['charge'], 0)
+        # PPi was not in the species, so it does not have a charge
+        self.assertEqual(report['rxn00001']['charge'], -4)
+
+    def test_duplicate_reactions(self):
+        """Reactions with the same stoichiometry are indexed by their signature"""
+        sbml = PyFBA.parse.stream_sbml_file(self.sbmlf)
+        self.assertEqual(len(sbml.reactions_by_signature), 2)
+        self.assertIs(sbml.get_a_reaction_by_signature(sbml.reactions['rxn90001']), sbml.reactions['rxn05145'])
+        self.assertRaises(ValueError, sbml.get_a_reaction_by_signature, PyFBA.metabolism.Reaction('empty'))
+
+    def largest_tree(self, sbml_file, every=1):
+        """
+        Parse a file with the streaming parser, and find the largest number of elements in the tree while it is
+        parsed.
+
+        :param sbml_file: The SBML file
+        :type sbml_file: str
+        :param every: Count the elements after this many events
+        :type every: int
+        :return: The SBML object and the largest number of elements
+        :rtype: SBML, int
+        """
+        iterparse = PyFBA.parse.SBML.etree.iterparse
+        sizes = [0]
+
+        def count_elements(*args, **kwargs):
+            root = None
+            for i, (event, elem) in enumerate(iterparse(*args, **kwargs)):
+                if root is None:
+                    root = elem
+                yield event, elem
+                if i % every == 0:
+                    sizes.append(sum(1 for _ in root.iter()))
+
+        with mock.patch.object(PyFBA.parse.SBML.etree, 'iterparse', count_elements):
+            sbml = PyFBA.parse.stream_sbml_file(sbml_file)
+        return sbml, max(sizes)
+
+    def test_tree_is_bounded(self):
+        """The species and reactions are removed from the tree once we have read them"""
+        start = SBML_DOC.index('<reaction id="rxn00001_c0"')
+        end = SBML_DOC.index('</reaction>', start) + len('</reaction>')
+        reactions = "\n".join(SBML_DOC[start:end].replace('rxn00001_c0', 'rxn{:05d}_c0'.format(i))
+                               for i in range(2000))
+        with open(self.sbmlf, 'w') as out:
+            out.write(SBML_DOC[:start] + reactions + SBML_DOC[end:])
+        sbml, largest = self.largest_tree(self.sbmlf, every=100)
+        self.assertEqual(len(sbml.reactions), 2002)
+        # the parser reads ahead, so the tree has the elements in the block it has read, but not the 26,000
+        # elements of the document
+        self.assertLess(largest, 1000)
+
+    def test_same_id(self):
+        """A later reaction with the same id replaces the earlier one"""
+        with open(self.sbmlf, 'w') as out:
+            out.write(SBML_DOC.replace('rxn90001_c0', 'rxn05145_e0'))
+        sbml = PyFBA.parse.stream_sbml_file(self.sbmlf)
+        self.assertEqual(set(sbml.reactions), {'rxn00001', 'rxn05145'})
+        r = sbml.reactions['rxn05145']
+        self.assertEqual(r.description, 'phosphate transport, written backwards')
+        self.assertEqual(r.direction, '=')
+        self.assertIs(sbml.get_a_reaction_by_signature(r), r)
+
+    @unittest.skipUnless(os.path.exists(EXAMPLE), "The example model is not available")
+    def test_stream_example(self):
+        """Parse the example model"""
+        sbml = PyFBA.parse.stream_sbml_file(EXAMPLE)
+        self.assertEqual(len(sbml.reactions), 1574)
+        self.assertIn('biomass_equation', sbml.reactions)
+        # the tree does not grow with the document
+        sbml, largest = self.largest_tree(EXAMPLE, every=1000)
+        self.assertLess(largest, 1000)
+
+    @unittest.skipUnless(os.path.exists(EXAMPLE), "The example model is not available")
+    def test_same_as_beautifulsoup(self):
+        """The streaming parser makes the same SBML object as the BeautifulSoup parser"""
+        try:
+            import bs4
+        except ImportError:
+            self.skipTest("BeautifulSoup is not installed")
+        soup = PyFBA.parse.parse_sbml_file(EXAMPLE)
+        stream = PyFBA.parse.stream_sbml_file(EXAMPLE)
+        self.assertEqual(set(soup.compounds), set(stream.compounds))
+        self.assertEqual(set(soup.reactions), set(stream.reactions))
+        for r in soup.reactions:
+            self.assertEqual(soup.reactions[r].equation, stream.reactions[r].equation)
+            self.assertEqual(soup.reactions[r].lower_bound, stream.reactions[r].lower_bound)
+            self.assertEqual(soup.reactions[r].upper_bound, stream.reactions[r].upper_bound)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import PyFBA
+
+"""
+Test the subsystem index
+"""
+
+SS_FUNCTIONS = """# function\tsubsystem
+Alpha-fimbriae chaperone protein\tFimbriae
+Alpha-fimbriae major subunit / Alpha-fimbriae usher protein\tFimbriae
+Phosphate transporter\tPhosphate metabolism
+too few columns
+"""
+
+
+class TestSubsystems(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.ssf = os.path.join(self.dir, 'SS_functions.txt')
+        with open(self.ssf, 'w') as out:
+            out.write(SS_FUNCTIONS)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_roles_to_subsystem(self):
+        """Classify roles, including ones we do not know"""
+        rss = PyFBA.parse.roles_to_subsystem({'Alpha-fimbriae chaperone protein', 'Not a real role'})
+        self.assertEqual(rss['Alpha-fimbriae chaperone protein'],
+                         {('Virulence', 'Fimbriae of the Chaperone/Usher Assembly Pathway', '&#945;-Fimbriae')})
+        self.assertEqual(rss['Not a real role'], {("Unknown", "Unknown", "Unknown")})
+        # changing the answer does not change the index
+        rss['Not a real role'].add(('a', 'b', 'c'))
+        self.assertEqual(PyFBA.parse.roles_to_subsystem({'Not a real role'})['Not a real role'],
+                         {("Unknown", "Unknown", "Unknown")})
+
+    def test_shared_index(self):
+        """The index is only built once per process"""
+        self.assertIs(PyFBA.parse.subsystem_index(), PyFBA.parse.subsystem_index())
+        self.assertIs(PyFBA.parse.subsystem_index().classification, PyFBA.parse.subsystem_index().classification)
+
+    def test_ss_file(self):
+        """Read the roles in each subsystem"""
+        index = PyFBA.parse.SubsystemIndex(ss_file=self.ssf)
+        self.assertEqual(index.subsystems_to_roles['Fimbriae'],
+                         {'Alpha-fimbriae chaperone protein', 'Alpha-fimbriae major subunit',
+                          'Alpha-fimbriae usher protein'})
+        self.assertEqual(index.roles_to_subsystems['Phosphate transporter'], {'Phosphate metabolism'})
+        self.assertRaises(IOError, lambda: PyFBA.parse.SubsystemIndex(ss_file='/no/such/file').subsystems_to_roles)
+
+    def test_dump_and_load(self):
+        """Save the index and load it again without reading the files"""
+        index = PyFBA.parse.SubsystemIndex(ss_file=self.ssf)
+        dumpf = os.path.join(self.dir, 'subsystems.index')
+        index.dump(dumpf)
+        os.remove(self.ssf)
+        loaded = PyFBA.parse.SubsystemIndex.load(dumpf)
+        self.assertEqual(loaded.subsystems_to_roles, index.subsystems_to_roles)
+        self.assertEqual(loaded.classify('Alpha-fimbriae usher protein'), index.classify('Alpha-fimbriae usher protein'))
+
+
+if __name__ == '__main__':
+    unittest.main()
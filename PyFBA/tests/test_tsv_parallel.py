@@ -0,0 +1,101 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import PyFBA.parse.tsv_parser.model_seed as tsv_model_seed
+
+"""
+Test that parsing the model seed tsv files in parallel gives exactly the same compounds and reactions as
+parsing them serially. We write a small biochemistry in the same format as the Model SEED Database so these
+tests do not need the real database.
+"""
+
+NCOMPOUNDS = 150
+NREACTIONS = 400
+
+
+def write_biochemistry(msd):
+    """Write compounds.tsv and reactions.tsv with enough lines to split into several chunks"""
+    os.makedirs(os.path.join(msd, 'Biochemistry'))
+    with open(os.path.join(msd, 'Biochemistry', 'compounds.tsv'), 'w') as out:
+        out.write("id\tabbreviation\tname\tformula\tmass\tsource\n")
+        for i in range(NCOMPOUNDS):
+            # every tenth compound shares a name with the one before, like D-Glucose in the real database
+            name = "Compound {}".format(i - 1 if i % 10 == 9 else i)
+            out.write("cpd{:05d}\tc{}\t{}\tC{}H{}\t{}\tModelSEED\n".format(i, i, name, i, 2 * i, 12.5 * i))
+    with open(os.path.join(msd, 'Biochemistry', 'reactions.tsv'), 'w') as out:
+        out.write("\t".join(["id", "abbreviation", "name", "code", "stoichiometry", "is_transport", "equation",
+                             "definition", "reversibility", "direction", "abstract_reaction", "pathways",
+                             "aliases", "ec_numbers", "deltag", "deltagerr", "compound_ids", "status",
+                             "is_obsolete", "linked_reaction", "notes"]) + "\n")
+        for i in range(NREACTIONS):
+            a, b, c = i % NCOMPOUNDS, (3 * i + 1) % NCOMPOUNDS, (7 * i + 2) % NCOMPOUNDS
+            stoich = '-1:cpd{:05d}:0:0:"a";-2:cpd{:05d}:0:0:"b";1:cpd{:05d}:{}:0:"c"'.format(a, b, c, i % 2)
+            equation = "(1) cpd{:05d}[0] + (2) cpd{:05d}[0] <=> (1) cpd{:05d}[{}]".format(a, b, c, i % 2)
+            if i % 13 == 0:
+                # no structured stoichiometry, so we parse the equation
+                stoich = "null"
+            deltag = "null" if i % 5 == 0 else str(-0.25 * i)
+            out.write("\t".join(["rxn{:05d}".format(i), "r{}".format(i), "reaction {}".format(i), equation,
+                                 stoich, str(i % 2), equation, equation, "=", "=", "null", "null", "null",
+                                 "null", deltag, "0.5", "null", "OK", "0", "null", "null"]) + "\n")
+            if i % 97 == 0:
+                out.write("# a comment line\n")
+
+
+class TestTSVParallel(unittest.TestCase):
+
+    def setUp(self):
+        """Write the biochemistry and point ModelSEEDDatabase at it"""
+        self.msd = tempfile.mkdtemp()
+        write_biochemistry(self.msd)
+        self.oldmsd = os.environ.get('ModelSEEDDatabase')
+        os.environ['ModelSEEDDatabase'] = self.msd
+
+    def tearDown(self):
+        if self.oldmsd is None:
+            os.environ.pop('ModelSEEDDatabase')
+        else:
+            os.environ['ModelSEEDDatabase'] = self.oldmsd
+        shutil.rmtree(self.msd)
+
+    def test_chunks(self):
+        """The chunks cover the whole file and start at the beginning of a line"""
+        rf = os.path.join(self.msd, 'Biochemistry', 'reactions.tsv')
+        with open(rf, 'rb') as f:
+            data = f.read()
+        for n in [1, 2, 7, 64, 100000]:
+            chunks = tsv_model_seed._chunks(rf, n)
+            self.assertLessEqual(len(chunks), n)
+            self.assertEqual(b"".join([data[s:e] for _, s, e in chunks]), data)
+            for _, s, e in chunks:
+                self.assertTrue(s == 0 or data[s - 1:s] == b"\n")
+
+    def test_serial_streams(self):
+        """Parsing serially reads the file one line at a time, and gives the same records as the chunks"""
+        rf = os.path.join(self.msd, 'Biochemistry', 'reactions.tsv')
+        records = tsv_model_seed._parse_chunks(tsv_model_seed._reaction_records, rf)
+        self.assertEqual(next(records)[0], 'rxn00000')
+        self.assertEqual([r[0] for r in records], ['rxn{:05d}'.format(i) for i in range(1, NREACTIONS)])
+        self.assertEqual(list(tsv_model_seed._parse_chunks(tsv_model_seed._reaction_records, rf)),
+                         list(tsv_model_seed._parse_chunks(tsv_model_seed._reaction_records, rf, processes=2)))
+
+    def test_parallel_compounds(self):
+        """The compounds are byte identical whether we parse them serially or in parallel"""
+        serial = tsv_model_seed.compounds()
+        self.assertEqual(len(serial), NCOMPOUNDS - NCOMPOUNDS // 10)
+        for processes in [2, 3]:
+            self.assertEqual(pickle.dumps(tsv_model_seed.compounds(processes=processes)), pickle.dumps(serial))
+
+    def test_parallel_reactions(self):
+        """The compounds and reactions are byte identical whether we parse them serially or in parallel"""
+        serial = tsv_model_seed.reactions()
+        self.assertEqual(len(serial[1]), NREACTIONS)
+        for processes in [2, 3]:
+            self.assertEqual(pickle.dumps(tsv_model_seed.reactions(processes=processes)), pickle.dumps(serial))
+
+
+if __name__ == '__main__':
+    unittest.main()
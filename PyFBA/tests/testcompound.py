@@ -1,3 +1,4 @@
+import pickle
 import unittest
 import PyFBA
 
@@ -42,3 +43,28 @@ class TestCompound(unittest.TestCase):
             self.compound.add_reactions,
             "A reaction"
         )
+
+    def test_lazy_containers(self):
+        """The reactions are only created when they are used, and compounds do not have a __dict__"""
+        self.assertFalse(hasattr(self.compound, '__dict__'))
+        self.assertEqual(self.compound.number_of_reactions(), 0)
+        self.assertFalse(self.compound.has_reaction("a"))
+        self.assertIsNone(self.compound._reactions)
+        self.compound.alternate_seed_ids.add("cpd00001")
+        self.assertEqual(self.compound.alternate_seed_ids, {"cpd00001"})
+
+    def test_registry(self):
+        """Each (name, location) has one id in the registry, and its key is the str() of the compound"""
+        other = PyFBA.metabolism.Compound("test compound", 'c')
+        self.assertEqual(self.compound.id, other.id)
+        self.assertIs(self.compound.key, other.key)
+        self.assertEqual(self.compound.key, str(self.compound))
+        self.assertEqual(PyFBA.metabolism.compound_key(self.compound.id), str(self.compound))
+        self.assertEqual(PyFBA.metabolism.compound_key(self.compound), str(self.compound))
+        self.assertNotEqual(PyFBA.metabolism.Compound("test compound", 'e').id, self.compound.id)
+        other.name = "Another compound"
+        self.assertNotEqual(other.id, self.compound.id)
+        self.assertEqual(str(other), "Another compound (location: c)")
+        copied = pickle.loads(pickle.dumps(self.compound))
+        self.assertIsNone(copied._id)
+        self.assertEqual(copied.id, self.compound.id)
@@ -136,3 +136,32 @@ class TestEnzyme(unittest.TestCase):
         self.assertFalse(self.enz.has_peg_for_role('c'))
 
 
+
+    def test_enzyme_index(self):
+        """Scoring all of the complexes at once gives the same probabilities as the enzymes"""
+        self.enz.add_reaction('rxn00001')
+        other = PyFBA.metabolism.Enzyme('other enz')
+        other.add_roles({'c', 'd'})
+        other.add_reaction('rxn00001')
+        other.add_reaction('rxn00002')
+        empty = PyFBA.metabolism.Enzyme('no roles')
+        empty.add_reaction('rxn00003')
+        enzymes = {e.name: e for e in [self.enz, other, empty]}
+        index = PyFBA.metabolism.EnzymeIndex.from_enzymes(enzymes)
+        self.assertEqual(index.complex_ids, ['other enz', 'test enz'])
+        self.assertEqual(index.reaction_ids, ['rxn00001', 'rxn00002'])
+
+        role_pegs = {'a': ['fig|1.1.peg.1'], 'c': ['fig|1.1.peg.2'], 'd': [], 'x': ['fig|1.1.peg.3']}
+        self.enz.add_pegs({'fig|1.1.peg.1': 'a', 'fig|1.1.peg.2': 'c'})
+        other.add_a_peg('fig|1.1.peg.2', 'c')
+        self.assertEqual(list(index.complex_probabilities(role_pegs)), [other.probability(), self.enz.probability()])
+        self.assertEqual(list(index.reaction_probabilities(role_pegs)), [2 / 3, 0.5])
+        self.assertEqual(index.reaction_weights(role_pegs), {'rxn00001': 1 - 2 / 3, 'rxn00002': 0.5})
+        self.assertEqual(index.complete_complexes({'c', 'd'}), {'complete': {'other enz'}, 'incomplete': {'test enz'}})
+
+        same = PyFBA.metabolism.EnzymeIndex.from_roles({'a': {'test enz'}, 'b': {'test enz'},
+                                                        'c': {'test enz', 'other enz', 'cpx.missing'},
+                                                        'd': {'other enz'}},
+                                                       {'test enz': {'rxn00001'},
+                                                        'other enz': {'rxn00001', 'rxn00002'}})
+        self.assertEqual(list(same.complex_probabilities(role_pegs)), list(index.complex_probabilities(role_pegs)))
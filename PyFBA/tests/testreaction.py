@@ -141,6 +141,70 @@ class TestReaction(unittest.TestCase):
         self.reaction.add_right_compounds({"a", "b", "c"})
         self.assertEqual(self.reaction.number_of_compounds(), 6)
 
+    def test_equation(self):
+        """Test rendering and setting the equation"""
+        r = PyFBA.metabolism.Reaction('r1')
+        self.assertIsNone(r.equation)
+        r.add_left_compounds({PyFBA.metabolism.Compound('a', 'c')})
+        r.set_left_compound_abundance(PyFBA.metabolism.Compound('a', 'c'), 2)
+        r.add_right_compounds({PyFBA.metabolism.Compound('b', 'e')})
+        r.set_right_compound_abundance(PyFBA.metabolism.Compound('b', 'e'), 0.5)
+        self.assertEqual(r.equation, "(2) a[c] <=> (0.5) b[e]")
+        self.assertIsNone(r.explicit_equation)
+        r.equation = "a => b"
+        self.assertEqual(r.equation, "a => b")
+        self.assertEqual(r.explicit_equation, "a => b")
+
+    def test_signature(self):
+        """Test the stoichiometric signature and finding duplicate reactions"""
+        a = PyFBA.metabolism.Compound('a', 'c')
+        b = PyFBA.metabolism.Compound('b', 'c')
+        r1 = PyFBA.metabolism.Reaction('r1')
+        r1.add_left_compounds({a})
+        r1.set_left_compound_abundance(a, 2)
+        r1.add_right_compounds({b})
+        r1.set_right_compound_abundance(b, 1)
+        self.assertEqual(r1.signature(), (('a', 'c', -2), ('b', 'c', 1)))
+        # the same reaction written the other way around
+        r2 = PyFBA.metabolism.Reaction('r2')
+        r2.add_left_compounds({b})
+        r2.set_left_compound_abundance(b, 1)
+        r2.add_right_compounds({a})
+        r2.set_right_compound_abundance(a, 2)
+        self.assertEqual(r1.signature(), r2.signature())
+        # a different stoichiometry
+        r3 = PyFBA.metabolism.Reaction('r3')
+        r3.add_left_compounds({a})
+        r3.set_left_compound_abundance(a, 1)
+        r3.add_right_compounds({b})
+        r3.set_right_compound_abundance(b, 1)
+        self.assertNotEqual(r1.signature(), r3.signature())
+        self.assertEqual(list(PyFBA.metabolism.duplicate_reactions({'r1': r1, 'r2': r2, 'r3': r3}).values()),
+                         [['r1', 'r2']])
+        # equality and the signature hash follow the signature, which is kept until the reaction changes
+        self.assertEqual(r1, r2)
+        self.assertNotEqual(r1, r3)
+        self.assertEqual(r1.signature_hash(), r2.signature_hash())
+        self.assertIs(r1.signature(), r1.signature())
+        r3.set_left_compound_abundance(a, 2)
+        self.assertEqual(r1, r3)
+        r3.add_left_compounds({PyFBA.metabolism.Compound('c', 'c')})
+        self.assertNotEqual(r1, r3)
+        r2.reverse_reaction()
+        self.assertEqual(r1, r2)
+        # the hash is the name, so equal reactions are still different members of a set
+        self.assertEqual(len({r1, r2}), 2)
+        self.assertIn(r2, {r2})
+        # assigning a container resets the signature
+        r2.right_abundance = {b: 3}
+        self.assertNotEqual(r1, r2)
+        self.assertNotEqual(r1.signature_hash(), r2.signature_hash())
+        r2.right_abundance = {b: 1}
+        self.assertEqual(r1, r2)
+        stoichiometry = r2.stoichiometry()
+        r2.left_compounds = set(r2.left_compounds)
+        self.assertIsNot(r2.stoichiometry(), stoichiometry)
+
     def test_equals(self):
         """Test the equals method defined for two reactions"""
         other_reaction = PyFBA.metabolism.Reaction("similar reaction")
@@ -292,6 +356,60 @@ class TestReaction(unittest.TestCase):
         self.assertEqual(self.reaction.get_probability_right_to_left(), 20)
         self.assertEqual(self.reaction.get_probability_left_to_right(), 10)
 
+    def test_lazy_containers(self):
+        """The sets and dicts are only created when they are used, and reactions do not have a __dict__"""
+        self.assertFalse(hasattr(self.reaction, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.reaction.not_an_attribute = True
+        self.assertEqual(self.reaction.number_of_enzymes(), 0)
+        self.assertFalse(self.reaction.has('a'))
+        self.assertEqual(self.reaction.all_compounds(), set())
+        self.assertIsNone(self.reaction._enzymes)
+        self.assertIsNone(self.reaction._left_compounds)
+        self.reaction.enzymes.add('cpx00001')
+        self.assertEqual(self.reaction.enzymes, {'cpx00001'})
+        self.assertFalse(hasattr(self.reaction, 'aliases'))
+
+    def test_copy_and_pickle(self):
+        """Reactions can be copied and pickled"""
+        import copy
+        import pickle
+        self.reaction.add_left_compounds({'a'})
+        self.reaction.set_left_compound_abundance('a', 2)
+        self.reaction.add_enzymes({'cpx00001'})
+        for r in [copy.copy(self.reaction), pickle.loads(pickle.dumps(self.reaction))]:
+            self.assertEqual(r.name, self.reaction.name)
+            self.assertEqual(r.left_abundance, {'a': 2})
+            self.assertEqual(r.enzymes, {'cpx00001'})
+            self.assertIsNone(r._pegs)
+
+    def test_stoichiometry(self):
+        """The stoichiometry arrays have the registry ids of the compounds and signed coefficients"""
+        h2o = PyFBA.metabolism.Compound("H2O", "c")
+        ppi = PyFBA.metabolism.Compound("PPi", "c")
+        pi = PyFBA.metabolism.Compound("Phosphate", "c")
+        self.reaction.add_left_compounds({h2o, ppi})
+        self.reaction.set_left_compound_abundance(h2o, 1)
+        self.reaction.set_left_compound_abundance(ppi, 1)
+        self.reaction.add_right_compounds({pi})
+        self.reaction.set_right_compound_abundance(pi, 2)
+        self.assertEqual(dict(zip(self.reaction.compound_indices, self.reaction.coefficients)),
+                         {h2o.id: -1.0, ppi.id: -1.0, pi.id: 2.0})
+        self.assertIs(self.reaction.stoichiometry(), self.reaction.stoichiometry())
+        self.reaction.set_right_compound_abundance(pi, 3)
+        self.assertEqual(self.reaction.coefficients[-1], 3.0)
+        self.reaction.reverse_reaction()
+        self.assertEqual(dict(zip(self.reaction.compound_indices, self.reaction.coefficients)),
+                         {h2o.id: 1.0, ppi.id: 1.0, pi.id: -3.0})
+
+        other = PyFBA.metabolism.Reaction("other")
+        other.add_left_compounds({pi})
+        other.set_left_compound_abundance(pi, 1)
+        indptr, indices, data = PyFBA.metabolism.stoichiometric_columns([self.reaction, other])
+        self.assertEqual(list(indptr), [0, 3, 4])
+        self.assertEqual(list(indices[3:]), [pi.id])
+        self.assertEqual(list(data[3:]), [-1.0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,31 @@
+"""
+Compare an old copy of the Model SEED Database with the current one (the ModelSEEDDatabase directory), update a
+biochemistry store with the changes, and list the saved models that use reactions that changed.
+"""
+
+import argparse
+import sys
+
+import PyFBA
+
+parser = argparse.ArgumentParser(description="Update a biochemistry store after the Model SEED Database changes")
+parser.add_argument("old", help="The directory of the old Model SEED Database")
+parser.add_argument("-n", "--new", help="The directory of the new Model SEED Database (default: $ModelSEEDDatabase)")
+parser.add_argument("-s", "--store", help="The biochemistry store to update")
+parser.add_argument("-m", "--models", help="A directory of saved models to check")
+parser.add_argument("-v", "--verbose", help="Verbose stderr output", action="store_true")
+args = parser.parse_args()
+
+diff = PyFBA.parse.diff_snapshots(args.old, args.new)
+for kind in ['compounds', 'reactions', 'complexes']:
+    print("{}: {} added, {} removed, {} changed".format(kind, len(diff[kind]['added']), len(diff[kind]['removed']),
+                                                        len(diff[kind]['changed'])), file=sys.stderr)
+print("{} reactions are affected".format(len(diff['affected_reactions'])), file=sys.stderr)
+
+if args.store:
+    n = PyFBA.parse.update_store(args.store, diff, verbose=args.verbose)
+    print("Updated {} with {} reactions from the new database".format(args.store, n), file=sys.stderr)
+
+if args.models:
+    for model, reactions in PyFBA.parse.affected_models(diff['affected_reactions'], args.models).items():
+        print("\t".join([model, ";".join(sorted(reactions))]))
@@ -0,0 +1,75 @@
+"""
+Measure how long it takes to import PyFBA (or one of its subpackages) using the interpreter's own
+`python -X importtime` instrumentation.
+
+Each measurement is made in a fresh interpreter with the ModelSEEDDatabase environment variable removed, so
+this also checks that importing the package does not need the database. We report the best of several runs
+because the first import is often dominated by a cold file system cache.
+
+Example:
+
+    python benchmarks/import_time.py -m PyFBA -m PyFBA.metabolism -n 5 --max 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+def import_times(module, python=sys.executable):
+    """
+    Import a module in a new interpreter with -X importtime and parse the timings it writes to stderr.
+
+    :param module: The module to import, e.g. PyFBA.metabolism
+    :type module: str
+    :param python: The python interpreter to use
+    :type python: str
+    :return: A dict of module name and a tuple of (self, cumulative) import time in microseconds
+    :rtype: dict of str and (int, int)
+    """
+
+    env = dict(os.environ)
+    env.pop('ModelSEEDDatabase', None)
+    env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(os.path.abspath(__file__)))] +
+                                        ([env['PYTHONPATH']] if 'PYTHONPATH' in env else []))
+    proc = subprocess.run([python, "-X", "importtime", "-c", "import " + module], env=env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        raise RuntimeError("Importing {} failed:\n{}".format(module, proc.stderr))
+
+    times = {}
+    for l in proc.stderr.split("\n"):
+        if not l.startswith("import time:") or "self [us]" in l:
+            continue
+        selft, cumulative, name = l[len("import time:"):].split("|")
+        times[name.strip()] = (int(selft), int(cumulative))
+    return times
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the import time of PyFBA with python -X importtime")
+    parser.add_argument('-m', help='module to import (default: PyFBA). Can be repeated', action='append')
+    parser.add_argument('-n', help='number of runs (default: 5)', type=int, default=5)
+    parser.add_argument('-t', help='number of slowest PyFBA modules to report (default: 10)', type=int, default=10)
+    parser.add_argument('--max', help='exit with an error if any import takes longer than this (ms)', type=float)
+    args = parser.parse_args()
+
+    failed = False
+    for m in args.m or ['PyFBA']:
+        best = None
+        for i in range(args.n):
+            t = import_times(m)
+            if best is None or t[m][1] < best[m][1]:
+                best = t
+        total = best[m][1] / 1000.0
+        print("{}\t{:.2f} ms cumulative ({} modules imported)".format(m, total, len(best)))
+        slowest = sorted([x for x in best if x.startswith('PyFBA')], key=lambda x: best[x][0], reverse=True)
+        for x in slowest[:args.t]:
+            print("\t{}\t{:.2f} ms self\t{:.2f} ms cumulative".format(x, best[x][0] / 1000.0, best[x][1] / 1000.0))
+        if args.max and total > args.max:
+            sys.stderr.write("ERROR: importing {} took {:.2f} ms (limit {} ms)\n".format(m, total, args.max))
+            failed = True
+
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+"""
+Measure the memory used by the Compound, Reaction, and Enzyme objects for the whole Model SEED Database.
+
+We load the biochemistry with PyFBA.parse.model_seed.compounds_reactions_enzymes() and report the memory that is
+still allocated afterwards (measured with tracemalloc), the peak memory while parsing, and the maximum resident set
+size of the process. We also report the average size of each type of object, including the sets and dicts that it
+owns, so you can see how much the empty containers cost.
+
+Example:
+
+    ModelSEEDDatabase=/path/to/ModelSEEDDatabase python benchmarks/metabolism_memory.py -o gramnegative
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PyFBA
+
+
+def object_size(obj):
+    """
+    The size of an object and the containers in its slots (but not the objects in those containers, which are shared).
+
+    :param obj: A Compound, Reaction, or Enzyme
+    :type obj: object
+    :return: The size in bytes
+    :rtype: int
+    """
+    size = sys.getsizeof(obj)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', []):
+            value = getattr(obj, slot, None)
+            if isinstance(value, (set, frozenset, dict, list)):
+                size += sys.getsizeof(value)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+        size += sum(sys.getsizeof(v) for v in obj.__dict__.values() if isinstance(v, (set, frozenset, dict, list)))
+    return size
+
+
+def report(name, objects):
+    """
+    Print the number of objects and their average and total size.
+
+    :param name: The type of object
+    :type name: str
+    :param objects: The objects
+    :type objects: list
+    """
+    total = sum(object_size(o) for o in objects)
+    print("{}\t{} objects\t{:.1f} bytes each\t{:.2f} MB".format(name, len(objects), total / max(1, len(objects)),
+                                                                  total / 1e6))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the memory used by the parsed biochemistry")
+    parser.add_argument('-o', help='organism type (default: none)', default='')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    compounds, reactions, enzymes = PyFBA.parse.model_seed.compounds_reactions_enzymes(args.o)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the reactions can have compounds that are not in the compounds dict
+    allcpds = {id(c): c for c in compounds.values()}
+    for r in reactions.values():
+        allcpds.update({id(c): c for c in r.all_compounds()})
+
+    report("Compound", list(allcpds.values()))
+    report("Reaction", list(reactions.values()))
+    report("Enzyme", list(enzymes.values()))
+    print("Allocated after parsing\t{:.2f} MB".format(current / 1e6))
+    print("Peak while parsing\t{:.2f} MB".format(peak / 1e6))
+    # ru_maxrss is in kilobytes on linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print("Maximum resident set size\t{:.2f} MB".format(maxrss / (1e6 if sys.platform == 'darwin' else 1e3)))
@@ -0,0 +1,79 @@
+"""
+Compare the BeautifulSoup SBML parser (PyFBA.parse.parse_sbml_file) with the streaming iterparse parser
+(PyFBA.parse.stream_sbml_file).
+
+For each SBML file we report the best time of several runs and the peak memory allocated while parsing (measured
+with tracemalloc in a separate run, since tracing slows the parsers down), and check that both parsers found the
+same compounds and reactions. By default we use the example models bundled in example_data.
+
+Example:
+
+    python benchmarks/sbml_parsers.py -n 3
+    python benchmarks/sbml_parsers.py -s my_big_model.sbml
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import PyFBA
+
+
+def measure(parser, sbml_file, runs=3):
+    """
+    Time a parser and measure its peak memory.
+
+    :param parser: The function that parses the SBML file
+    :type parser: function
+    :param sbml_file: The SBML file
+    :type sbml_file: str
+    :param runs: The number of runs to time
+    :type runs: int
+    :return: The SBML object, the best time in seconds, and the peak memory in bytes
+    :rtype: SBML, float, int
+    """
+
+    best = None
+    for i in range(runs):
+        start = time.perf_counter()
+        sbml = parser(sbml_file)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    tracemalloc.start()
+    parser(sbml_file)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return sbml, best, peak
+
+
+if __name__ == '__main__':
+    example_data = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example_data')
+    parser = argparse.ArgumentParser(description="Compare the BeautifulSoup and streaming SBML parsers")
+    parser.add_argument('-s', help='SBML file (default: the example models). Can be repeated', action='append')
+    parser.add_argument('-n', help='number of runs (default: 3)', type=int, default=3)
+    args = parser.parse_args()
+
+    parsers = [('iterparse', PyFBA.parse.stream_sbml_file)]
+    try:
+        import bs4
+        parsers.insert(0, ('BeautifulSoup', PyFBA.parse.parse_sbml_file))
+    except ImportError:
+        sys.stderr.write("BeautifulSoup is not installed so we only measure the streaming parser\n")
+
+    for sbml_file in args.s or sorted(glob.glob(os.path.join(example_data, '*', '*.sbml'))):
+        results = {}
+        for name, p in parsers:
+            sbml, elapsed, peak = measure(p, sbml_file, args.n)
+            results[name] = sbml
+            print("{}\t{}\t{} reactions\t{} compounds\t{:.3f} s\t{:.1f} MB".format(
+                os.path.basename(sbml_file), name, len(sbml.reactions), len(sbml.compounds), elapsed, peak / 1e6))
+        if len(results) > 1:
+            same = all(set(s.reactions) == set(results['iterparse'].reactions) and
+                       set(s.compounds) == set(results['iterparse'].compounds) for s in results.values())
+            print("{}\tthe parsers {}".format(os.path.basename(sbml_file), "agree" if same else "DISAGREE"))